@@ -0,0 +1,277 @@
+"""
+命令行入口
+
+无界面地添加、查看和控制下载任务，并以守护进程方式运行下载引擎：
+
+    python -m src.cli add URL [URL ...] [-d 目录] [-o 文件名] [-c 连接数] [-p 优先级] [-m 镜像] [--checksum 校验和]
+    python -m src.cli list [--all]
+    python -m src.cli pause|resume|recheck|remove 任务ID前缀
+    python -m src.cli daemon [--exit-when-idle] [--control-port 端口]
+
+add/pause/resume/recheck/remove 只写入任务库的命令队列，由守护进程取出执行
+（recheck 按分片索引校验临时文件，只重新下载损坏的分片）；守护进程使用不依赖Qt的
+DownloadEngine，整个命令行不导入 PySide6 和界面模块。守护进程还可以同时启动本机
+控制接口（见 src.core.control_server）。
+"""
+
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+from typing import List, Optional
+
+from src.core.download_task import DownloadTask
+from src.core.integrity import parse_checksum
+from src.database.task_store import TaskStore
+from src.utils.config import ConfigManager
+from src.utils.helpers import (
+    format_size, format_speed, get_filename_from_url, is_valid_url, sanitize_filename
+)
+
+
+# 状态 -> 显示文本
+STATUS_TEXT = {
+    "waiting": "等待中",
+    "downloading": "下载中",
+    "paused": "已暂停",
+    "completed": "已完成",
+    "failed": "失败",
+    "stopped": "已停止"
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(prog='python -m src.cli', description='PyDownloader 命令行')
+    parser.add_argument('--db', help='任务库路径（默认使用配置中的 database.path）')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    add = subparsers.add_parser('add', help='添加下载任务')
+    add.add_argument('urls', nargs='+', metavar='URL', help='下载链接')
+    add.add_argument('-d', '--dir', help='保存目录（默认使用配置中的下载目录）')
+    add.add_argument('-o', '--output', help='文件名（只能用于单个链接）')
+    add.add_argument('-c', '--connections', type=int, help='连接数')
+    add.add_argument('-p', '--priority', type=int, default=0, help='优先级（越大越先下载）')
+    add.add_argument('-m', '--mirror', action='append', default=[], metavar='URL',
+                     help='同一文件的镜像链接（可重复，只能用于单个链接）')
+    add.add_argument('--checksum', default='',
+                     help='期望的校验和：sha256:摘要、sha256:校验文件URL 或 .sha256/.meta4 校验文件URL')
+
+    show = subparsers.add_parser('list', help='列出任务')
+    show.add_argument('--all', action='store_true', help='同时列出已完成的任务')
+    show.add_argument('--limit', type=int, default=100, help='最多列出的历史记录数')
+
+    for name, text in (('pause', '暂停任务'), ('resume', '恢复任务'),
+                       ('recheck', '校验临时文件并只重新下载损坏的分片'), ('remove', '删除任务')):
+        command = subparsers.add_parser(name, help=text)
+        command.add_argument('task_id', help='任务ID（可以只写前缀）')
+
+    daemon = subparsers.add_parser('daemon', help='运行下载守护进程')
+    daemon.add_argument('--poll-interval', type=float, help='检查命令队列的间隔（秒）')
+    daemon.add_argument('--exit-when-idle', action='store_true', help='没有下载和排队的任务时退出')
+    daemon.add_argument('--control-port', type=int,
+                        help='启动控制接口并监听此端口（默认按配置 control.enabled 决定）')
+
+    return parser
+
+
+def cmd_add(args, config: ConfigManager, store: TaskStore) -> int:
+    """添加下载任务（提交给守护进程）"""
+    if args.output and len(args.urls) > 1:
+        print('错误: -o 只能用于单个链接', file=sys.stderr)
+        return 2
+    if args.mirror and len(args.urls) > 1:
+        print('错误: -m 只能用于单个链接', file=sys.stderr)
+        return 2
+    for mirror in args.mirror:
+        if not is_valid_url(mirror):
+            print(f'无效的镜像链接: {mirror}', file=sys.stderr)
+            return 2
+    if args.checksum:
+        try:
+            _, value = parse_checksum(args.checksum)
+        except ValueError as e:
+            print(f'错误: {e}', file=sys.stderr)
+            return 2
+        # 校验文件可以包含多个文件的摘要，直接给出的摘要只对应一个文件
+        if len(args.urls) > 1 and not is_valid_url(value):
+            print('错误: 直接给出的摘要只能用于单个链接', file=sys.stderr)
+            return 2
+
+    save_path = os.path.expanduser(args.dir) if args.dir else config.get_download_path()
+    connections = args.connections or config.get('download.connections', 8)
+
+    status = 0
+    for url in args.urls:
+        if not is_valid_url(url):
+            print(f'无效的链接: {url}', file=sys.stderr)
+            status = 1
+            continue
+
+        filename = sanitize_filename(args.output or get_filename_from_url(url))
+        file_path = os.path.join(save_path, filename)
+        if os.path.exists(file_path):
+            print(f'文件已存在: {file_path}', file=sys.stderr)
+            status = 1
+            continue
+
+        task = DownloadTask(
+            url=url,
+            save_path=save_path,
+            filename=filename,
+            connections=connections,
+            priority=args.priority,
+            mirrors=args.mirror,
+            checksum=args.checksum
+        )
+        store.save([task])
+        store.push_command('add', task_id=task.task_id)
+        print(f'{task.task_id[:8]}  {filename}')
+
+    return status
+
+
+def cmd_list(args, config: ConfigManager, store: TaskStore) -> int:
+    """列出任务"""
+    tasks = store.load_active()
+    if args.all:
+        tasks += store.load_history(args.limit)
+
+    for task in tasks:
+        if task.total_size > 0:
+            size_text = f'{format_size(task.downloaded_size)}/{format_size(task.total_size)}'
+        else:
+            size_text = format_size(task.downloaded_size)
+        speed_text = format_speed(task.speed) if task.status == 'downloading' else '--'
+        print(
+            f'{task.task_id[:8]}  {STATUS_TEXT.get(task.status, task.status):<4}  '
+            f'{task.progress:5.1f}%  {size_text:>21}  {speed_text:>11}  {task.filename}'
+        )
+    return 0
+
+
+def cmd_control(args, config: ConfigManager, store: TaskStore) -> int:
+    """暂停、恢复、校验或删除任务（提交给守护进程）"""
+    task_ids = store.find_task_ids(args.task_id)
+    if not task_ids:
+        print(f'找不到任务: {args.task_id}', file=sys.stderr)
+        return 1
+    if len(task_ids) > 1:
+        print(f'任务ID前缀不唯一: {args.task_id}', file=sys.stderr)
+        return 1
+
+    store.push_command(args.command, task_id=task_ids[0])
+    print(f'{task_ids[0][:8]}  已提交')
+    return 0
+
+
+def apply_commands(engine) -> int:
+    """
+    执行命令队列中的命令
+
+    Args:
+        engine: 下载引擎
+
+    Returns:
+        int: 执行的命令数
+    """
+    commands = engine.store.pop_commands()
+    for _, command, command_args in commands:
+        task_id = command_args.get('task_id', '')
+        if command == 'add':
+            task = engine.store.load(task_id)
+            if task is not None:
+                engine.adopt_task(task)
+        elif command == 'pause':
+            engine.pause_task(task_id)
+        elif command == 'resume':
+            task = engine.get_task(task_id)
+            if task is not None and task.status == 'paused':
+                engine.resume_task(task_id)
+            else:
+                engine.start_task(task_id)
+        elif command == 'recheck':
+            engine.recheck_task(task_id)
+        elif command == 'remove':
+            engine.remove_task(task_id)
+        else:
+            engine.logger.warning(f"未知命令: {command}")
+    return len(commands)
+
+
+def cmd_daemon(args, config: ConfigManager, store: TaskStore) -> int:
+    """运行下载守护进程，直到收到 SIGINT/SIGTERM（或任务全部结束）"""
+    # 只有守护进程需要下载器和网络库
+    from src.core.control_server import ControlServer
+    from src.core.download_engine import DownloadEngine
+
+    engine = DownloadEngine(args.db)
+    control_server = None
+    if args.control_port is not None or config.get('control.enabled', False):
+        control_server = ControlServer(engine, port=args.control_port)
+        control_server.start()
+    poll_interval = args.poll_interval or float(config.get('daemon.poll_interval', 1.0))
+
+    stopping = threading.Event()
+
+    def on_signal(signum, frame):
+        stopping.set()
+
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+
+    engine.logger.info("守护进程已启动")
+    try:
+        next_poll = 0.0
+        while not stopping.is_set():
+            now = time.monotonic()
+            if now >= next_poll:
+                apply_commands(engine)
+                next_poll = now + poll_interval
+                if args.exit_when_idle and engine.is_idle:
+                    break
+            engine.run_once(max(0.0, next_poll - time.monotonic()))
+    finally:
+        if control_server is not None:
+            control_server.stop()
+        engine.shutdown()
+        engine.logger.info("守护进程已退出")
+    return 0
+
+
+HANDLERS = {
+    'add': cmd_add,
+    'list': cmd_list,
+    'pause': cmd_control,
+    'resume': cmd_control,
+    'recheck': cmd_control,
+    'remove': cmd_control,
+    'daemon': cmd_daemon
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    命令行主函数
+
+    Args:
+        argv: 命令行参数，为None时使用 sys.argv
+
+    Returns:
+        int: 退出码
+    """
+    args = build_parser().parse_args(argv)
+    config = ConfigManager()
+
+    db_path = args.db or config.get_database_path()
+    store = TaskStore(db_path)
+    try:
+        return HANDLERS[args.command](args, config, store)
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
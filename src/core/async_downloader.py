@@ -0,0 +1,594 @@
+"""
+异步下载引擎模块
+基于asyncio/aiohttp，在单个事件循环上运行所有任务及其分块
+"""
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import Optional, Callable
+
+import aiohttp
+
+from ..utils.config import ConfigManager
+from .download_task import DownloadTask
+from .connection_tuner import host_of
+from .downloader import Downloader
+from .metadata_probe import FileMetadata
+from .mirror_pool import Mirror, MirrorSwitch
+from .integrity import ChecksumError
+from .file_writer import TaskFileWriter
+from .io_buffer import ChunkBuffer
+from .chunk_table import ChunkView
+from .progress_counter import ProgressCounter
+from .retry import RetryPolicy, TransientError
+
+
+class AsyncEngine:
+    """共享异步引擎
+
+    一个后台线程运行事件循环，所有 AsyncDownloader 的任务和分块都是其上的协程，
+    并共用一个 aiohttp 连接器（连接池）。磁盘写入和fsync通过事件循环的默认
+    线程池执行，避免阻塞事件循环。
+    """
+
+    def __init__(self, max_connections: int = 1000, max_connections_per_host: int = 32,
+                 keepalive_timeout: float = 60.0):
+        """
+        初始化异步引擎
+
+        Args:
+            max_connections: 所有主机的最大并发连接数
+            max_connections_per_host: 每个主机的最大并发连接数
+            keepalive_timeout: 空闲连接保持时间（秒）
+        """
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_timeout = keepalive_timeout
+
+        self.loop = asyncio.new_event_loop()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._thread = threading.Thread(target=self._run, name="AsyncEngine", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_config(cls, config: Optional[ConfigManager] = None) -> 'AsyncEngine':
+        """
+        根据配置创建异步引擎
+
+        Args:
+            config: 配置管理器，为None时读取默认配置
+
+        Returns:
+            AsyncEngine: 异步引擎实例
+        """
+        config = config or ConfigManager()
+        return cls(
+            max_connections=config.get('network.async.max_connections', 1000),
+            max_connections_per_host=config.get('network.pool.max_connections_per_host', 32),
+            keepalive_timeout=config.get('network.pool.keepalive_timeout', 60)
+        )
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        """
+        从任意线程提交协程到事件循环
+
+        Args:
+            coro: 协程对象
+
+        Returns:
+            concurrent.futures.Future: 协程的结果
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """获取共享的HTTP会话（只能在事件循环中调用）"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(connector=connector, auto_decompress=False)
+        return self._session
+
+    async def run_blocking(self, func: Callable, *args):
+        """在线程池中执行阻塞调用（磁盘IO等）"""
+        return await self.loop.run_in_executor(None, func, *args)
+
+    def close(self, timeout: float = 5.0):
+        """
+        关闭会话并停止事件循环
+
+        Args:
+            timeout: 等待会话关闭的秒数
+        """
+        if self.loop.is_closed():
+            return
+
+        try:
+            self.submit(self._close_session()).result(timeout)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+
+    async def _close_session(self):
+        """关闭HTTP会话"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def _run(self):
+        """事件循环线程入口"""
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+
+class AsyncDownloader(Downloader):
+    """异步下载器
+
+    与 Downloader 保持相同的 DownloadTask、进度回调和 pause()/stop() 约定，
+    复用其分块调度、进度日志、计数器和文件写入逻辑，只把网络读写换成协程。
+    start() 会阻塞直到下载结束；管理器应使用 submit() 以免为每个任务占用线程。
+    """
+
+    def __init__(self, task: DownloadTask, progress_callback: Optional[Callable] = None):
+        """
+        初始化异步下载器
+
+        Args:
+            task: 下载任务
+            progress_callback: 进度回调函数（在事件循环线程中调用）
+        """
+        super().__init__(task, progress_callback)
+        self.engine = get_async_engine()
+
+    def submit(self) -> concurrent.futures.Future:
+        """
+        在共享事件循环上开始下载（不阻塞）
+
+        Returns:
+            concurrent.futures.Future: 下载结束时完成
+        """
+        return self.engine.submit(self.start_async())
+
+    def start(self):
+        """开始下载（阻塞直到结束）"""
+        self.submit().result()
+
+    async def start_async(self):
+        """下载协程"""
+        self.limiter.register(self.task.task_id)
+        try:
+            self.logger.info(f"开始下载: {self.task.url}")
+            self.task.mark_as_downloading()
+
+            # 获取文件信息和期望的校验和
+            if not await self._get_file_info_async() or \
+                    not await self.engine.run_blocking(self._prepare_checksum):
+                return
+
+            # 检查是否支持分块下载
+            if self.task.total_size > 0:
+                await self._download_with_chunks_async()
+            else:
+                await self._download_single_async()
+
+            # 检查是否完成（校验可能读取整个文件，在线程中进行，不阻塞其他下载）
+            await self.engine.run_blocking(self._finish)
+
+        except Exception as e:
+            self.task.mark_as_failed(str(e))
+            self.logger.error(f"下载失败: {e}")
+            self.prober.invalidate(self.task.url)
+        finally:
+            self.limiter.unregister(self.task.task_id)
+
+    async def _throttle_async(self, amount: int):
+        """
+        为已读取的字节付账，必要时休眠（暂停/停止或限速修改时提前结束）
+
+        Args:
+            amount: 字节数
+        """
+        delay, generation = self.limiter.reserve(self.task.task_id, amount)
+        deadline = time.monotonic() + delay
+
+        while delay > 0:
+            await asyncio.sleep(min(delay, self.limiter.WAIT_SLICE))
+            if self._pause_flag.is_set() or not self.limiter.is_current(generation):
+                return
+            delay = deadline - time.monotonic()
+
+    def _request_timeout(self) -> aiohttp.ClientTimeout:
+        """请求超时设置（连接和每次读取的超时，不限制总时长）"""
+        timeout = self.config.get('network.timeout', 30)
+        return aiohttp.ClientTimeout(total=None, sock_connect=timeout, sock_read=timeout)
+
+    async def _get_file_info_async(self) -> bool:
+        """获取文件信息（优先使用元数据缓存，探测结果也写入缓存）"""
+        try:
+            info = self.prober.get_cached(self.task.url)
+            if info is None:
+                session = await self.engine.get_session()
+                headers = {'User-Agent': 'Mozilla/5.0', 'Accept-Encoding': 'identity'}
+
+                async with session.head(self.task.url, headers=headers, timeout=self._request_timeout(),
+                                        allow_redirects=True) as response:
+                    if response.status < 400 and response.headers.get('Content-Length'):
+                        info = FileMetadata.from_response(
+                            self.task.url, str(response.url), response.status, response.headers
+                        )
+
+                if info is None:
+                    # HEAD失败或没有返回大小，在线程中用 Range: bytes=0-0 的GET请求探测
+                    info = await self.engine.run_blocking(self.prober.fetch, self.task.url)
+                else:
+                    self.prober.put(info)
+
+            self._apply_file_info(info)
+            # 镜像的文件信息在线程中并发获取
+            await self.engine.run_blocking(self._prepare_mirrors, info)
+            return True
+
+        except Exception as e:
+            self.task.mark_as_failed(f"获取文件信息失败: {e}")
+            self.logger.error(f"获取文件信息失败: {e}")
+            return False
+
+    async def _download_with_chunks_async(self):
+        """分块下载（校验方式见 Downloader._download_with_chunks）"""
+        journal = await self.engine.run_blocking(self._prepare_chunks)
+        hasher = await self.engine.run_blocking(self._create_hasher)
+        completed = False
+
+        try:
+            while True:
+                await self._run_chunk_workers_async(journal)
+                completed = await self.engine.run_blocking(self._complete_chunks, journal)
+                if not completed or self.expected_checksum is None or \
+                        await self.engine.run_blocking(self._check_integrity, hasher):
+                    break
+        finally:
+            if hasher is not None:
+                await self.engine.run_blocking(hasher.close)
+            if self._piece_index is not None:
+                await self.engine.run_blocking(self._piece_index.close)
+            # 完成时同步到磁盘；未完成时进度日志已同步过数据
+            await self.engine.run_blocking(self._writer.close, completed)
+
+        if isinstance(self._failure, ChecksumError):
+            await self.engine.run_blocking(self._discard_temp_file, journal)
+        elif completed:
+            await self.engine.run_blocking(self._commit_temp_file, journal)
+
+    async def _run_chunk_workers_async(self, journal):
+        """运行分块协程直到所有分块结束，期间记录写完的分片"""
+        # 每个连接一个协程，空闲协程会拆分最慢的分块继续下载；
+        # 连接数控制器增加连接时启动更多协程
+        pending = {
+            asyncio.ensure_future(self._chunk_worker_async(slot))
+            for slot in range(self._initial_workers())
+        }
+        recorder = self._start_piece_recorder()
+        try:
+            await self._wait_chunk_workers(pending, journal)
+        finally:
+            if recorder is not None:
+                await self.engine.run_blocking(recorder.stop)
+
+    async def _wait_chunk_workers(self, pending: set, journal):
+        """等待所有分块下载完成，期间定期汇总进度并写入进度日志"""
+        progress_interval = self.config.get('download.progress_interval', 1.0)
+        journal_interval = self.config.get('download.journal_interval', 2.0)
+        last_journal_time = time.monotonic()
+        started = len(pending)
+
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=progress_interval,
+                                               return_when=asyncio.FIRST_COMPLETED)
+
+            for future in done:
+                if future.exception() is not None:
+                    self.logger.error(f"分块下载失败: {future.exception()}")
+                    if self._failure is None:
+                        self._failure = future.exception()
+
+            if self._stop_flag.is_set() or self._pause_flag.is_set():
+                # 等待各协程写完已缓冲的数据后退出
+                await asyncio.gather(*pending, return_exceptions=True)
+                break
+
+            if time.time() - self._last_update_time >= progress_interval:
+                self._update_progress()
+
+            if self._writer.periodic_journal and \
+                    time.monotonic() - last_journal_time >= journal_interval:
+                await self.engine.run_blocking(self._save_progress, journal)
+                last_journal_time = time.monotonic()
+
+            slots = self._tune_connections(started)
+            if not pending and self._tuner is not None and self._scheduler.has_pending():
+                # 连接数减少时交回的区间可能在其他协程都已退出后才归还
+                slots = range(self._tuner.limit)
+            pending.update(asyncio.ensure_future(self._chunk_worker_async(slot)) for slot in slots)
+            started = max(started, slots.stop)
+
+    async def _chunk_worker_async(self, slot: int):
+        """
+        分块协程：持续领取分块直到没有可下载的区间
+
+        Args:
+            slot: 该协程独占的进度计数槽位
+        """
+        buffer = self._create_buffer()
+        while not self._stop_flag.is_set() and not self._pause_flag.is_set():
+            if self._tuner is not None and not self._tuner.allows(slot):
+                # 连接数已减少
+                return
+            chunk_index = self._scheduler.next_chunk()
+            if chunk_index is None:
+                return
+
+            chunk = self.task.chunks[chunk_index]
+            try:
+                await self._download_chunk_with_retry_async(chunk_index, chunk, slot, buffer)
+            except Exception:
+                self._scheduler.release(chunk_index, failed=True)
+                raise
+            self._scheduler.release(chunk_index)
+
+    async def _download_chunk_with_retry_async(self, chunk_index: int, chunk: ChunkView, slot: int,
+                                               buffer: ChunkBuffer):
+        """下载分块，遇到临时错误时退避后从分块当前位置继续"""
+        attempt = 0
+        while True:
+            downloaded = chunk.downloaded
+            try:
+                await self._download_chunk_async(chunk_index, chunk, slot, buffer)
+                return
+            except MirrorSwitch as e:
+                # 换一个镜像立即继续，不计入重试次数
+                if self._pause_flag.is_set():
+                    return
+                self.logger.info(f"分块 {chunk_index} 改从其他镜像下载: {e}")
+                continue
+            except Exception as e:
+                if self._pause_flag.is_set():
+                    # 暂停/停止时的错误无需重试，进度已保存
+                    return
+                # 上次失败后有新数据写入，分块重试次数重新计数
+                attempt = 1 if chunk.downloaded > downloaded else attempt + 1
+                delay = self._retry_delay(e, chunk_index, attempt)
+                if delay is None:
+                    raise
+
+            # 退避等待期间可被暂停/停止打断
+            deadline = time.monotonic() + delay
+            while not self._pause_flag.is_set() and time.monotonic() < deadline:
+                await asyncio.sleep(min(deadline - time.monotonic(), self.limiter.WAIT_SLICE))
+            if self._pause_flag.is_set():
+                return
+
+    def _create_retry_policy(self) -> RetryPolicy:
+        """按配置创建重试策略（aiohttp的连接和读取错误也视为临时错误）"""
+        return RetryPolicy.from_config(self.config, transient_errors=(
+            aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError
+        ))
+
+    def _is_mirror_error(self, error: Exception) -> bool:
+        """是否是下载源的错误（包括aiohttp的请求和HTTP错误）"""
+        return isinstance(error, aiohttp.ClientError) or super()._is_mirror_error(error)
+
+    async def _download_chunk_async(self, chunk_index: int, chunk: ChunkView, slot: int, buffer: ChunkBuffer):
+        """下载单个分块，有镜像时选择一个镜像并记录其吞吐量和错误"""
+        pool = self.mirror_pool
+        if pool is None:
+            await self._download_range_async(chunk, slot, buffer, self.source_url)
+            return
+
+        mirror = pool.acquire()
+        began = time.monotonic()
+        downloaded = chunk.downloaded
+        try:
+            await self._download_range_async(chunk, slot, buffer, mirror.url, mirror, began)
+        except Exception as e:
+            self._release_mirror(mirror, chunk.downloaded - downloaded, began, e)
+        else:
+            pool.release(mirror, chunk.downloaded - downloaded, time.monotonic() - began)
+
+    async def _download_range_async(self, chunk: ChunkView, slot: int, buffer: ChunkBuffer, url: str,
+                                    mirror: Optional[Mirror] = None, began: float = 0.0):
+        """从指定下载源下载分块的剩余区间，请求前先取得主机的连接名额（参数见 Downloader._download_range）"""
+        host = host_of(url)
+        if not await self._acquire_host_async(host):
+            return
+        try:
+            await self._fetch_range_async(chunk, slot, buffer, url, mirror, began)
+        finally:
+            self.hosts.release(host)
+
+    async def _acquire_host_async(self, host: str) -> bool:
+        """
+        取得主机的连接名额（见 HostLimiter），名额用完时定期重试
+
+        Returns:
+            bool: 是否取得名额（等待期间暂停或停止时为False）
+        """
+        while not self._pause_flag.is_set():
+            delay = self.hosts.reserve(host)
+            if delay is not None:
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                return True
+            await asyncio.sleep(self.hosts.WAIT_SLICE)
+        return False
+
+    async def _fetch_range_async(self, chunk: ChunkView, slot: int, buffer: ChunkBuffer, url: str,
+                                 mirror: Optional[Mirror], began: float):
+        """发送Range请求并把数据写入分块（参数见 Downloader._download_range）"""
+        start = chunk.start + chunk.downloaded
+        end = chunk.end
+
+        if start > end:
+            return
+
+        session = await self.engine.get_session()
+        headers = {
+            'User-Agent': 'Mozilla/5.0',
+            'Range': f'bytes={start}-{end}',
+            'Accept-Encoding': 'identity'
+        }
+
+        async with session.get(url, headers=headers, timeout=self._request_timeout()) as response:
+            response.raise_for_status()
+
+            if response.status != 206 and start > 0:
+                raise IOError(f"服务器未按Range返回数据: HTTP {response.status}")
+
+            write_at = self._writer.write_at
+            offset = start
+            buffer.begin(offset)
+
+            try:
+                while True:
+                    # 分块被拆分后只读到新的end为止
+                    limit = chunk.end - offset - buffer.filled + 1
+                    count = 0
+                    if limit > 0:
+                        size = min(buffer.space, limit)
+                        if self.limiter.enabled:
+                            size = min(size, self.limiter.quantum(self.task.task_id))
+                        count = buffer.extend(await response.content.read(size))
+                        if self.limiter.enabled:
+                            await self._throttle_async(count)
+                    reached_end = count >= limit
+                    # 连接数减少时超出的连接写完缓冲区后交回剩余区间
+                    stopping = self._stop_flag.is_set() or self._pause_flag.is_set() or \
+                        (self._tuner is not None and not self._tuner.allows(slot))
+
+                    if buffer.is_full or reached_end or stopping or count == 0:
+                        written = await self.engine.run_blocking(
+                            buffer.flush_to, write_at, offset, chunk.end - offset + 1
+                        )
+                        offset += written
+                        buffer.begin(offset)
+
+                        # 更新进度（分块只由当前协程写入，计数槽位为协程独占）
+                        chunk.downloaded += written
+                        self._counter.add(slot, written)
+
+                        # 缓冲区已写出，可以把剩余区间交给更快的镜像
+                        if mirror is not None and not (reached_end or stopping) and \
+                                self.mirror_pool.should_switch(mirror, offset - start, time.monotonic() - began):
+                            raise MirrorSwitch(f"镜像速度过慢: {mirror.url}")
+
+                    if reached_end or stopping:
+                        break
+                    if count == 0:
+                        raise TransientError(f"连接提前关闭，已接收至偏移 {offset}")
+            except Exception as e:
+                if self.retry_policy.is_retryable(e):
+                    # 连接中途断开时保留已读到的数据，重试从这里继续
+                    written = await self.engine.run_blocking(
+                        buffer.flush_to, write_at, offset, chunk.end - offset + 1
+                    )
+                    chunk.downloaded += written
+                    self._counter.add(slot, written)
+                raise
+
+    async def _download_single_async(self):
+        """单连接下载（不支持分块）"""
+        self._counter = ProgressCounter(1)
+        self._last_downloaded_size = 0
+        self._last_update_time = time.time()
+        progress_interval = self.config.get('download.progress_interval', 1.0)
+        read_size = self.config.get('download.read_size', 65536)
+        digest = self._create_digest()
+        writer: Optional[TaskFileWriter] = None
+
+        def write(data: bytes, offset: int):
+            # 写入和摘要计算都在线程中进行，按顺序逐块执行
+            writer.write_at(data, offset)
+            if digest is not None:
+                digest.update(data)
+
+        host = host_of(self.source_url)
+        admitted = False
+        try:
+            admitted = await self._acquire_host_async(host)
+            if not admitted:
+                return
+
+            session = await self.engine.get_session()
+            headers = {'User-Agent': 'Mozilla/5.0', 'Accept-Encoding': 'identity'}
+
+            async with session.get(self.source_url, headers=headers, timeout=self._request_timeout()) as response:
+                response.raise_for_status()
+
+                # 取得主机名额且服务器正常响应后才创建文件，等待期间暂停不会留下空文件
+                writer = TaskFileWriter(self._final_file_path(), fsync_policy='final')
+                await self.engine.run_blocking(writer.open, 0, False)
+
+                offset = 0
+                async for data in response.content.iter_chunked(read_size):
+                    if self._stop_flag.is_set() or self._pause_flag.is_set():
+                        break
+
+                    await self.engine.run_blocking(write, data, offset)
+                    offset += len(data)
+                    if self.limiter.enabled:
+                        await self._throttle_async(len(data))
+
+                    # 更新进度（按时间间隔上报）
+                    self._counter.add(0, len(data))
+                    if time.time() - self._last_update_time >= progress_interval:
+                        self._update_progress()
+
+            self.task.downloaded_size = self._counter.total()
+            if digest is not None:
+                self._digest = digest.hexdigest()
+
+        except Exception as e:
+            self.logger.error(f"下载失败: {e}")
+            raise
+        finally:
+            if admitted:
+                self.hosts.release(host)
+            if writer is not None:
+                await self.engine.run_blocking(writer.close, True)
+
+    def _create_buffer(self) -> ChunkBuffer:
+        """按配置创建协程的读写缓冲区（异步引擎并发分块多，默认使用更小的缓冲区）"""
+        min_split_size = self.config.get('download.min_split_size', 1048576)
+        write_buffer_size = min(self.config.get('download.async_write_buffer_size', 262144), min_split_size)
+        return ChunkBuffer(write_buffer_size=write_buffer_size, max_read_size=write_buffer_size)
+
+
+# 全局异步引擎实例
+_engine_instance: Optional[AsyncEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    获取全局异步引擎实例（单例模式）
+
+    Returns:
+        AsyncEngine: 异步引擎实例
+    """
+    global _engine_instance
+    if _engine_instance is None:
+        with _engine_lock:
+            if _engine_instance is None:
+                _engine_instance = AsyncEngine.from_config()
+    return _engine_instance
+
+
+def shutdown_async_engine():
+    """关闭全局异步引擎（如果已创建）"""
+    global _engine_instance
+    with _engine_lock:
+        if _engine_instance is not None:
+            _engine_instance.close()
+            _engine_instance = None
@@ -0,0 +1,337 @@
+"""
+批量导入模块
+
+从URL列表（文件或任意可迭代对象）批量添加下载任务：在后台线程中逐行解析，
+按规范化URL和目标路径去重，分批交给引擎添加，并在后台并发获取文件名和大小。
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from urllib.parse import urlsplit, urlunsplit
+
+from .download_task import DownloadTask
+from .events import Event
+from .metadata_probe import get_metadata_prober
+from ..utils.config import ConfigManager
+from ..utils.helpers import get_filename_from_url, is_valid_url, sanitize_filename
+from ..utils.logger import Logger
+
+
+# 默认端口（规范化时去掉）
+DEFAULT_PORTS = {'http': 80, 'https': 443, 'ftp': 21}
+
+
+def normalize_url(url: str) -> str:
+    """
+    规范化URL用于去重：协议和主机名转为小写，去掉默认端口和片段（#...），空路径视为 /
+
+    Args:
+        url: 下载链接
+
+    Returns:
+        str: 规范化后的URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if ':' in host:
+        host = f'[{host}]'
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{port}'
+    if parts.username or parts.password:
+        userinfo = parts.username or ''
+        if parts.password:
+            userinfo = f'{userinfo}:{parts.password}'
+        host = f'{userinfo}@{host}'
+    return urlunsplit((scheme, host, parts.path or '/', parts.query, ''))
+
+
+def iter_urls(source: Union[str, os.PathLike, Iterable[str]]) -> Iterator[str]:
+    """
+    逐行读取URL列表（不会一次读入整个文件），跳过空行和 # 开头的注释行
+
+    Args:
+        source: 文件路径，或逐行产生文本的可迭代对象（如已打开的文件）
+
+    Yields:
+        str: 去掉首尾空白的一行
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'r', encoding='utf-8-sig', errors='replace') as f:
+            yield from iter_urls(f)
+        return
+
+    for line in source:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line
+
+
+@dataclass
+class ImportResult:
+    """批量导入结果"""
+    added: int = 0  # 添加的任务数
+    duplicates: int = 0  # 重复（已有相同链接和保存目录的任务）
+    invalid: int = 0  # 无效的链接
+    failed: int = 0  # 文件已存在或创建失败
+    cancelled: bool = False  # 是否被取消
+
+    @property
+    def total(self) -> int:
+        """读取的行数"""
+        return self.added + self.duplicates + self.invalid + self.failed
+
+
+class _Cancelled(Exception):
+    """导入已取消"""
+
+
+class BulkImporter:
+    """批量导入器
+
+    解析和元数据请求都在后台线程中进行；去重和添加任务通过 call_soon() 在引擎线程中
+    执行，每批只调用一次 DownloadEngine.add_tasks()，即只发出一次 tasks_added 事件、
+    写入一次任务库。后台线程等待上一批添加完成后才提交下一批，因此大文件不会堆积在内存中。
+
+    添加后通过元数据探测器获取尚未开始下载的任务的文件名（Content-Disposition）和大小，
+    结果合并后在引擎线程中批量更新。finished 事件在引擎线程中发出，参数为 ImportResult。
+    """
+
+    def __init__(self, engine, save_path: str, connections: Optional[int] = None,
+                 priority: int = 0):
+        """
+        初始化批量导入器
+
+        Args:
+            engine: 下载引擎
+            save_path: 保存目录
+            connections: 连接数（为None时使用配置值）
+            priority: 优先级
+        """
+        self.logger = Logger()
+        self.config = ConfigManager()
+
+        self.engine = engine
+        self.save_path = save_path
+        self.connections = connections
+        self.priority = priority
+        self.batch_size = max(1, int(self.config.get('import.batch_size', 500)))
+        self.probe_metadata = self.config.get('import.probe_metadata', True)
+
+        self.result = ImportResult()
+        self.finished = Event()  # 导入结束(ImportResult)，在引擎线程中发出
+
+        self._cancelled = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._probe_executor: Optional[ThreadPoolExecutor] = None
+
+        # 去重索引（只在引擎线程中访问）：规范化URL+目录，以及已占用的目标路径
+        self._urls: Optional[Set[Tuple[str, str]]] = None
+        self._paths: Set[str] = set()
+
+        # 元数据请求结果，合并后一次应用
+        self._metadata_lock = threading.Lock()
+        self._metadata: Dict[str, Tuple[int, str]] = {}
+
+    def start(self, source: Union[str, os.PathLike, Iterable[str]]):
+        """
+        在后台线程中开始导入
+
+        Args:
+            source: 文件路径或逐行产生URL的可迭代对象
+        """
+        if self.probe_metadata:
+            self._probe_executor = ThreadPoolExecutor(
+                max_workers=max(1, int(self.config.get('import.probe_workers', 8))),
+                thread_name_prefix="Probe"
+            )
+        self._thread = threading.Thread(target=self._run, args=(source,), name="BulkImport", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """取消导入（已添加的任务保留）"""
+        self._cancelled.set()
+        if self._probe_executor is not None:
+            self._probe_executor.shutdown(wait=False, cancel_futures=True)
+
+    def join(self, timeout: Optional[float] = None):
+        """等待后台线程结束"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, source):
+        """后台线程：逐行解析并分批提交"""
+        try:
+            batch: List[str] = []
+            for url in iter_urls(source):
+                if self._cancelled.is_set():
+                    raise _Cancelled()
+                if not is_valid_url(url):
+                    self.result.invalid += 1
+                    continue
+                batch.append(url)
+                if len(batch) >= self.batch_size:
+                    self._submit(batch)
+                    batch = []
+            if batch:
+                self._submit(batch)
+
+            # 等待元数据请求完成后再报告结束
+            if self._probe_executor is not None:
+                self._probe_executor.shutdown(wait=True)
+        except _Cancelled:
+            self.result.cancelled = True
+            return
+        except Exception as e:
+            self.logger.error(f"批量导入失败: {str(e)}")
+
+        self.engine.call_soon(self._finish)
+
+    def _submit(self, urls: List[str]):
+        """在引擎线程中添加一批任务并等待完成，然后为新任务请求元数据"""
+        tasks = self._call(self._add_batch, urls)
+        if self._probe_executor is None:
+            return
+        for task_id, url in tasks:
+            self._probe_executor.submit(self._probe, task_id, url)
+
+    def _call(self, func, *args):
+        """在引擎线程中执行调用并等待结果，取消时不再等待"""
+        future = self.engine.call_soon(func, *args)
+        while True:
+            try:
+                return future.result(0.5)
+            except FutureTimeoutError:
+                if self._cancelled.is_set():
+                    future.cancel()
+                    raise _Cancelled()
+
+    def _add_batch(self, urls: List[str]) -> List[Tuple[str, str]]:
+        """去重后添加一批任务（引擎线程）
+
+        Returns:
+            新任务的 (任务ID, URL) 列表
+        """
+        if self._urls is None:
+            self._urls = set()
+            for task in self.engine.get_all_tasks():
+                self._urls.add((normalize_url(task.url), os.path.normpath(task.save_path)))
+                self._paths.add(os.path.normpath(os.path.join(task.save_path, task.filename)))
+
+        save_dir = os.path.normpath(self.save_path)
+        specs = []
+        for url in urls:
+            key = (normalize_url(url), save_dir)
+            if key in self._urls:
+                self.result.duplicates += 1
+                continue
+            self._urls.add(key)
+            specs.append({
+                'url': url,
+                'save_path': self.save_path,
+                'filename': self._claim(self._free_filename(sanitize_filename(get_filename_from_url(url)))),
+                'connections': self.connections,
+                'priority': self.priority
+            })
+
+        added = []
+        for task in self.engine.add_tasks(specs):
+            if task is None:
+                self.result.failed += 1
+                continue
+            self.result.added += 1
+            # 已经开始下载的任务由下载器获取文件信息
+            if task.task_id not in self.engine.downloaders:
+                added.append((task.task_id, task.url))
+        return added
+
+    def _free_filename(self, filename: str, current: str = '') -> str:
+        """在保存目录中选取未被其他任务占用的文件名，重名时添加序号（引擎线程）
+
+        Args:
+            filename: 期望的文件名
+            current: 任务当前的文件名（视为可用）
+
+        Returns:
+            str: 可用的文件名
+        """
+        name, ext = os.path.splitext(filename)
+        candidate = filename
+        counter = 1
+        while candidate != current and self._path(candidate) in self._paths:
+            candidate = f"{name} ({counter}){ext}"
+            counter += 1
+        return candidate
+
+    def _claim(self, filename: str, previous: str = '') -> str:
+        """占用文件名，并释放任务之前的文件名（引擎线程）"""
+        if previous:
+            self._paths.discard(self._path(previous))
+        self._paths.add(self._path(filename))
+        return filename
+
+    def _path(self, filename: str) -> str:
+        """文件名对应的规范化目标路径"""
+        return os.path.normpath(os.path.join(self.save_path, filename))
+
+    def _probe(self, task_id: str, url: str):
+        """请求文件名和大小（元数据线程）"""
+        if self._cancelled.is_set():
+            return
+        try:
+            # 结果同时写入元数据缓存，任务启动时不再重复请求
+            metadata = get_metadata_prober().fetch(url)
+            size, filename = metadata.size, metadata.filename
+        except Exception as e:
+            self.logger.debug(f"获取文件信息失败: {url}: {e}")
+            return
+
+        with self._metadata_lock:
+            schedule = not self._metadata
+            self._metadata[task_id] = (size, filename)
+        if schedule:
+            self.engine.call_soon(self._apply_metadata)
+
+    def _apply_metadata(self):
+        """把已获取的元数据应用到尚未开始下载的任务（引擎线程）"""
+        with self._metadata_lock:
+            metadata, self._metadata = self._metadata, {}
+
+        updated: List[DownloadTask] = []
+        for task_id, (size, filename) in metadata.items():
+            task = self.engine.get_task(task_id)
+            if task is None or task_id in self.engine.downloaders or task.downloaded_size > 0:
+                continue
+
+            changed = False
+            if size > 0 and task.total_size != size:
+                task.total_size = size
+                changed = True
+            if filename:
+                filename = self._free_filename(sanitize_filename(filename), task.filename)
+                if filename != task.filename and \
+                        not os.path.exists(os.path.join(task.save_path, filename)):
+                    task.filename = self._claim(filename, task.filename)
+                    changed = True
+            if changed:
+                updated.append(task)
+
+        for task in updated:
+            self.engine.task_updated.emit(task)
+        if updated:
+            self.engine.tasks_updated.emit(updated)
+
+    def _finish(self):
+        """发出导入结束事件（引擎线程）"""
+        result = self.result
+        self.logger.info(
+            f"批量导入完成: 添加 {result.added} 个，重复 {result.duplicates} 个，"
+            f"无效 {result.invalid} 个，失败 {result.failed} 个"
+        )
+        self.finished.emit(result)
@@ -0,0 +1,114 @@
+"""
+分块调度模块
+实现动态分块拆分（工作窃取），避免单个慢连接拖慢整个下载
+"""
+import threading
+from collections import deque
+from typing import List, Optional
+
+
+class ChunkScheduler:
+    """分块调度器
+
+    工作线程通过 next_chunk() 领取分块。没有未分配的分块时，调度器把剩余
+    字节最多的活动分块从剩余区间中点一分为二：原分块的 end 缩短，后半段
+    作为新分块追加到分块列表并交给空闲线程，直到剩余区间小于最小拆分大小。
+
+    正在下载的线程每次写入前都会重新读取分块的 end，拆分点总是位于当前
+    下载位置之后至少 min_piece_size 字节，因此只要单次读取的数据量不超过
+    min_piece_size，线程手中尚未计入进度的数据就不会越过新的 end。
+    """
+
+    def __init__(self, chunks: List[dict], min_piece_size: int = 1048576):
+        """
+        初始化分块调度器
+
+        Args:
+            chunks: 分块信息列表（会被原地修改和追加）
+            min_piece_size: 拆分后每段的最小字节数
+        """
+        self.chunks = chunks
+        self.min_piece_size = max(1, int(min_piece_size))
+
+        self._lock = threading.Lock()
+        self._active = set()  # 正在下载的分块索引
+        self._failed = set()  # 下载失败的分块索引
+        self._pending = deque(
+            index for index, chunk in enumerate(chunks) if self.remaining(chunk) > 0
+        )
+
+    @staticmethod
+    def remaining(chunk: dict) -> int:
+        """分块剩余字节数"""
+        return chunk['end'] - chunk['start'] - chunk.get('downloaded', 0) + 1
+
+    def next_chunk(self) -> Optional[int]:
+        """
+        领取下一个要下载的分块
+
+        Returns:
+            分块索引；没有可下载或可拆分的分块时返回None
+        """
+        with self._lock:
+            # 优先领取尚未分配的分块
+            while self._pending:
+                index = self._pending.popleft()
+                if self.remaining(self.chunks[index]) > 0:
+                    self._active.add(index)
+                    return index
+
+            return self._split_largest()
+
+    def release(self, index: int, failed: bool = False):
+        """
+        归还分块
+
+        Args:
+            index: 分块索引
+            failed: 分块是否下载失败，失败的分块不再重新分配
+        """
+        with self._lock:
+            self._active.discard(index)
+            if failed:
+                self._failed.add(index)
+            elif self.remaining(self.chunks[index]) > 0:
+                self._pending.append(index)
+
+    def has_pending(self) -> bool:
+        """是否有尚未分配且未下载完的分块（如工作线程中途交回的分块）"""
+        with self._lock:
+            return any(self.remaining(self.chunks[index]) > 0 for index in self._pending)
+
+    def snapshot(self) -> List[dict]:
+        """
+        获取分块列表的一致性快照
+
+        Returns:
+            分块信息副本列表
+        """
+        with self._lock:
+            return [dict(chunk) for chunk in self.chunks]
+
+    def _split_largest(self) -> Optional[int]:
+        """拆分剩余字节最多的活动分块（调用方需持有锁）"""
+        if not self._active:
+            return None
+
+        victim_index = max(self._active, key=lambda i: self.remaining(self.chunks[i]))
+        victim = self.chunks[victim_index]
+        remaining = self.remaining(victim)
+
+        half = remaining // 2
+        if half < self.min_piece_size:
+            return None
+
+        position = victim['start'] + victim.get('downloaded', 0)
+        split_at = position + (remaining - half)
+
+        new_chunk = {'start': split_at, 'end': victim['end'], 'downloaded': 0}
+        self.chunks.append(new_chunk)
+        victim['end'] = split_at - 1
+
+        new_index = len(self.chunks) - 1
+        self._active.add(new_index)
+        return new_index
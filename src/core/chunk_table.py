@@ -0,0 +1,206 @@
+"""
+分块表模块
+用并列的 array('q') 按列存储分块的起止位置和已下载字节数
+"""
+from array import array
+from collections.abc import Mapping, MutableMapping
+from typing import Iterable, Iterator, List, Optional, Union
+
+
+_COLUMNS = {'start': 'starts', 'end': 'ends', 'downloaded': 'downloaded'}
+
+
+class ChunkView(MutableMapping):
+    """分块表中一行的视图
+
+    行为与旧版的分块字典一致（chunk['downloaded'] += n、chunk.get(...)、
+    dict(chunk)），读写直接作用于分块表的数组；也可以用 chunk.end 等属性访问。
+    """
+
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table: 'ChunkTable', index: int):
+        self._table = table
+        self._index = index
+
+    @property
+    def start(self) -> int:
+        """起始偏移"""
+        return self._table.starts[self._index]
+
+    @start.setter
+    def start(self, value: int):
+        self._table.starts[self._index] = value
+
+    @property
+    def end(self) -> int:
+        """结束偏移（包含）"""
+        return self._table.ends[self._index]
+
+    @end.setter
+    def end(self, value: int):
+        self._table.ends[self._index] = value
+
+    @property
+    def downloaded(self) -> int:
+        """已下载字节数"""
+        return self._table.downloaded[self._index]
+
+    @downloaded.setter
+    def downloaded(self, value: int):
+        self._table.downloaded[self._index] = value
+
+    def __getitem__(self, key: str) -> int:
+        try:
+            return getattr(self._table, _COLUMNS[key])[self._index]
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value: int):
+        try:
+            getattr(self._table, _COLUMNS[key])[self._index] = value
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __delitem__(self, key: str):
+        raise TypeError("分块的字段不能删除")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_COLUMNS)
+
+    def __len__(self) -> int:
+        return len(_COLUMNS)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class ChunkTable:
+    """分块表
+
+    每个分块只占三个 8 字节整数，不再为每个分块创建字典；可以像分块字典列表
+    一样使用（索引、迭代、append、与字典列表比较），也可以直接访问 starts、
+    ends、downloaded 三个数组。
+    """
+
+    __slots__ = ('starts', 'ends', 'downloaded')
+
+    def __init__(self, chunks: Optional[Iterable[Mapping]] = None):
+        """
+        初始化分块表
+
+        Args:
+            chunks: 分块列表，每项包含start、end、downloaded键
+        """
+        self.starts = array('q')
+        self.ends = array('q')
+        self.downloaded = array('q')
+        for chunk in chunks or ():
+            self.append(chunk)
+
+    @classmethod
+    def coerce(cls, chunks: Union['ChunkTable', Iterable[Mapping], None]) -> 'ChunkTable':
+        """
+        把分块字典列表转换为分块表（已经是分块表时原样返回）
+
+        Args:
+            chunks: 分块表或分块字典列表
+
+        Returns:
+            ChunkTable: 分块表
+        """
+        if isinstance(chunks, cls):
+            return chunks
+        return cls(chunks)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> 'ChunkTable':
+        """
+        从 (start, end, downloaded) 元组创建分块表
+
+        Args:
+            rows: 元组序列
+
+        Returns:
+            ChunkTable: 分块表
+        """
+        table = cls()
+        for start, end, downloaded in rows:
+            table.starts.append(start)
+            table.ends.append(end)
+            table.downloaded.append(downloaded)
+        return table
+
+    def append(self, chunk: Mapping):
+        """
+        追加分块
+
+        Args:
+            chunk: 包含start、end、downloaded键的分块
+        """
+        self.starts.append(chunk['start'])
+        self.ends.append(chunk['end'])
+        self.downloaded.append(chunk.get('downloaded', 0))
+
+    def total_downloaded(self) -> int:
+        """所有分块的已下载字节数之和"""
+        return sum(self.downloaded)
+
+    def to_list(self) -> List[dict]:
+        """
+        转换为分块字典列表（用于序列化）
+
+        Returns:
+            List[dict]: 分块字典列表
+        """
+        return [
+            {'start': start, 'end': end, 'downloaded': downloaded}
+            for start, end, downloaded in zip(self.starts, self.ends, self.downloaded)
+        ]
+
+    def rows(self) -> List[tuple]:
+        """
+        获取 (start, end, downloaded) 元组列表
+
+        Returns:
+            List[tuple]: 每个分块一个元组
+        """
+        return list(zip(self.starts, self.ends, self.downloaded))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            table = ChunkTable()
+            table.starts = self.starts[index]
+            table.ends = self.ends[index]
+            table.downloaded = self.downloaded[index]
+            return table
+
+        if index < 0:
+            index += len(self.starts)
+        if not 0 <= index < len(self.starts):
+            raise IndexError("分块索引超出范围")
+        return ChunkView(self, index)
+
+    def __iter__(self) -> Iterator[ChunkView]:
+        for index in range(len(self.starts)):
+            yield ChunkView(self, index)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ChunkTable):
+            return (self.starts, self.ends, self.downloaded) == (other.starts, other.ends, other.downloaded)
+        if isinstance(other, list):
+            return self.to_list() == [dict(chunk) for chunk in other]
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"ChunkTable({self.to_list()!r})"
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + sum(
+            column.__sizeof__() for column in (self.starts, self.ends, self.downloaded)
+        )
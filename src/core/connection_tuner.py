@@ -0,0 +1,248 @@
+"""
+连接数自适应模块
+分块下载时逐步增加连接数，测量每个新增连接带来的吞吐量增益，停在增益不再明显的连接数上，
+并按主机记住最佳连接数，同一主机之后的任务直接使用
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+from ..utils.config import ConfigManager
+
+
+def host_of(url: str) -> str:
+    """URL的主机（含端口，小写），连接数按主机统计"""
+    return urlsplit(url).netloc.lower()
+
+
+@dataclass(frozen=True)
+class HostProfile:
+    """主机的连接数档案"""
+    connections: int  # 实测最佳连接数
+    throughput: float  # 该连接数下的吞吐量（字节/秒）
+    capped: bool = False  # 停止探测时仍有明显增益（到达上限或数据不够测量，可能还能更多）
+
+
+class HostProfiles:
+    """主机连接数档案缓存（线程安全）
+
+    按 network.adaptive.profile_ttl 过期（网络状况会变化），条目数超过
+    network.adaptive.profile_size 时淘汰最久未用的。
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        """
+        初始化档案缓存
+
+        Args:
+            ttl: 有效期（秒），为None时使用配置值
+            max_entries: 最多保存的主机数，为None时使用配置值
+        """
+        config = ConfigManager()
+        self.ttl = float(ttl if ttl is not None else config.get('network.adaptive.profile_ttl', 3600))
+        self.max_entries = max(1, int(
+            max_entries if max_entries is not None else config.get('network.adaptive.profile_size', 1024)
+        ))
+
+        self._lock = threading.Lock()
+        self._profiles: 'OrderedDict[str, Tuple[float, HostProfile]]' = OrderedDict()  # host -> (过期时间, 档案)
+
+    def get(self, host: str) -> Optional[HostProfile]:
+        """
+        获取未过期的档案
+
+        Args:
+            host: 主机
+
+        Returns:
+            Optional[HostProfile]: 档案，没有或已过期时返回None
+        """
+        with self._lock:
+            entry = self._profiles.get(host)
+            if entry is None:
+                return None
+            expires, profile = entry
+            if time.monotonic() >= expires:
+                del self._profiles[host]
+                return None
+            self._profiles.move_to_end(host)
+            return profile
+
+    def update(self, host: str, profile: HostProfile):
+        """
+        保存主机的档案
+
+        Args:
+            host: 主机
+            profile: 档案
+        """
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._profiles[host] = (time.monotonic() + self.ttl, profile)
+            self._profiles.move_to_end(host)
+            while len(self._profiles) > self.max_entries:
+                self._profiles.popitem(last=False)
+
+    def suggest(self, host: str, default: int, ceiling: int) -> int:
+        """
+        任务向调度器申请的连接数：已知主机用实测的最佳连接数（上次探测未结束时加倍，
+        继续探测），未知主机用默认值
+
+        Args:
+            host: 主机
+            default: 默认连接数
+            ceiling: 连接数上限
+
+        Returns:
+            int: 连接数
+        """
+        profile = self.get(host)
+        if profile is None:
+            return default
+        wanted = profile.connections * 2 if profile.capped else profile.connections
+        return max(1, min(wanted, ceiling))
+
+    def clear(self):
+        """清空所有档案"""
+        with self._lock:
+            self._profiles.clear()
+
+
+class ConnectionTuner:
+    """单个下载的连接数控制器
+
+    工作线程（协程）按槽位编号，槽位号小于 limit 的才能下载。未知主机从
+    network.adaptive.initial 个连接开始，每个测量窗口结束时比较吞吐量：新增连接
+    平均带来的增益达到原有连接平均吞吐量的 marginal_gain 倍时继续增加（每次增加
+    约一半），否则退回上一档并固定下来。服务器返回429/503时减少约四分之一的连接。
+    已知主机直接使用档案中的连接数，上次探测未结束时从该连接数继续探测。
+    """
+
+    def __init__(self, url: str, ceiling: int, profiles: Optional[HostProfiles] = None,
+                 config: Optional[ConfigManager] = None, learn: bool = True):
+        """
+        初始化连接数控制器
+
+        Args:
+            url: 下载源URL
+            ceiling: 连接数上限（工作线程数）
+            profiles: 主机档案缓存，为None时使用全局缓存
+            config: 配置管理器，为None时读取默认配置
+            learn: 是否把结果写入主机档案（限速时吞吐量不代表服务器能力，不写入）
+        """
+        config = config or ConfigManager()
+        self.host = host_of(url)
+        self.ceiling = max(1, int(ceiling))
+        self.window = float(config.get('network.adaptive.window', 2.0))
+        self.marginal_gain = float(config.get('network.adaptive.marginal_gain', 0.5))
+        self.profiles = profiles or get_host_profiles()
+        self.learn = learn
+
+        self._lock = threading.Lock()
+        self._previous: Optional[Tuple[int, float]] = None  # 上一档的 (连接数, 吞吐量)
+        self._mark: Optional[Tuple[float, int]] = None  # 当前窗口起点 (时间, 已下载字节数)
+        self._throttled_at = 0.0
+
+        profile = self.profiles.get(self.host)
+        initial = int(config.get('network.adaptive.initial', 2))
+        if profile is None:
+            self.limit = max(1, min(initial, self.ceiling))
+            self.settled = self.limit >= self.ceiling
+        else:
+            self.limit = max(1, min(profile.connections, self.ceiling))
+            self.settled = not profile.capped or self.limit >= self.ceiling
+
+    def allows(self, slot: int) -> bool:
+        """槽位当前是否可以下载"""
+        return slot < self.limit
+
+    def sample(self, downloaded: int, remaining: int, now: Optional[float] = None) -> bool:
+        """
+        记录进度，测量窗口结束时调整连接数（由汇总进度的线程定期调用）
+
+        Args:
+            downloaded: 任务已下载的字节数
+            remaining: 剩余字节数（剩余数据不够测量时停止探测）
+            now: 当前时间（time.monotonic），为None时取当前时间
+
+        Returns:
+            bool: 连接数是否变化
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.settled:
+                return False
+            if self._mark is None:
+                # 连接数变化后的第一个采样点作为窗口起点，排除新连接建立的时间
+                self._mark = (now, downloaded)
+                return False
+
+            began, start = self._mark
+            if now - began < self.window:
+                return False
+
+            throughput = (downloaded - start) / (now - began)
+            if self._previous is not None:
+                connections, previous = self._previous
+                added = self.limit - connections
+                if (throughput - previous) / added < self.marginal_gain * previous / connections:
+                    # 新增连接的增益不明显，退回上一档
+                    changed = self.limit != connections
+                    self._settle(connections, previous, capped=False)
+                    return changed
+
+            self._previous = (self.limit, throughput)
+            if self.limit >= self.ceiling or remaining < 2 * self.window * throughput:
+                # 到达上限，或剩余数据不够再测量一个窗口：保持当前连接数，下次从这里继续探测
+                self._settle(self.limit, throughput, capped=True)
+                return False
+            self.limit = min(self.ceiling, self.limit + max(1, self.limit // 2))
+            self._mark = None
+            return True
+
+    def throttled(self, now: Optional[float] = None) -> bool:
+        """
+        服务器因请求过多拒绝（429/503），减少连接数并固定下来（每个测量窗口最多减少一次）
+
+        Returns:
+            bool: 连接数是否变化
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.limit <= 1 or now - self._throttled_at < self.window:
+                return False
+            self._throttled_at = now
+            throughput = self._previous[1] if self._previous else 0.0
+            self._settle(self.limit - max(1, self.limit // 4), throughput, capped=False)
+            return True
+
+    def _settle(self, connections: int, throughput: float, capped: bool):
+        """固定连接数并写入主机档案（调用方需持有锁）"""
+        self.limit = max(1, connections)
+        self.settled = True
+        if self.learn:
+            self.profiles.update(self.host, HostProfile(self.limit, throughput, capped))
+
+
+# 全局主机档案缓存实例
+_profiles_instance: Optional[HostProfiles] = None
+_profiles_lock = threading.Lock()
+
+
+def get_host_profiles() -> HostProfiles:
+    """
+    获取全局主机档案缓存实例（单例模式）
+
+    Returns:
+        HostProfiles: 主机档案缓存实例
+    """
+    global _profiles_instance
+    if _profiles_instance is None:
+        with _profiles_lock:
+            if _profiles_instance is None:
+                _profiles_instance = HostProfiles()
+    return _profiles_instance
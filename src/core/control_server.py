@@ -0,0 +1,512 @@
+"""
+控制接口模块
+
+在本机提供HTTP/JSON控制接口，供其他服务批量提交下载任务、控制任务和订阅进度：
+
+    GET    /tasks                  任务列表（可用 ?status=downloading 过滤）
+    POST   /tasks                  添加任务：单个对象或对象数组（批量）
+    GET    /tasks/<id>             任务详情
+    DELETE /tasks/<id>             删除任务
+    POST   /tasks/<id>/<action>    start / pause / resume / stop
+    GET    /stats                  任务统计
+    GET    /events                 进度推送（Server-Sent Events）
+
+请求在HTTP线程中解析，引擎操作通过 DownloadEngine.call_soon() 交给引擎所在线程执行。
+
+所有请求都需要访问令牌（Authorization: Bearer <token> 或 ?token=），未配置 control.token
+时首次启动生成并写入配置文件。带有其他来源 Origin 的请求（浏览器中的网页）一律拒绝，
+添加任务的请求体必须是 application/json，保存路径必须是 control.allowed_roots
+（默认为下载目录）之内的绝对路径。
+"""
+import hmac
+import json
+import os
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from .download_task import DownloadTask
+from .integrity import parse_checksum
+from .progress_buffer import ProgressBuffer
+from ..utils.config import ConfigManager
+from ..utils.helpers import is_valid_url
+from ..utils.logger import Logger
+
+
+# 请求体大小上限（字节）
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+# 任务操作 -> 引擎方法名
+TASK_ACTIONS = {
+    'start': 'start_task',
+    'pause': 'pause_task',
+    'resume': 'resume_task',
+    'recheck': 'recheck_task',
+    'stop': 'stop_task'
+}
+
+
+def task_summary(task: DownloadTask) -> dict:
+    """
+    任务的JSON摘要（不含分块）
+
+    Args:
+        task: 下载任务
+
+    Returns:
+        dict: 任务摘要
+    """
+    return {
+        'task_id': task.task_id,
+        'url': task.url,
+        'filename': task.filename,
+        'save_path': task.save_path,
+        'status': task.status,
+        'progress': task.progress,
+        'total_size': task.total_size,
+        'downloaded_size': task.downloaded_size,
+        'speed': task.speed,
+        'priority': task.priority,
+        'mirrors': task.mirrors,
+        'checksum': task.checksum,
+        'error_message': task.error_message
+    }
+
+
+class ControlServer:
+    """控制接口服务器
+
+    HTTP请求在服务器线程中处理，需要访问引擎的操作都提交到引擎所在线程执行并等待结果。
+    批量添加只提交一次调用，由 DownloadEngine.add_tasks() 在一个事务中写入。
+
+    每个进度订阅者有一个 ProgressBuffer：引擎线程只记录有变化的任务ID，
+    订阅者线程按 control.event_rate 的频率取出，同一任务在一个周期内的多次更新只推送一次。
+    """
+
+    def __init__(self, engine, host: Optional[str] = None, port: Optional[int] = None,
+                 token: Optional[str] = None):
+        """
+        初始化控制接口服务器
+
+        Args:
+            engine: 下载引擎
+            host: 监听地址，为None时使用配置值
+            port: 监听端口，为None时使用配置值（0表示随机端口）
+            token: 访问令牌，为None时使用配置值（未配置时生成）
+        """
+        self.logger = Logger()
+        self.config = ConfigManager()
+
+        self.engine = engine
+        self.token = str(token if token is not None else self.config.get('control.token', '') or '')
+        if not self.token:
+            self.token = self._create_token()
+        roots = self.config.get('control.allowed_roots', []) or [self.config.get_download_path()]
+        self.allowed_roots = [os.path.realpath(os.path.expanduser(str(root))) for root in roots]
+        self.timeout = float(self.config.get('control.timeout', 30.0))
+        self.event_interval = 1.0 / max(0.1, float(self.config.get('control.event_rate', 5)))
+
+        self._subscribers: List[ProgressBuffer] = []
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        if host is None:
+            host = self.config.get('control.host', '127.0.0.1')
+        if port is None:
+            port = self.config.get('control.port', 6801)
+        self._httpd = ThreadingHTTPServer((host, int(port)), _RequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.control = self
+
+        # 引擎事件在引擎线程中执行，只记录任务ID
+        engine.task_added.connect(self._on_task_changed)
+        engine.tasks_added.connect(self._on_tasks_added)
+        engine.task_updated.connect(self._on_task_changed)
+        engine.task_removed.connect(self._publish)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """实际监听的 (地址, 端口)"""
+        return self._httpd.server_address[:2]
+
+    def start(self):
+        """在后台线程中启动服务器"""
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="ControlServer", daemon=True
+        )
+        self._thread.start()
+        host, port = self.address
+        self.logger.info(f"控制接口已启动: http://{host}:{port}")
+
+    def stop(self):
+        """停止服务器并断开所有进度订阅"""
+        self._closed.set()
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.notify()
+
+        self.engine.task_added.disconnect(self._on_task_changed)
+        self.engine.tasks_added.disconnect(self._on_tasks_added)
+        self.engine.task_updated.disconnect(self._on_task_changed)
+        self.engine.task_removed.disconnect(self._publish)
+
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+        self._httpd.server_close()
+        self.logger.info("控制接口已关闭")
+
+    @property
+    def closed(self) -> bool:
+        """服务器是否已停止"""
+        return self._closed.is_set()
+
+    def wait_closed(self, timeout: float) -> bool:
+        """
+        等待服务器停止
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            bool: 服务器是否已停止
+        """
+        return self._closed.wait(timeout)
+
+    def call(self, func, *args):
+        """
+        在引擎线程中执行调用并等待结果（HTTP线程）
+
+        Args:
+            func: 要调用的函数
+            *args: 参数
+
+        Returns:
+            调用的返回值
+        """
+        return self.engine.call_soon(func, *args).result(self.timeout)
+
+    def check_token(self, token: str) -> bool:
+        """
+        校验访问令牌
+
+        Args:
+            token: 请求中的令牌
+
+        Returns:
+            bool: 是否允许访问
+        """
+        return hmac.compare_digest(token.encode('utf-8'), self.token.encode('utf-8'))
+
+    @staticmethod
+    def check_origin(origin: str, host: str) -> bool:
+        """
+        校验请求来源：浏览器中的网页跨站请求本机接口时会带上自己的 Origin，与请求的 Host 不同
+
+        Args:
+            origin: 请求的 Origin 头（非浏览器客户端通常没有）
+            host: 请求的 Host 头
+
+        Returns:
+            bool: 是否允许访问
+        """
+        if not origin:
+            return True
+        parsed = urlparse(origin)
+        return parsed.scheme in ('http', 'https') and bool(host) and parsed.netloc.lower() == host.lower()
+
+    def check_save_path(self, save_path: str) -> bool:
+        """
+        校验客户端指定的保存路径：必须是绝对路径，且位于 control.allowed_roots 之内
+
+        Args:
+            save_path: 保存路径
+
+        Returns:
+            bool: 是否允许
+        """
+        if not os.path.isabs(save_path):
+            return False
+        path = os.path.realpath(save_path)
+        for root in self.allowed_roots:
+            try:
+                if os.path.commonpath([path, root]) == root:
+                    return True
+            except ValueError:
+                # 不同盘符（Windows）
+                continue
+        return False
+
+    def _create_token(self) -> str:
+        """未配置 control.token 时生成访问令牌并写入配置文件"""
+        token = secrets.token_urlsafe(32)
+        self.config.set('control.token', token)
+        if self.config.save_config():
+            self.logger.warning(f"未配置 control.token，已生成访问令牌并保存到: {self.config.config_path}")
+        else:
+            self.logger.warning(f"未配置 control.token，本次运行的访问令牌: {token}")
+        return token
+
+    def subscribe(self) -> ProgressBuffer:
+        """添加进度订阅者"""
+        subscriber = ProgressBuffer()
+        with self._lock:
+            self._subscribers = self._subscribers + [subscriber]
+        return subscriber
+
+    def unsubscribe(self, subscriber: ProgressBuffer):
+        """移除进度订阅者"""
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscriber]
+
+    def list_tasks(self, status: Optional[str] = None) -> List[dict]:
+        """任务摘要列表（引擎线程）"""
+        return [
+            task_summary(task) for task in self.engine.get_all_tasks()
+            if status is None or task.status == status
+        ]
+
+    def get_task(self, task_id: str) -> Optional[dict]:
+        """任务摘要（引擎线程）"""
+        task = self.engine.get_task(task_id)
+        return task_summary(task) if task is not None else None
+
+    def _on_task_changed(self, task: DownloadTask):
+        """任务添加或更新"""
+        self._publish(task.task_id)
+
+    def _on_tasks_added(self, tasks: List[DownloadTask]):
+        """批量添加任务"""
+        for task in tasks:
+            self._publish(task.task_id)
+
+    def _publish(self, task_id: str):
+        """通知所有订阅者任务有变化"""
+        for subscriber in self._subscribers:
+            subscriber.post(task_id)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """控制接口请求处理"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'PyDownloader'
+
+    @property
+    def control(self) -> ControlServer:
+        return self.server.control
+
+    def log_message(self, format, *args):
+        """请求日志写入应用日志"""
+        self.control.logger.debug(f"控制接口: {self.address_string()} {format % args}")
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def _handle(self, method: str):
+        """分发请求"""
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        parts = [part for part in url.path.split('/') if part]
+
+        if not self.control.check_origin(self.headers.get('Origin', ''), self.headers.get('Host', '')):
+            self._send_json(403, {'error': 'forbidden origin'})
+            return
+
+        token = self.headers.get('Authorization', '')
+        if token.startswith('Bearer '):
+            token = token[7:]
+        else:
+            token = query.get('token', [''])[0]
+        if not self.control.check_token(token):
+            self._send_json(401, {'error': 'unauthorized'})
+            return
+
+        try:
+            if parts == ['events'] and method == 'GET':
+                self._stream_events()
+                return
+            status, body = self._route(method, parts, query)
+        except ValueError as e:
+            status, body = 400, {'error': str(e)}
+        except Exception as e:
+            self.control.logger.error(f"控制接口请求失败: {str(e)}")
+            status, body = 500, {'error': str(e)}
+        self._send_json(status, body)
+
+    def _route(self, method: str, parts: List[str], query: Dict[str, List[str]]) -> Tuple[int, object]:
+        """执行请求，返回 (状态码, 响应内容)"""
+        control = self.control
+
+        if parts == ['stats'] and method == 'GET':
+            return 200, control.engine.get_stats().to_dict()
+
+        if parts == ['tasks']:
+            if method == 'GET':
+                status = query.get('status', [None])[0]
+                return 200, {'tasks': control.call(control.list_tasks, status)}
+            if method == 'POST':
+                if self.headers.get_content_type() != 'application/json':
+                    return 415, {'error': 'content type must be application/json'}
+                return self._add_tasks(self._read_json())
+
+        if len(parts) == 2 and parts[0] == 'tasks':
+            task_id = parts[1]
+            if method == 'GET':
+                task = control.call(control.get_task, task_id)
+                return (200, task) if task is not None else (404, {'error': 'task not found'})
+            if method == 'DELETE':
+                return self._result(control.call(control.engine.remove_task, task_id))
+
+        if len(parts) == 3 and parts[0] == 'tasks' and method == 'POST' and parts[2] in TASK_ACTIONS:
+            return self._result(control.call(getattr(control.engine, TASK_ACTIONS[parts[2]]), parts[1]))
+
+        return 404, {'error': 'not found'}
+
+    def _add_tasks(self, body) -> Tuple[int, object]:
+        """添加一个或一批任务"""
+        single = isinstance(body, dict) and 'tasks' not in body
+        items = [body] if single else body.get('tasks') if isinstance(body, dict) else body
+        if not isinstance(items, list):
+            raise ValueError('expected a task object or a list of task objects')
+
+        # 先在HTTP线程中校验参数，只把有效的任务交给引擎
+        specs = []
+        errors: Dict[int, str] = {}
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or not is_valid_url(str(item.get('url', ''))):
+                errors[index] = 'invalid url'
+                continue
+            save_path = item.get('save_path')
+            if save_path is not None and not (
+                    isinstance(save_path, str) and self.control.check_save_path(save_path)):
+                errors[index] = 'save_path not allowed'
+                continue
+            filename = item.get('filename')
+            if filename is not None and not isinstance(filename, str):
+                errors[index] = 'invalid filename'
+                continue
+            mirrors = item.get('mirrors') or []
+            if not isinstance(mirrors, list) or not all(is_valid_url(str(m)) for m in mirrors):
+                errors[index] = 'invalid mirrors'
+                continue
+            checksum = str(item.get('checksum') or '')
+            if checksum:
+                try:
+                    parse_checksum(checksum)
+                except ValueError:
+                    errors[index] = 'invalid checksum'
+                    continue
+            specs.append({
+                'url': item['url'],
+                'save_path': save_path,
+                'filename': filename,
+                'connections': item.get('connections'),
+                'priority': item.get('priority', 0),
+                'mirrors': mirrors,
+                'checksum': checksum
+            })
+
+        created = iter(self.control.call(self.control.engine.add_tasks, specs) if specs else [])
+        results = []
+        for index in range(len(items)):
+            if index in errors:
+                results.append({'error': errors[index]})
+                continue
+            task = next(created)
+            results.append(
+                {'task_id': task.task_id, 'filename': task.filename} if task is not None
+                else {'error': 'file exists or task could not be created'}
+            )
+
+        if single:
+            return (201, results[0]) if 'task_id' in results[0] else (409, results[0])
+        return 200, {'tasks': results}
+
+    @staticmethod
+    def _result(ok: bool) -> Tuple[int, object]:
+        """引擎操作结果"""
+        return (200, {'ok': True}) if ok else (409, {'ok': False})
+
+    def _read_json(self):
+        """读取JSON请求体"""
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            raise ValueError('empty request body')
+        if length > MAX_BODY_SIZE:
+            raise ValueError('request body too large')
+        try:
+            return json.loads(self.rfile.read(length))
+        except json.JSONDecodeError as e:
+            raise ValueError(f'invalid json: {e}')
+
+    def _send_json(self, status: int, body):
+        """发送JSON响应"""
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream_events(self):
+        """推送进度事件（Server-Sent Events），直到客户端断开或服务器停止
+
+        事件类型：task（任务摘要）、removed（任务ID）、stats（任务统计）；
+        空闲时每15秒发送一次注释行保持连接。
+        """
+        control = self.control
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+
+        subscriber = control.subscribe()
+        try:
+            while not control.closed:
+                if not subscriber.wait(15.0):
+                    self.wfile.write(b': keepalive\n\n')
+                    self.wfile.flush()
+                    continue
+
+                task_ids, _ = subscriber.drain()
+                if control.closed:
+                    break
+                # 在引擎线程中一次生成本周期所有任务的摘要
+                summaries = control.call(self._summaries, task_ids)
+                chunks = []
+                for task_id, summary in summaries:
+                    if summary is None:
+                        chunks.append(self._event('removed', {'task_id': task_id}))
+                    else:
+                        chunks.append(self._event('task', summary))
+                chunks.append(self._event('stats', control.engine.get_stats().to_dict()))
+                self.wfile.write(b''.join(chunks))
+                self.wfile.flush()
+
+                control.wait_closed(control.event_interval)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            control.unsubscribe(subscriber)
+
+    def _summaries(self, task_ids: List[str]) -> List[Tuple[str, Optional[dict]]]:
+        """任务摘要，已删除的任务为None（引擎线程）"""
+        return [(task_id, self.control.get_task(task_id)) for task_id in task_ids]
+
+    @staticmethod
+    def _event(name: str, data) -> bytes:
+        """编码一条SSE事件"""
+        return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8')
@@ -0,0 +1,963 @@
+"""
+下载引擎模块
+
+不依赖Qt的下载核心：管理所有下载任务的生命周期（添加、删除、启动、暂停等），
+调度下载器并持久化任务。图形界面通过 DownloadManager 使用，无界面时由命令行守护进程驱动。
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+from pathlib import Path
+
+from src.core.bulk_import import BulkImporter
+from src.core.connection_tuner import get_host_profiles, host_of
+from src.core.host_limiter import get_host_limiter
+from src.core.download_task import DownloadTask
+from src.core.downloader import Downloader
+from src.core.events import Event
+from src.core.http_pool import get_connection_pool
+from src.core.metadata_probe import get_metadata_prober
+from src.core.progress_buffer import ProgressBuffer
+from src.core.task_scheduler import TaskScheduler
+from src.core.task_stats import TaskStats, TaskStatsSnapshot
+from src.database.task_store import TaskStore
+from src.utils.config import ConfigManager
+from src.utils.helpers import get_filename_from_url, sanitize_filename
+from src.utils.logger import Logger
+
+
+class DownloadEngine:
+    """下载引擎类
+    
+    管理所有下载任务，提供统一的任务管理接口，通过 Event 通知任务变化。
+    
+    除下载器外，引擎的方法和事件回调都在同一个线程（所有者线程）中执行：下载线程
+    只把进度和结束事件记入 progress_buffer，其他线程通过 call_soon() 提交调用，由所有者线程调用 process_events()
+    （或 run_once()）取出处理。图形界面中由 DownloadManager 在GUI线程中分发。
+    """
+    
+    def __init__(self, db_path: Optional[str] = None):
+        """初始化下载引擎
+        
+        Args:
+            db_path: 任务库路径，为None时使用配置值
+        """
+        self.logger = Logger()
+        self.config = ConfigManager()
+        
+        # 任务存储
+        self.tasks: Dict[str, DownloadTask] = {}  # task_id -> DownloadTask
+        self.downloaders: Dict[str, Downloader] = {}  # task_id -> Downloader
+        
+        # 队列管理：按优先级排队，同时限制并发任务数、所有任务的连接总数和每个主机的连接数
+        self.max_concurrent = self.config.get(
+            'download.max_concurrent', self.config.get('general.max_concurrent_downloads', 3)
+        )
+        self.scheduler = TaskScheduler(
+            max_tasks=self.max_concurrent,
+            max_connections=self.config.get('download.max_total_connections', 32),
+            demand=self._wanted_connections,
+            hosts=get_host_limiter(),
+            host_of=self._task_host
+        )
+        self._shutting_down = False
+        self._recheck: Set[str] = set()  # 启动时需要按分片索引重新校验临时文件的任务
+        
+        # 预取排在队列最前面的任务的文件信息，任务启动时直接使用缓存
+        self.prober = get_metadata_prober()
+        self.probe_lookahead = int(self.config.get('network.probe.lookahead', 8))
+        
+        # 事件（回调在所有者线程中执行）
+        self.task_added = Event()  # 任务添加(task)
+        self.tasks_added = Event()  # 批量添加任务(List[DownloadTask])，见 add_tasks()
+        self.task_removed = Event()  # 任务删除(task_id)
+        self.task_updated = Event()  # 任务状态更新(task)
+        self.tasks_updated = Event()  # 批量进度更新(List[DownloadTask])
+        self.task_completed = Event()  # 任务完成(task_id)
+        self.task_failed = Event()  # 任务失败(task_id, error_message)
+        self.all_tasks_completed = Event()  # 所有任务完成
+        self.save_requested = Event()  # 有待保存的修改（需在 save_deadline 前调用 save_tasks）
+        
+        # 进度缓冲区：下载线程只上报任务ID，由所有者线程批量取出
+        self.progress_buffer = ProgressBuffer()
+        
+        # 其他线程提交的调用（如控制接口），在所有者线程中按提交顺序执行
+        self._calls: Deque[Tuple[Future, Callable, tuple]] = deque()
+        self._calls_lock = threading.Lock()
+        
+        # 下载引擎：thread（有界线程池，每个活动任务占用一个线程）或 async（所有任务共用一个事件循环）
+        self.engine = self.config.get('download.engine', 'thread')
+        self.executor: Optional[ThreadPoolExecutor] = None
+        if self.engine != 'async':
+            self.executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="Download")
+        # 事件循环上尚未结束的下载（关闭时等待它们保存进度后再停止事件循环）
+        self._async_runs: Set[Future] = set()
+        self._runs_changed = threading.Condition()
+        
+        # 任务持久化：SQLite任务库，首次启动时导入旧版 tasks.json
+        self.store = TaskStore(db_path or self.config.get_database_path())
+        self.tasks_file = Path.home() / '.ndm_clone' / 'data' / 'tasks.json'
+        self.store.migrate_json(str(self.tasks_file))
+        
+        # 延迟批量保存有修改的任务：任务变化后记录保存期限，期间的修改合并为一次写入
+        self.flush_interval = float(self.config.get('database.flush_interval', 5.0))
+        self.save_deadline: Optional[float] = None
+        self.task_added.connect(self._schedule_save)
+        self.task_updated.connect(self._schedule_save)
+        
+        # 增量统计：任务添加、更新、删除时只调整该任务的计数
+        self.stats = TaskStats()
+        self.task_added.connect(self.stats.update)
+        self.tasks_added.connect(self.stats.update_many)
+        self.task_updated.connect(self.stats.update)
+        self.task_removed.connect(self.stats.remove)
+        
+        # 进行中的批量导入
+        self.importers: List[BulkImporter] = []
+        
+        # 加载已保存的任务
+        self._load_tasks()
+        
+        self.logger.info("下载引擎初始化完成")
+    
+    @property
+    def active_count(self) -> int:
+        """正在下载的任务数"""
+        return self.scheduler.active_count
+    
+    def add_task(self, url: str, save_path: str, filename: Optional[str] = None,
+                 connections: int = None, priority: int = 0,
+                 mirrors: Optional[List[str]] = None, checksum: str = "") -> Optional[DownloadTask]:
+        """添加下载任务
+        
+        Args:
+            url: 下载URL
+            save_path: 保存路径
+            filename: 文件名（为None时从URL中提取）
+            connections: 连接数（为None时使用配置值）
+            priority: 优先级（越大越先下载）
+            mirrors: 镜像URL列表（与url是同一文件）
+            checksum: 期望的校验和（格式见 DownloadTask）
+        
+        Returns:
+            创建的下载任务，失败则返回None
+        """
+        try:
+            # 创建任务
+            if connections is None:
+                connections = self.config.get('download.connections', 8)
+            # 调用方指定的文件名同样清理，不能包含路径分隔符跳出保存目录
+            filename = sanitize_filename(filename or get_filename_from_url(url))
+            
+            task = DownloadTask(
+                url=url,
+                save_path=save_path,
+                filename=filename,
+                connections=connections,
+                priority=priority,
+                mirrors=mirrors,
+                checksum=checksum
+            )
+            
+            # 检查文件是否已存在
+            file_path = os.path.join(save_path, filename)
+            if os.path.exists(file_path):
+                self.logger.warning(f"文件已存在: {file_path}")
+                return None
+            
+            # 添加到任务列表
+            self.tasks[task.task_id] = task
+            
+            # 发送信号
+            self.task_added.emit(task)
+            
+            self.logger.info(f"添加下载任务: {filename}")
+            
+            # 加入下载队列，有空闲容量时立即开始
+            self.start_task(task.task_id)
+            
+            return task
+            
+        except Exception as e:
+            self.logger.error(f"添加任务失败: {str(e)}")
+            return None
+    
+    def add_tasks(self, specs: Iterable[dict]) -> List[Optional[DownloadTask]]:
+        """批量添加下载任务
+        
+        只发出一次 tasks_added 事件（不逐个发出 task_added），在一个事务中写入任务库，
+        全部入队后统一调度，适合一次提交大量任务。
+        
+        Args:
+            specs: 任务参数字典，键为 url、save_path、filename、connections、priority、
+                mirrors、checksum，除 url 外都可以省略
+        
+        Returns:
+            与 specs 一一对应的任务，文件已存在或参数无效时为None
+        """
+        default_path = self.config.get_download_path()
+        default_connections = self.config.get('download.connections', 8)
+        
+        results: List[Optional[DownloadTask]] = []
+        added: List[DownloadTask] = []
+        for spec in specs:
+            try:
+                url = spec['url']
+                save_path = spec.get('save_path') or default_path
+                filename = sanitize_filename(spec.get('filename') or get_filename_from_url(url))
+                
+                file_path = os.path.join(save_path, filename)
+                if os.path.exists(file_path):
+                    self.logger.warning(f"文件已存在: {file_path}")
+                    results.append(None)
+                    continue
+                
+                task = DownloadTask(
+                    url=url,
+                    save_path=save_path,
+                    filename=filename,
+                    connections=int(spec.get('connections') or default_connections),
+                    priority=int(spec.get('priority') or 0),
+                    mirrors=spec.get('mirrors'),
+                    checksum=spec.get('checksum') or ''
+                )
+            except Exception as e:
+                self.logger.error(f"添加任务失败: {str(e)}")
+                results.append(None)
+                continue
+            
+            self.tasks[task.task_id] = task
+            added.append(task)
+            results.append(task)
+        
+        if not added:
+            return results
+        
+        self.tasks_added.emit(added)
+        self.logger.info(f"批量添加下载任务: {len(added)} 个")
+        
+        # 一次写入任务库，然后按优先级入队
+        try:
+            self.store.save(added)
+        except Exception as e:
+            self.logger.error(f"保存任务失败: {str(e)}")
+        for task in added:
+            self.scheduler.push(task)
+        self._dispatch()
+        
+        return results
+    
+    def import_urls(self, source, save_path: str, connections: Optional[int] = None,
+                    priority: int = 0) -> BulkImporter:
+        """从URL列表批量导入任务（在后台解析，分批添加，见 BulkImporter）
+        
+        Args:
+            source: URL列表文件路径，或逐行产生URL的可迭代对象
+            save_path: 保存目录
+            connections: 连接数（为None时使用配置值）
+            priority: 优先级
+        
+        Returns:
+            BulkImporter: 导入器，导入结束时在所有者线程中发出 finished 事件
+        """
+        importer = BulkImporter(self, save_path, connections, priority)
+        self.importers.append(importer)
+        importer.finished.connect(lambda result: self.importers.remove(importer))
+        importer.start(source)
+        return importer
+    
+    def adopt_task(self, task: DownloadTask) -> bool:
+        """接管已经保存到任务库的任务（如命令行提交的新任务）并加入下载队列
+        
+        Args:
+            task: 下载任务
+        
+        Returns:
+            是否为新任务（已存在时只尝试开始下载）
+        """
+        if task.task_id in self.tasks:
+            self.start_task(task.task_id)
+            return False
+        
+        self.tasks[task.task_id] = task
+        self.task_added.emit(task)
+        self.logger.info(f"添加下载任务: {task.filename}")
+        
+        if task.status in ("waiting", "downloading"):
+            self.start_task(task.task_id)
+        return True
+    
+    def remove_task(self, task_id: str) -> bool:
+        """删除下载任务
+        
+        Args:
+            task_id: 任务ID
+        
+        Returns:
+            是否成功删除
+        """
+        try:
+            if task_id not in self.tasks:
+                return False
+            
+            # 如果任务正在下载或排队，先停止
+            self.stop_task(task_id)
+            self._recheck.discard(task_id)
+            
+            # 删除任务
+            task = self.tasks.pop(task_id)
+            self.store.delete(task_id)
+            
+            # 删除临时文件及其进度日志、分片索引
+            temp_file = os.path.join(task.save_path, f"{task.filename}.tmp")
+            for path in (temp_file, temp_file + '.progress', temp_file + '.pieces'):
+                if os.path.exists(path):
+                    try:
+                        os.remove(path)
+                    except Exception as e:
+                        self.logger.warning(f"删除临时文件失败: {str(e)}")
+            
+            # 发送信号
+            self.task_removed.emit(task_id)
+            
+            self.logger.info(f"删除任务: {task.filename}")
+            
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"删除任务失败: {str(e)}")
+            return False
+    
+    def start_task(self, task_id: str) -> bool:
+        """开始下载任务（没有空闲容量时排队等待）
+        
+        Args:
+            task_id: 任务ID
+        
+        Returns:
+            是否已经开始下载
+        """
+        try:
+            if task_id not in self.tasks:
+                return False
+            
+            task = self.tasks[task_id]
+            
+            # 检查任务状态
+            if task_id in self.downloaders:
+                return True
+            
+            if task.status == "completed":
+                self.logger.warning("任务已完成，无需重新下载")
+                return False
+            
+            # 按优先级入队，由调度器在并发数和连接预算内启动
+            task.status = "waiting"
+            self.scheduler.push(task)
+            self._dispatch()
+            
+            if task_id not in self.downloaders:
+                self.logger.info(f"达到并发或连接数上限，任务排队等待: {task.filename}")
+                self.task_updated.emit(task)
+                return False
+            
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"开始任务失败: {str(e)}")
+            return False
+    
+    def set_task_priority(self, task_id: str, priority: int) -> bool:
+        """修改任务优先级（排队中的任务立即按新优先级重新排队）
+        
+        Args:
+            task_id: 任务ID
+            priority: 优先级（越大越先下载）
+        
+        Returns:
+            是否修改成功
+        """
+        task = self.tasks.get(task_id)
+        if task is None:
+            return False
+        
+        task.priority = priority
+        if self.scheduler.is_queued(task_id):
+            self.scheduler.push(task)
+            self._dispatch()
+        
+        self.task_updated.emit(task)
+        return True
+    
+    def _dispatch(self):
+        """从队列中取出任务启动，直到没有剩余的并发数或连接预算，然后预取后续任务的文件信息"""
+        while not self._shutting_down:
+            picked = self.scheduler.next_task()
+            if picked is None:
+                self._prefetch_queued()
+                return
+            
+            task_id, connections = picked
+            task = self.tasks.get(task_id)
+            if task is None or not self._launch(task, connections):
+                self.scheduler.release(task_id)
+    
+    def _wanted_connections(self, task_id: str) -> Optional[int]:
+        """
+        任务出队时申请的连接数：启用自适应连接数时按主机档案（见 HostProfiles.suggest），
+        不超过任务设置的连接数和 network.connections_per_file
+        """
+        task = self.tasks.get(task_id)
+        if task is None:
+            return None
+        connections = max(1, min(task.connections, int(self.config.get('network.connections_per_file', 8))))
+        if not self.config.get('network.adaptive.enabled', True):
+            return connections
+        return get_host_profiles().suggest(
+            self._task_host(task_id), connections,
+            min(connections, int(self.config.get('network.adaptive.max_connections', 32)))
+        )
+    
+    def _task_host(self, task_id: str) -> str:
+        """任务下载的主机（有缓存的文件信息时使用重定向后的地址）"""
+        task = self.tasks.get(task_id)
+        if task is None:
+            return ''
+        info = self.prober.get_cached(task.url)
+        return host_of(info.final_url if info is not None else task.url)
+    
+    def _prefetch_queued(self):
+        """在后台获取即将启动的排队任务的文件信息（已缓存或正在获取的不重复请求）"""
+        if self.probe_lookahead <= 0:
+            return
+        for task_id in self.scheduler.peek(self.probe_lookahead):
+            task = self.tasks.get(task_id)
+            if task is not None:
+                self.prober.prefetch(task.url)
+    
+    def _launch(self, task: DownloadTask, connections: int) -> bool:
+        """创建下载器并在线程池或事件循环上运行
+        
+        Args:
+            task: 下载任务
+            connections: 调度器分配的连接数
+        
+        Returns:
+            是否成功启动
+        """
+        task_id = task.task_id
+        try:
+            # 创建下载器，传入回调函数（在下载线程中调用，只向进度总线上报）
+            def progress_callback(updated_task):
+                """进度更新回调（完成和失败由下载器结束时统一处理）"""
+                if updated_task.status not in ("completed", "failed"):
+                    self.progress_buffer.post(task_id)
+            
+            downloader = self._create_downloader(task, progress_callback)
+            downloader.max_connections = connections
+            downloader.recheck = task_id in self._recheck
+            self._recheck.discard(task_id)
+            
+            # 保存下载器引用
+            self.downloaders[task_id] = downloader
+            
+            # 更新状态
+            task.status = "downloading"
+            
+            if self.engine == 'async':
+                # 在共享事件循环上开始下载
+                future = downloader.submit()
+                with self._runs_changed:
+                    self._async_runs.add(future)
+            else:
+                # 在有界线程池中开始下载
+                future = self.executor.submit(downloader.start)
+            future.add_done_callback(lambda done: self._run_finished(done, task_id, downloader))
+            
+            # 发送信号
+            self.task_updated.emit(task)
+            
+            self.logger.info(f"开始下载: {task.filename}, 分配连接数: {connections}")
+            
+            return True
+            
+        except Exception as e:
+            self.downloaders.pop(task_id, None)
+            task.mark_as_failed(str(e))
+            self.logger.error(f"开始任务失败: {str(e)}")
+            return False
+    
+    def _run_finished(self, future: Future, task_id: str, downloader: Downloader):
+        """下载器结束（在下载线程或事件循环线程中调用）：上报结束事件，再通知等待关闭的线程"""
+        self.progress_buffer.post_finished(task_id, downloader)
+        with self._runs_changed:
+            self._async_runs.discard(future)
+            self._runs_changed.notify_all()
+    
+    def _wait_async_runs(self, timeout: float) -> bool:
+        """
+        等待事件循环上的下载结束（保存进度、关闭文件并上报结束事件）
+        
+        Args:
+            timeout: 最长等待时间（秒）
+        
+        Returns:
+            bool: 是否全部结束
+        """
+        deadline = time.monotonic() + timeout
+        with self._runs_changed:
+            while self._async_runs:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.logger.warning(f"等待下载退出超时，仍有 {len(self._async_runs)} 个下载未结束")
+                    return False
+                self._runs_changed.wait(remaining)
+        return True
+    
+    def call_soon(self, func: Callable, *args) -> Future:
+        """在所有者线程中执行调用（线程安全）
+        
+        Args:
+            func: 要调用的函数（通常是引擎的方法）
+            *args: 参数
+        
+        Returns:
+            Future: 调用结果
+        """
+        future = Future()
+        with self._calls_lock:
+            self._calls.append((future, func, args))
+        self.progress_buffer.notify()
+        return future
+    
+    def run_calls(self) -> int:
+        """执行其他线程通过 call_soon() 提交的调用（所有者线程）
+        
+        Returns:
+            执行的调用数
+        """
+        with self._calls_lock:
+            calls, self._calls = self._calls, deque()
+        
+        for future, func, args in calls:
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args))
+            except Exception as e:
+                future.set_exception(e)
+        return len(calls)
+    
+    def process_events(self) -> int:
+        """处理下载线程上报的进度和结束事件、其他线程提交的调用，并在到期时保存任务（所有者线程）
+        
+        Returns:
+            处理的事件数
+        """
+        pending, finished = self.progress_buffer.drain()
+        if pending:
+            self.handle_progress(pending)
+        for task_id, downloader in finished:
+            self.handle_finished(task_id, downloader)
+        calls = self.run_calls()
+        
+        if self.save_deadline is not None and time.monotonic() >= self.save_deadline:
+            self.save_tasks()
+        
+        return len(pending) + len(finished) + calls
+    
+    def run_once(self, timeout: float = 1.0) -> int:
+        """等待下载线程上报事件（最多到保存期限或超时）后处理，用于无界面的事件循环
+        
+        Args:
+            timeout: 最长等待时间（秒）
+        
+        Returns:
+            处理的事件数
+        """
+        if self.save_deadline is not None:
+            timeout = min(timeout, max(0.0, self.save_deadline - time.monotonic()))
+        self.progress_buffer.wait(timeout)
+        return self.process_events()
+    
+    @property
+    def is_idle(self) -> bool:
+        """没有正在下载或排队的任务"""
+        return not self.downloaders and self.scheduler.queued_count == 0 \
+            and self.scheduler.active_count == 0
+    
+    def handle_finished(self, task_id: str, downloader: Downloader):
+        """下载器退出（完成、失败、暂停或停止）后归还连接并启动下一个任务（所有者线程）
+        
+        Args:
+            task_id: 任务ID
+            downloader: 已退出的下载器
+        """
+        self.scheduler.release(task_id)
+        task = self.tasks.get(task_id)
+        
+        # 停止后重新开始的任务可能已经换了新的下载器
+        if self.downloaders.get(task_id) is downloader:
+            self.downloaders.pop(task_id)
+            
+            if task is not None and task.status == "completed":
+                self._on_download_completed(task_id)
+            elif task is not None and task.status == "failed":
+                self._on_download_failed(task_id, task.error_message or "未知错误")
+        
+        # 下载器退出时分块进度已最终确定，立即保存；暂停、停止的任务刷新最终进度
+        if task is not None:
+            if task.status not in ("completed", "failed"):
+                self.task_updated.emit(task)
+            self._persist_now(task)
+        
+        self._dispatch()
+    
+    def _create_downloader(self, task: DownloadTask, progress_callback) -> Downloader:
+        """按配置的下载引擎创建下载器
+        
+        Args:
+            task: 下载任务
+            progress_callback: 进度回调函数
+        
+        Returns:
+            下载器实例
+        """
+        if self.engine == 'async':
+            from src.core.async_downloader import AsyncDownloader
+            return AsyncDownloader(task, progress_callback=progress_callback)
+        
+        return Downloader(task, progress_callback=progress_callback)
+    
+    def pause_task(self, task_id: str) -> bool:
+        """暂停下载任务
+        
+        Args:
+            task_id: 任务ID
+        
+        Returns:
+            是否成功暂停
+        """
+        try:
+            if task_id not in self.tasks:
+                return False
+            
+            task = self.tasks[task_id]
+            
+            if self.scheduler.remove(task_id):
+                # 排队中的任务直接移出队列
+                pass
+            elif task_id in self.downloaders:
+                # 暂停下载（下载器退出后归还连接并启动下一个任务）
+                self.downloaders.pop(task_id).pause()
+            else:
+                return False
+            
+            # 更新状态并立即保存
+            task.status = "paused"
+            self._persist_now(task)
+            
+            # 发送信号
+            self.task_updated.emit(task)
+            
+            self.logger.info(f"暂停下载: {task.filename}")
+            
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"暂停任务失败: {str(e)}")
+            return False
+    
+    def resume_task(self, task_id: str) -> bool:
+        """恢复下载任务
+        
+        Args:
+            task_id: 任务ID
+        
+        Returns:
+            是否成功恢复
+        """
+        try:
+            if task_id not in self.tasks:
+                return False
+            
+            task = self.tasks[task_id]
+            
+            if task.status != "paused":
+                return False
+            
+            # 重新开始任务
+            return self.start_task(task_id)
+            
+        except Exception as e:
+            self.logger.error(f"恢复任务失败: {str(e)}")
+            return False
+    
+    def recheck_task(self, task_id: str) -> bool:
+        """重新校验未完成任务的临时文件，只重新下载损坏或缺失的分片（任务随后开始下载或排队）
+        
+        Args:
+            task_id: 任务ID
+        
+        Returns:
+            是否已安排校验
+        """
+        task = self.tasks.get(task_id)
+        if task is None or task_id in self.downloaders or task.status == "completed":
+            return False
+        
+        self._recheck.add(task_id)
+        self.start_task(task_id)
+        return True
+    
+    def stop_task(self, task_id: str) -> bool:
+        """停止下载任务
+        
+        Args:
+            task_id: 任务ID
+        
+        Returns:
+            是否成功停止
+        """
+        try:
+            task = self.tasks.get(task_id)
+            if task is None:
+                return False
+            
+            if self.scheduler.remove(task_id):
+                # 排队中的任务直接移出队列
+                task.status = "stopped"
+            elif task_id in self.downloaders:
+                # 停止下载并清理下载器（下载器退出后归还连接）
+                self.downloaders.pop(task_id).stop()
+                if task.status == "downloading":
+                    task.status = "stopped"
+            else:
+                return False
+            
+            self._persist_now(task)
+            
+            # 发送信号
+            self.task_updated.emit(task)
+            
+            self.logger.info(f"停止下载: {task.filename}")
+            
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"停止任务失败: {str(e)}")
+            return False
+    
+    def get_task(self, task_id: str) -> Optional[DownloadTask]:
+        """获取任务信息
+        
+        Args:
+            task_id: 任务ID
+        
+        Returns:
+            任务对象，不存在则返回None
+        """
+        return self.tasks.get(task_id)
+    
+    def get_all_tasks(self) -> List[DownloadTask]:
+        """获取所有任务
+        
+        Returns:
+            任务列表
+        """
+        return list(self.tasks.values())
+    
+    def get_stats(self) -> TaskStatsSnapshot:
+        """获取任务统计快照（各状态任务数、总速度、剩余字节数，线程安全）
+        
+        Returns:
+            统计快照
+        """
+        return self.stats.snapshot()
+    
+    def get_history(self, limit: int = 100, before: Optional[DownloadTask] = None) -> List[DownloadTask]:
+        """分页获取已完成任务的历史记录（按完成时间倒序）
+        
+        Args:
+            limit: 每页数量
+            before: 上一页的最后一个任务，为None时获取第一页
+        
+        Returns:
+            任务列表
+        """
+        return self.store.load_history(limit, before)
+    
+    def clear_completed_tasks(self) -> int:
+        """清除已完成的任务
+        
+        Returns:
+            清除的任务数量
+        """
+        completed_ids = [
+            task_id for task_id, task in self.tasks.items()
+            if task.status == "completed"
+        ]
+        
+        for task_id in completed_ids:
+            self.remove_task(task_id)
+        
+        self.logger.info(f"清除了 {len(completed_ids)} 个已完成任务")
+        
+        return len(completed_ids)
+    
+    def handle_progress(self, task_ids: List[str]):
+        """处理合并后的一批进度更新（所有者线程）
+        
+        Args:
+            task_ids: 本周期有进度更新的任务ID列表
+        """
+        tasks = [self.tasks[task_id] for task_id in task_ids if task_id in self.tasks]
+        if not tasks:
+            return
+        
+        for task in tasks:
+            self.task_updated.emit(task)
+        self.tasks_updated.emit(tasks)
+        
+        # 连接数已按实测吞吐量固定的任务归还多余的连接，供排队的任务使用
+        freed = 0
+        for task in tasks:
+            downloader = self.downloaders.get(task.task_id)
+            limit = downloader.connection_limit if downloader is not None else None
+            if limit is not None:
+                freed += self.scheduler.shrink(task.task_id, limit)
+        if freed:
+            self._dispatch()
+    
+    def _on_download_completed(self, task_id: str):
+        """处理下载完成
+        
+        Args:
+            task_id: 任务ID
+        """
+        if task_id in self.tasks:
+            task = self.tasks[task_id]
+            task.status = "completed"
+            task.progress = 100.0
+            
+            # 发送信号
+            self.task_updated.emit(task)
+            self.task_completed.emit(task_id)
+            
+            self.logger.info(f"下载完成: {task.filename}")
+            
+            # 检查是否所有任务都完成
+            if all(task.status == "completed" for task in self.tasks.values()):
+                self.all_tasks_completed.emit()
+    
+    def _on_download_failed(self, task_id: str, error: str):
+        """处理下载失败
+        
+        Args:
+            task_id: 任务ID
+            error: 错误信息
+        """
+        if task_id in self.tasks:
+            task = self.tasks[task_id]
+            task.status = "failed"
+            task.error_message = error
+            
+            # 发送信号
+            self.task_updated.emit(task)
+            self.task_failed.emit(task_id, error)
+            
+            self.logger.error(f"下载失败: {task.filename}, 错误: {error}")
+    
+    def _schedule_save(self, *args):
+        """任务有变化时安排一次延迟保存（已有保存期限则合并到那一次）"""
+        if self.save_deadline is None:
+            self.save_deadline = time.monotonic() + self.flush_interval
+            self.save_requested.emit()
+    
+    def save_tasks(self):
+        """保存任务到任务库（只写入有修改记录的任务）"""
+        self.save_deadline = None
+        try:
+            saved = self.store.save(list(self.tasks.values()))
+            if saved:
+                self.logger.debug(f"保存了 {saved} 个任务")
+            
+        except Exception as e:
+            self.logger.error(f"保存任务失败: {str(e)}")
+    
+    def _persist_now(self, task: DownloadTask):
+        """状态变化（完成、失败、暂停、停止）时立即保存该任务
+        
+        Args:
+            task: 下载任务
+        """
+        try:
+            self.store.save([task])
+        except Exception as e:
+            self.logger.error(f"保存任务失败: {str(e)}")
+    
+    def _load_tasks(self):
+        """从任务库加载未完成的任务（历史记录按需分页读取）"""
+        try:
+            for task in self.store.load_active():
+                # 重置状态为暂停
+                if task.status == "downloading":
+                    task.status = "paused"
+                
+                self.tasks[task.task_id] = task
+                self.task_added.emit(task)
+                
+                # 上次退出时仍在排队的任务重新入队
+                if task.status == "waiting":
+                    self.scheduler.push(task)
+            
+            self.logger.info(f"加载了 {len(self.tasks)} 个任务")
+            
+            # 重新入队的任务立即按并发限制开始下载
+            self._dispatch()
+            
+        except Exception as e:
+            self.logger.error(f"加载任务失败: {str(e)}")
+    
+    def shutdown(self):
+        """关闭下载引擎"""
+        try:
+            # 停止所有下载，不再启动排队中的任务
+            self._shutting_down = True
+            for importer in list(self.importers):
+                importer.cancel()
+            for task_id in list(self.downloaders.keys()):
+                self.stop_task(task_id)
+            if self.executor is not None:
+                self.executor.shutdown(wait=True)
+            # 异步模式下停止事件循环前等待下载协程退出，否则最终进度不会写入
+            self._wait_async_runs(float(self.config.get('download.shutdown_timeout', 30.0)))
+            # 处理已退出下载器的结束事件（保存最终进度）
+            self.process_events()
+            
+            # 保存任务状态
+            self.save_tasks()
+            self.store.close()
+            
+            # 关闭共享连接池
+            pool = get_connection_pool()
+            stats = pool.get_stats()
+            self.logger.debug(
+                f"连接池统计: 请求 {stats['requests']} 次, 新建连接 {stats['connections']} 个, "
+                f"复用 {stats['reused']} 次"
+            )
+            pool.close()
+            self.prober.close()
+            
+            if self.engine == 'async':
+                from src.core.async_downloader import shutdown_async_engine
+                shutdown_async_engine()
+            
+            self.logger.info("下载引擎已关闭")
+            
+        except Exception as e:
+            self.logger.error(f"关闭下载引擎失败: {str(e)}")
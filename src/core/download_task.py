@@ -1,50 +1,145 @@
 """
 下载任务模型
 """
-from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, List
+from typing import Iterable, Optional, Set, Union
 import uuid
 
+from .chunk_table import ChunkTable
+
 
-@dataclass
 class DownloadTask:
-    """下载任务类"""
-    
-    # 基本信息
-    task_id: str = field(default_factory=lambda: str(uuid.uuid4()))
-    url: str = ""
-    filename: str = ""
-    save_path: str = ""
-    
-    # 文件信息
-    total_size: int = 0  # 总大小（字节）
-    downloaded_size: int = 0  # 已下载大小（字节）
-    
-    # 状态信息
-    status: str = "waiting"  # waiting, downloading, paused, completed, failed
-    progress: float = 0.0  # 进度百分比（0-100）
-    speed: float = 0.0  # 下载速度（字节/秒）
-    
-    # 时间信息
-    created_at: datetime = field(default_factory=datetime.now)
-    started_at: Optional[datetime] = None
-    completed_at: Optional[datetime] = None
-    
-    # 其他信息
-    error_message: str = ""
-    retry_count: int = 0
-    connections: int = 8  # 分块数量
-    
-    # 分块信息
-    chunks: List[dict] = field(default_factory=list)
-    
-    def __post_init__(self):
-        """初始化后处理"""
+    """下载任务类
+    
+    使用 __slots__ 存储字段（不为每个任务创建 __dict__），分块信息按列存储在
+    ChunkTable 中。构造参数、属性和 to_dict()/from_dict() 与原数据类版本一致，
+    给 chunks 赋值分块字典列表时会自动转换为 ChunkTable。
+    """
+    
+    # 持久化字段（顺序与 to_dict 一致）
+    FIELDS = (
+        'task_id', 'url', 'filename', 'save_path',
+        'total_size', 'downloaded_size',
+        'status', 'progress', 'speed',
+        'created_at', 'started_at', 'completed_at',
+        'error_message', 'retry_count', 'connections', 'priority',
+        'mirrors', 'checksum', 'chunks'
+    )
+    
+    __slots__ = FIELDS[:-1] + ('_chunks', '_dirty')
+    
+    def __init__(self, task_id: Optional[str] = None, url: str = "", filename: str = "",
+                 save_path: str = "", total_size: int = 0, downloaded_size: int = 0,
+                 status: str = "waiting", progress: float = 0.0, speed: float = 0.0,
+                 created_at: Optional[datetime] = None, started_at: Optional[datetime] = None,
+                 completed_at: Optional[datetime] = None, error_message: str = "",
+                 retry_count: int = 0, connections: int = 8, priority: int = 0,
+                 mirrors: Optional[Iterable[str]] = None, checksum: str = "",
+                 chunks: Union[ChunkTable, Iterable[dict], None] = None):
+        """
+        初始化下载任务
+        
+        Args:
+            task_id: 任务ID，为None时自动生成
+            url: 下载URL
+            filename: 文件名，为空时从URL推断
+            save_path: 保存目录
+            total_size: 总大小（字节）
+            downloaded_size: 已下载大小（字节）
+            status: 状态（waiting, downloading, paused, completed, failed）
+            progress: 进度百分比（0-100）
+            speed: 下载速度（字节/秒）
+            created_at: 创建时间，为None时取当前时间
+            started_at: 开始时间
+            completed_at: 完成时间
+            error_message: 错误信息
+            retry_count: 重试次数
+            connections: 分块数量
+            priority: 优先级（越大越先下载）
+            mirrors: 镜像URL列表（与url是同一文件，分块可以从任一镜像下载）
+            checksum: 期望的校验和（"sha256:摘要"、"sha256:校验文件URL"或 .sha256/.meta4 等校验文件URL）
+            chunks: 分块信息
+        """
+        # 自上次持久化以来修改过的字段（分块表的原地修改不会被记录）；
+        # 新建的任务尚未持久化，下面的赋值会把所有字段记为已修改
+        object.__setattr__(self, '_dirty', set())
+        
+        # 基本信息
+        self.task_id = task_id or str(uuid.uuid4())
+        self.url = url
+        self.filename = filename
+        self.save_path = save_path
+        
+        # 文件信息
+        self.total_size = total_size
+        self.downloaded_size = downloaded_size
+        
+        # 状态信息
+        self.status = status
+        self.progress = progress
+        self.speed = speed
+        
+        # 时间信息
+        self.created_at = created_at or datetime.now()
+        self.started_at = started_at
+        self.completed_at = completed_at
+        
+        # 其他信息
+        self.error_message = error_message
+        self.retry_count = retry_count
+        self.connections = connections
+        self.priority = priority
+        self.mirrors = list(mirrors or ())
+        self.checksum = checksum
+        
+        # 分块信息
+        self.chunks = chunks
+        
         if not self.filename and self.url:
             from ..utils.helpers import get_filename_from_url
             self.filename = get_filename_from_url(self.url)
     
+    def __setattr__(self, name, value):
+        """设置属性并记录修改过的字段"""
+        object.__setattr__(self, name, value)
+        self._dirty.add(name)
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, DownloadTask):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.FIELDS)
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        return (f"DownloadTask(task_id={self.task_id!r}, filename={self.filename!r}, "
+                f"status={self.status!r}, downloaded_size={self.downloaded_size}, "
+                f"total_size={self.total_size}, chunks={len(self._chunks)})")
+    
+    @property
+    def chunks(self) -> ChunkTable:
+        """分块信息"""
+        return self._chunks
+    
+    @chunks.setter
+    def chunks(self, value: Union[ChunkTable, Iterable[dict], None]):
+        object.__setattr__(self, '_chunks', ChunkTable.coerce(value))
+    
+    @property
+    def is_dirty(self) -> bool:
+        """自上次持久化以来是否有修改"""
+        return bool(self._dirty)
+    
+    def mark_dirty(self, *names: str):
+        """手动标记字段已修改（如原地修改了分块表）"""
+        self._dirty.update(names or ('chunks',))
+    
+    def pop_dirty(self) -> Set[str]:
+        """取出并清空修改记录（持久化前调用，之后的修改会重新记录）"""
+        dirty = self._dirty
+        object.__setattr__(self, '_dirty', set())
+        return dirty
+    
     @property
     def remaining_size(self) -> int:
         """剩余大小"""
@@ -151,7 +246,10 @@ class DownloadTask:
             'error_message': self.error_message,
             'retry_count': self.retry_count,
             'connections': self.connections,
-            'chunks': self.chunks
+            'priority': self.priority,
+            'mirrors': list(self.mirrors),
+            'checksum': self.checksum,
+            'chunks': self._chunks.to_list()
         }
     
     @classmethod
@@ -2,17 +2,37 @@
 下载器核心模块
 实现多线程分块下载
 """
+import hashlib
 import os
 import threading
 import time
-from typing import Optional, Callable
+from contextlib import contextmanager
+from typing import List, Optional, Callable, Tuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
 import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from ..utils.config import ConfigManager
 from ..utils.logger import Logger
 from ..utils.helpers import calculate_chunks
 from .download_task import DownloadTask
+from .http_pool import get_connection_pool
+from .metadata_probe import FileMetadata, get_metadata_prober
+from .mirror_pool import Mirror, MirrorPool, MirrorSwitch, check_mirror
+from .integrity import (
+    Checksum, ChecksumError, PieceHashes, PrefixHasher, find_bad_pieces, resolve_checksum
+)
+from .connection_tuner import ConnectionTuner, host_of
+from .host_limiter import get_host_limiter
+from .piece_index import PieceIndex, PieceRecorder, piece_count, pieces_to_chunks
+from .progress_journal import ProgressJournal
+from .chunk_scheduler import ChunkScheduler
+from .progress_counter import ProgressCounter
+from .io_buffer import ChunkBuffer
+from .chunk_table import ChunkView
+from .file_writer import TaskFileWriter
+from .rate_limiter import get_rate_limiter
+from .retry import RetryPolicy, TransientError
 
 
 class Downloader:
@@ -28,26 +48,45 @@ class Downloader:
         """
         self.task = task
         self.progress_callback = progress_callback
+        self.max_connections: Optional[int] = None  # 调度器分配的连接数上限
         self.config = ConfigManager()
         self.logger = Logger()
+        self.pool = get_connection_pool()
+        self.prober = get_metadata_prober()
+        self.source_url = task.url  # 实际请求的URL（重定向后的地址）
+        self.mirror_pool: Optional[MirrorPool] = None  # 有可用镜像时分块在各镜像间调度
+        self.expected_checksum: Optional[Checksum] = None  # 任务的期望校验和
+        self.limiter = get_rate_limiter()
+        self.hosts = get_host_limiter()
+        self.retry_policy = self._create_retry_policy()
         
         self._stop_flag = threading.Event()
         self._pause_flag = threading.Event()
-        self._lock = threading.Lock()
+        self._retry_budget = self.retry_policy.new_budget()
+        self._failure: Optional[BaseException] = None  # 重试用尽后放弃的分块错误
+        self._digest: Optional[str] = None  # 下载过程中计算的整个文件的摘要
+        self._verified = False  # 分块下载提交临时文件前是否已校验通过
+        self._repair_rounds = 0  # 分片校验失败后重新下载的轮数
+        self._piece_index: Optional[PieceIndex] = None  # 已写入分片的摘要索引
+        self.recheck = False  # 开始时按分片索引重新校验临时文件（见 DownloadEngine.recheck_task）
+        self._tuner: Optional[ConnectionTuner] = None  # 按实测吞吐量调整连接数
         
-        # 下载统计
-        self._downloaded_chunks = {}  # 记录每个分块已下载的字节数
+        # 下载统计（每个工作线程独占一个计数槽位，热路径无需加锁）
+        self._counter = ProgressCounter(1)
+        self._scheduler: Optional[ChunkScheduler] = None
+        self._writer: Optional[TaskFileWriter] = None
         self._last_update_time = time.time()
         self._last_downloaded_size = 0
     
     def start(self):
         """开始下载"""
+        self.limiter.register(self.task.task_id)
         try:
             self.logger.info(f"开始下载: {self.task.url}")
             self.task.mark_as_downloading()
             
-            # 获取文件信息
-            if not self._get_file_info():
+            # 获取文件信息和期望的校验和
+            if not self._get_file_info() or not self._prepare_checksum():
                 return
             
             # 检查是否支持分块下载
@@ -57,18 +96,41 @@ class Downloader:
                 self._download_single()
             
             # 检查是否完成
-            if not self._stop_flag.is_set() and not self._pause_flag.is_set():
-                if self._verify_download():
-                    self.task.mark_as_completed()
-                    self.logger.info(f"下载完成: {self.task.filename}")
-                    self._notify_progress()
-                else:
-                    self.task.mark_as_failed("文件验证失败")
-                    self.logger.error(f"文件验证失败: {self.task.filename}")
+            self._finish()
         
         except Exception as e:
             self.task.mark_as_failed(str(e))
             self.logger.error(f"下载失败: {e}")
+            self.prober.invalidate(self.task.url)
+        finally:
+            self.limiter.unregister(self.task.task_id)
+    
+    def _finish(self):
+        """下载结束后验证文件并更新任务状态"""
+        if self._stop_flag.is_set() or self._pause_flag.is_set():
+            return
+        
+        if isinstance(self._failure, ChecksumError):
+            # 临时文件已删除，重试时从头下载
+            self.task.mark_as_failed(f"文件校验失败: {self._failure}")
+            self.prober.invalidate(self.task.url)
+            return
+        
+        if self._failure is not None:
+            # 有分块重试用尽，临时文件和进度日志保留，可稍后恢复
+            self.task.mark_as_failed(f"下载未完成: {self._failure}")
+            self.logger.error(f"下载未完成: {self.task.filename}, {self._failure}")
+            # 缓存的文件信息可能已过时，重试时重新获取
+            self.prober.invalidate(self.task.url)
+            return
+        
+        if self._verify_download():
+            self.task.mark_as_completed()
+            self.logger.info(f"下载完成: {self.task.filename}")
+            self._notify_progress()
+        else:
+            self.task.mark_as_failed("文件验证失败")
+            self.logger.error(f"文件验证失败: {self.task.filename}")
     
     def pause(self):
         """暂停下载"""
@@ -83,31 +145,11 @@ class Downloader:
         self.logger.info(f"停止下载: {self.task.filename}")
     
     def _get_file_info(self) -> bool:
-        """获取文件信息"""
+        """获取文件信息（优先使用元数据缓存，预取过或刚下载过的链接不再发送请求）"""
         try:
-            timeout = self.config.get('network.timeout', 30)
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            
-            response = requests.head(self.task.url, headers=headers, timeout=timeout, allow_redirects=True)
-            
-            # 获取文件大小
-            content_length = response.headers.get('Content-Length')
-            if content_length:
-                self.task.total_size = int(content_length)
-            
-            # 检查是否支持Range请求
-            accept_ranges = response.headers.get('Accept-Ranges', 'none')
-            if accept_ranges == 'bytes' and self.task.total_size > 0:
-                # 支持分块下载
-                connections = self.config.get('network.connections_per_file', 8)
-                self.task.connections = connections
-                self.task.chunks = calculate_chunks(self.task.total_size, connections)
-            else:
-                # 不支持分块下载
-                self.task.connections = 1
-                self.task.chunks = [{'start': 0, 'end': self.task.total_size - 1, 'downloaded': 0}]
-            
-            self.logger.info(f"文件大小: {self.task.total_size} 字节, 分块数: {self.task.connections}")
+            info = self.prober.fetch(self.task.url)
+            self._apply_file_info(info)
+            self._prepare_mirrors(info)
             return True
         
         except Exception as e:
@@ -115,155 +157,828 @@ class Downloader:
             self.logger.error(f"获取文件信息失败: {e}")
             return False
     
-    def _download_with_chunks(self):
-        """分块下载"""
-        # 创建临时文件
-        final_file_path = os.path.join(self.task.save_path, self.task.filename)
-        temp_file = final_file_path + '.tmp'
+    def _apply_file_info(self, info: FileMetadata):
+        """
+        根据文件信息设置文件大小和分块
+        
+        Args:
+            info: 文件信息
+        """
+        # 之后的请求直接发往重定向后的地址
+        self.source_url = info.final_url or self.task.url
+        
+        # 获取文件大小
+        if info.size:
+            self.task.total_size = info.size
         
-        # 如果是恢复下载，读取已下载的进度
-        if os.path.exists(temp_file):
-            self._load_progress(temp_file)
+        # 检查是否支持Range请求
+        accept_ranges = 'bytes' if info.accept_ranges else 'none'
+        if accept_ranges == 'bytes' and self.task.total_size > 0 and self._has_resumable_chunks():
+            # 恢复下载，沿用已有分块
+            self.task.connections = max(1, self.task.connections)
+            self._tuner = self._create_tuner()
+        elif accept_ranges == 'bytes' and self.task.total_size > 0:
+            # 支持分块下载：自适应时先按起始连接数分块，增加的连接通过拆分分块领取区间
+            # （任务的连接数是用户设置的上限，探测出的连接数只保存在控制器和主机档案中）
+            self._tuner = self._create_tuner()
+            initial = self._tuner.limit if self._tuner is not None else self._worker_count()
+            self.task.chunks = calculate_chunks(self.task.total_size, initial)
         else:
-            # 创建空文件
-            with open(temp_file, 'wb') as f:
-                f.seek(self.task.total_size - 1)
-                f.write(b'\0')
-        
-        # 使用线程池下载各个分块
-        with ThreadPoolExecutor(max_workers=self.task.connections) as executor:
-            futures = []
+            # 不支持分块下载
+            self.task.connections = 1
+            self.task.chunks = [{'start': 0, 'end': self.task.total_size - 1, 'downloaded': 0}]
+        
+        self.logger.info(f"文件大小: {self.task.total_size} 字节, 分块数: {len(self.task.chunks)}")
+    
+    @property
+    def connection_limit(self) -> Optional[int]:
+        """已固定的连接数（连接数控制器探测结束后），尚在探测或未启用时为None"""
+        tuner = self._tuner
+        return tuner.limit if tuner is not None and tuner.settled else None
+    
+    def _create_tuner(self) -> Optional[ConnectionTuner]:
+        """创建连接数控制器（未启用自适应或只有一个连接时不需要）"""
+        ceiling = self._worker_count()
+        if not self.config.get('network.adaptive.enabled', True) or ceiling <= 1:
+            return None
+        # 限速时吞吐量不反映服务器的能力，不写入主机档案
+        return ConnectionTuner(self.source_url, ceiling, config=self.config, learn=not self.limiter.enabled)
+    
+    def _tune_connections(self, started: int) -> range:
+        """
+        按实测吞吐量调整连接数（由汇总进度的线程定期调用）
+        
+        Args:
+            started: 已启动的工作线程数
+        
+        Returns:
+            range: 需要新启动的工作线程槽位
+        """
+        tuner = self._tuner
+        if tuner is None:
+            return range(0)
+        downloaded = self._counter.total()
+        if tuner.sample(downloaded, self.task.total_size - downloaded):
+            self.logger.info(f"连接数调整为 {tuner.limit}: {self.task.filename}")
+        return range(started, tuner.limit)
+    
+    def _initial_workers(self) -> int:
+        """开始时启动的工作线程数"""
+        workers = self._worker_count()
+        return min(workers, self._tuner.limit) if self._tuner is not None else workers
+    
+    def _prepare_checksum(self) -> bool:
+        """解析任务的期望校验和（需要时下载校验文件）"""
+        self.expected_checksum = None
+        if not self.task.checksum:
+            return True
+        
+        try:
+            self.expected_checksum = resolve_checksum(
+                self.task.checksum, self.task.filename, self.pool, self.config.get('network.timeout', 30)
+            )
+            return True
+        
+        except Exception as e:
+            self.task.mark_as_failed(f"获取校验和失败: {e}")
+            self.logger.error(f"获取校验和失败: {e}")
+            return False
+    
+    def _prepare_mirrors(self, info: FileMetadata):
+        """
+        并发获取各镜像的文件信息，只使用与主链接大小和ETag一致的镜像
+        
+        Args:
+            info: 主链接的文件信息
+        """
+        self.mirror_pool = None
+        if not self.task.mirrors or not info.accept_ranges or self.task.total_size <= 0:
+            return
+        
+        timeout = self.config.get('network.timeout', 30)
+        futures = [(url, self.prober.prefetch(url)) for url in self.task.mirrors]
+        urls = [self.source_url]
+        for url, future in futures:
+            try:
+                mirror_info = future.result(timeout)
+            except Exception as e:
+                self.logger.warning(f"镜像不可用: {url}, {e}")
+                continue
             
-            for i, chunk in enumerate(self.task.chunks):
-                if chunk.get('downloaded', 0) >= (chunk['end'] - chunk['start'] + 1):
-                    # 该分块已下载完成
-                    continue
-                
-                future = executor.submit(self._download_chunk, i, chunk, temp_file)
-                futures.append(future)
+            reason = check_mirror(info, mirror_info)
+            if reason:
+                self.logger.warning(f"镜像与主链接不是同一文件，不使用: {url}, {reason}")
+                self.prober.invalidate(url)
+                continue
+            urls.append(mirror_info.final_url or url)
+        
+        if len(urls) > 1:
+            self.mirror_pool = MirrorPool(urls, self.config)
+            self.logger.info(f"使用 {len(self.mirror_pool)} 个下载源: {self.task.filename}")
+    
+    def _has_resumable_chunks(self) -> bool:
+        """已有分块是否连续覆盖整个文件，可用于恢复下载"""
+        if not self.task.chunks:
+            return False
+        
+        next_start = 0
+        for chunk in sorted(self.task.chunks, key=lambda c: c['start']):
+            if chunk['start'] != next_start:
+                return False
+            next_start = chunk['end'] + 1
+        return next_start == self.task.total_size
+    
+    def _download_with_chunks(self):
+        """分块下载（有期望校验和时边下载边计算摘要，分片摘要不一致时只重新下载损坏的区间）"""
+        journal = self._prepare_chunks()
+        hasher = self._create_hasher()
+        completed = False
+        
+        try:
+            while True:
+                self._run_chunk_workers(journal)
+                completed = self._complete_chunks(journal)
+                if not completed or self.expected_checksum is None or self._check_integrity(hasher):
+                    break
+        finally:
+            if hasher is not None:
+                hasher.close()
+            if self._piece_index is not None:
+                self._piece_index.close()
+            # 完成时同步到磁盘；未完成时进度日志已同步过数据
+            self._writer.close(sync=completed)
+        
+        if isinstance(self._failure, ChecksumError):
+            self._discard_temp_file(journal)
+        elif completed:
+            self._commit_temp_file(journal)
+    
+    def _run_chunk_workers(self, journal: ProgressJournal):
+        """运行分块工作线程直到所有分块结束，期间定期汇总进度并写入进度日志"""
+        progress_interval = self.config.get('download.progress_interval', 1.0)
+        journal_interval = self.config.get('download.journal_interval', 2.0)
+        last_journal_time = time.monotonic()
+        
+        # 每个连接一个工作线程，空闲线程会拆分最慢的分块继续下载；
+        # 连接数控制器增加连接时启动更多线程
+        started = self._initial_workers()
+        recorder = self._start_piece_recorder()
+        with self._stopping(recorder), ThreadPoolExecutor(max_workers=self._worker_count()) as executor:
+            pending = {
+                executor.submit(self._chunk_worker, slot)
+                for slot in range(started)
+            }
             
-            # 等待所有分块下载完成
-            for future in as_completed(futures):
+            # 等待所有分块下载完成，期间定期汇总进度并写入进度日志
+            while pending:
+                done, pending = wait(pending, timeout=progress_interval, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self.logger.error(f"分块下载失败: {e}")
+                        if self._failure is None:
+                            self._failure = e
+                
                 if self._stop_flag.is_set() or self._pause_flag.is_set():
-                    # 取消所有未完成的任务
-                    for f in futures:
+                    # 取消所有未开始的分块
+                    for f in pending:
                         f.cancel()
                     break
                 
-                try:
-                    future.result()
-                except Exception as e:
-                    self.logger.error(f"分块下载失败: {e}")
-        
-        # 如果下载完成，重命名临时文件
-        if not self._stop_flag.is_set() and not self._pause_flag.is_set():
-            if os.path.exists(temp_file):
-                if os.path.exists(final_file_path):
-                    os.remove(final_file_path)
-                os.rename(temp_file, final_file_path)
-    
-    def _download_chunk(self, chunk_index: int, chunk: dict, temp_file: str):
-        """下载单个分块"""
-        start = chunk['start'] + chunk.get('downloaded', 0)
-        end = chunk['end']
+                if time.time() - self._last_update_time >= progress_interval:
+                    self._update_progress()
+                
+                if self._writer.periodic_journal and \
+                        time.monotonic() - last_journal_time >= journal_interval:
+                    self._save_progress(journal)
+                    last_journal_time = time.monotonic()
+                
+                slots = self._tune_connections(started)
+                if not pending and self._tuner is not None and self._scheduler.has_pending():
+                    # 连接数减少时交回的区间可能在其他线程都已退出后才归还
+                    slots = range(self._tuner.limit)
+                pending.update(executor.submit(self._chunk_worker, slot) for slot in slots)
+                started = max(started, slots.stop)
+    
+    def _start_piece_recorder(self) -> Optional[PieceRecorder]:
+        """启动把写完的分片记入分片索引的后台线程"""
+        if self._piece_index is None:
+            return None
+        recorder = PieceRecorder(
+            self._piece_index, self._written_ranges, self.config.get('download.integrity.record_interval', 1.0)
+        )
+        recorder.start()
+        return recorder
+    
+    @staticmethod
+    @contextmanager
+    def _stopping(recorder: Optional[PieceRecorder]):
+        """分块下载结束（包括出错）后停止分片记录线程"""
+        try:
+            yield
+        finally:
+            if recorder is not None:
+                recorder.stop()
+    
+    def _written_ranges(self) -> List[Tuple[int, int]]:
+        """临时文件中已写入的字节范围 [(start, end)]，end 不包含在内"""
+        return [(chunk['start'], chunk['start'] + chunk.get('downloaded', 0)) for chunk in self._scheduler.snapshot()]
+    
+    def _create_hasher(self) -> Optional[PrefixHasher]:
+        """有整个文件的期望摘要时，启动跟随已写入位置计算摘要的后台线程"""
+        expected = self.expected_checksum
+        if expected is None or not expected.digest:
+            return None
+        hasher = PrefixHasher(
+            expected.algorithm, self._temp_file_path(), self._written_frontier,
+            self.config.get('download.integrity.hash_interval', 0.5)
+        )
+        hasher.start()
+        return hasher
+    
+    def _written_frontier(self) -> int:
+        """临时文件中已连续写入到的位置（此前的字节都已写入，不会再修改）"""
+        return min(
+            (chunk['start'] + chunk.get('downloaded', 0) for chunk in self._scheduler.snapshot()
+             if ChunkScheduler.remaining(chunk) > 0),
+            default=self.task.total_size
+        )
+    
+    def _check_integrity(self, hasher: Optional[PrefixHasher]) -> bool:
+        """
+        校验下载完成的临时文件
         
-        if start > end:
-            return
+        Args:
+            hasher: 下载过程中计算摘要的 PrefixHasher（没有整个文件的摘要时为None）
+        
+        Returns:
+            bool: 校验结束（通过，或失败并记录在 _failure 中）时返回True；
+                按分片摘要找到损坏的区间并已重置为未下载、需要再次下载时返回False
+        """
+        expected = self.expected_checksum
+        error = "分片摘要不一致"
+        if hasher is not None:
+            self._digest = hasher.finish(self.task.total_size)
+            if self._digest == expected.digest:
+                self.logger.info(f"校验通过: {self.task.filename} ({expected.algorithm})")
+                self._verified = True
+                return True
+            error = f"{expected.algorithm} 校验和不一致: {self._digest} != {expected.digest}"
+        
+        pieces = expected.pieces
+        max_rounds = self.config.get('download.integrity.repair_rounds', 2)
+        if pieces is not None and self._repair_rounds < max_rounds:
+            bad = find_bad_pieces(
+                self._temp_file_path(), pieces, self.task.total_size,
+                self.config.get('download.integrity.workers', 0) or None
+            )
+            if bad:
+                self._repair_rounds += 1
+                self.logger.warning(
+                    f"{len(bad)} 个分片校验失败，重新下载这些区间（第 {self._repair_rounds} 次）: {self.task.filename}"
+                )
+                self._reset_pieces(bad, pieces)
+                self._restart_hasher(hasher)
+                return False
+            if hasher is None:
+                self.logger.info(f"分片校验通过: {self.task.filename} ({pieces.algorithm})")
+                self._verified = True
+                return True
+        
+        # 没有期望的分片摘要时，按下载时记录的分片索引找出写入后被损坏的分片
+        if self._piece_index is not None and self._repair_rounds < max_rounds and self._recheck_pieces():
+            self._repair_rounds += 1
+            self.logger.warning(f"临时文件有分片损坏，重新下载（第 {self._repair_rounds} 次）: {self.task.filename}")
+            self._init_scheduler()
+            self._restart_hasher(hasher)
+            return False
+        
+        self.logger.error(f"文件校验失败: {self.task.filename}, {error}")
+        self._failure = ChecksumError(error)
+        return True
+    
+    @staticmethod
+    def _restart_hasher(hasher: Optional[PrefixHasher]):
+        """修复了已计算过的区间后，从头重新计算摘要"""
+        if hasher is not None:
+            hasher.reset()
+            hasher.start()
+    
+    def _reset_pieces(self, bad: List[int], pieces: PieceHashes):
+        """把损坏分片所在的区间重置为未下载的分块，其余区间保持已完成"""
+        total_size = self.task.total_size
+        good = [True] * piece_count(total_size, pieces.piece_size)
+        for index in bad:
+            good[index] = False
+            if self._piece_index is not None:
+                self._piece_index.clear_range(*pieces.piece_range(index, total_size))
+        
+        self.task.chunks = pieces_to_chunks(good, pieces.piece_size, total_size)
+        self.task.downloaded_size = self.task.chunks.total_downloaded()
+        self._init_scheduler()
+    
+    def _recheck_pieces(self) -> int:
+        """
+        按分片摘要索引并行校验临时文件，只把损坏或缺失的分片重置为未下载
+        
+        Returns:
+            int: 需要重新下载的分片数
+        """
+        index = self._piece_index
+        good = index.recheck(self.config.get('download.integrity.workers', 0) or None)
+        self.task.chunks = pieces_to_chunks(good, index.piece_size, self.task.total_size)
+        self.task.downloaded_size = self.task.chunks.total_downloaded()
         
+        missing = good.count(False)
+        self.logger.info(
+            f"校验临时文件: {index.count - missing}/{index.count} 个分片完好，"
+            f"重新下载其余分片: {self.task.filename}"
+        )
+        return missing
+    
+    def _discard_temp_file(self, journal: ProgressJournal):
+        """删除校验失败的临时文件和进度日志并清零任务进度，重试时从头下载"""
         try:
-            timeout = self.config.get('network.timeout', 30)
-            headers = {
-                'User-Agent': 'Mozilla/5.0',
-                'Range': f'bytes={start}-{end}'
-            }
+            os.remove(self._temp_file_path())
+        except OSError:
+            pass
+        journal.remove()
+        if self._piece_index is not None:
+            self._piece_index.remove()
+        for chunk in self.task.chunks:
+            chunk['downloaded'] = 0
+        self.task.downloaded_size = 0
+        self._counter = ProgressCounter(1)
+    
+    def _prepare_chunks(self) -> ProgressJournal:
+        """
+        准备分块下载：恢复进度、打开临时文件、初始化计数器和调度器
+        
+        Returns:
+            ProgressJournal: 该任务的进度日志
+        """
+        # 创建临时文件
+        temp_file = self._temp_file_path()
+        journal = ProgressJournal(temp_file)
+        
+        # 如果是恢复下载，读取已下载的进度；进度日志无效（如崩溃）或要求重新校验时，
+        # 按分片索引校验临时文件，只重新下载损坏或缺失的分片
+        resuming = os.path.exists(temp_file)
+        indexed = self._open_piece_index(temp_file, reset=not resuming)
+        if resuming:
+            resumed = self._load_progress(temp_file, journal)
+            if indexed and (self.recheck or not resumed):
+                self._recheck_pieces()
+        else:
+            journal.remove()
+            for chunk in self.task.chunks:
+                chunk['downloaded'] = 0
+            self.task.downloaded_size = 0
+        
+        # 整个任务只打开一次临时文件，新建时预分配空间
+        self._writer = TaskFileWriter(
+            temp_file,
+            fsync_policy=self.config.get('download.fsync_policy', 'journal'),
+            fsync_interval_mb=self.config.get('download.fsync_interval_mb', 64)
+        )
+        self._writer.open(self.task.total_size, preallocate=self.config.get('download.preallocate', True))
+        
+        self._init_scheduler()
+        return journal
+    
+    def _open_piece_index(self, temp_file: str, reset: bool) -> bool:
+        """
+        打开任务的分片摘要索引（download.integrity.piece_size 为0时不使用）
+        
+        Args:
+            temp_file: 临时文件路径
+            reset: 是否清空已有记录
+        
+        Returns:
+            bool: 是否沿用了与任务匹配的已有记录
+        """
+        self._piece_index = None
+        piece_size = int(self.config.get('download.integrity.piece_size', 1048576))
+        if piece_size <= 0:
+            return False
+        
+        index = PieceIndex(
+            temp_file, self.task.url, self.task.total_size, piece_size,
+            self.config.get('download.integrity.piece_algorithm', 'sha1')
+        )
+        try:
+            indexed = index.open(reset=reset)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"打开分片索引失败: {e}")
+            return False
+        self._piece_index = index
+        return indexed
+    
+    def _init_scheduler(self):
+        """按任务当前的分块初始化进度计数器和分块调度器"""
+        self._counter = ProgressCounter(self._worker_count(), self.task.downloaded_size)
+        self._last_downloaded_size = self.task.downloaded_size
+        self._last_update_time = time.time()
+        
+        min_split_size = self.config.get('download.min_split_size', 1048576)
+        self._scheduler = ChunkScheduler(self.task.chunks, min_split_size)
+    
+    def _worker_count(self) -> int:
+        """
+        分块工作线程数（自适应时为探测的上限）：任务的连接数，不超过 network.connections_per_file
+        和调度器分配的连接数；自适应时还不超过 network.adaptive.max_connections 和每主机的连接上限
+        """
+        workers = max(1, self.task.connections)
+        workers = min(workers, int(self.config.get('network.connections_per_file', 8)))
+        if self.config.get('network.adaptive.enabled', True):
+            workers = min(workers, int(self.config.get('network.adaptive.max_connections', 32)))
+            if self.hosts.max_connections:
+                workers = min(workers, self.hosts.max_connections)
+        if self.max_connections:
+            workers = min(workers, self.max_connections)
+        return max(1, workers)
+    
+    def _complete_chunks(self, journal: ProgressJournal) -> bool:
+        """
+        汇总分块下载结果，未完成时保存进度（含fsync）供下次恢复
+        
+        Returns:
+            bool: 所有分块是否已完成
+        """
+        self.task.downloaded_size = self._counter.total()
+        completed = not self._stop_flag.is_set() and not self._pause_flag.is_set() \
+            and self._all_chunks_done()
+        
+        if not completed:
+            self._save_progress(journal)
+        return completed
+    
+    def _commit_temp_file(self, journal: ProgressJournal):
+        """下载完成后把临时文件重命名为目标文件"""
+        final_file_path = self._final_file_path()
+        if os.path.exists(final_file_path):
+            os.remove(final_file_path)
+        os.rename(self._temp_file_path(), final_file_path)
+        journal.remove()
+        if self._piece_index is not None:
+            self._piece_index.remove()
+    
+    def _final_file_path(self) -> str:
+        """目标文件路径"""
+        return os.path.join(self.task.save_path, self.task.filename)
+    
+    def _temp_file_path(self) -> str:
+        """临时文件路径"""
+        return self._final_file_path() + '.tmp'
+    
+    def _all_chunks_done(self) -> bool:
+        """所有分块是否都已下载完成"""
+        return all(
+            chunk.get('downloaded', 0) >= chunk['end'] - chunk['start'] + 1
+            for chunk in self.task.chunks
+        )
+    
+    def _save_progress(self, journal: ProgressJournal):
+        """写入分块进度日志"""
+        try:
+            chunks = self._scheduler.snapshot() if self._scheduler else self.task.chunks
+            journal.save(self.task.url, self.task.total_size, chunks, data_fd=self._writer.fd)
+        except Exception as e:
+            self.logger.error(f"保存进度失败: {e}")
+    
+    def _chunk_worker(self, slot: int):
+        """
+        分块工作线程：持续领取分块直到没有可下载的区间
+        
+        Args:
+            slot: 该线程独占的进度计数槽位
+        """
+        buffer = self._create_buffer()
+        while not self._stop_flag.is_set() and not self._pause_flag.is_set():
+            if self._tuner is not None and not self._tuner.allows(slot):
+                # 连接数已减少
+                return
+            chunk_index = self._scheduler.next_chunk()
+            if chunk_index is None:
+                return
             
-            response = requests.get(
-                self.task.url,
-                headers=headers,
-                timeout=timeout,
-                stream=True
-            )
+            chunk = self.task.chunks[chunk_index]
+            try:
+                self._download_chunk_with_retry(chunk_index, chunk, slot, buffer)
+            except Exception:
+                self._scheduler.release(chunk_index, failed=True)
+                raise
+            self._scheduler.release(chunk_index)
+    
+    def _download_chunk_with_retry(self, chunk_index: int, chunk: ChunkView, slot: int, buffer: ChunkBuffer):
+        """下载分块，遇到临时错误时退避后从分块当前位置继续"""
+        attempt = 0
+        while True:
+            downloaded = chunk.downloaded
+            try:
+                self._download_chunk(chunk_index, chunk, slot, buffer)
+                return
+            except MirrorSwitch as e:
+                # 换一个镜像立即继续，不计入重试次数
+                if self._pause_flag.is_set():
+                    return
+                self.logger.info(f"分块 {chunk_index} 改从其他镜像下载: {e}")
+                continue
+            except Exception as e:
+                if self._pause_flag.is_set():
+                    # 暂停/停止时的错误无需重试，进度已保存
+                    return
+                # 上次失败后有新数据写入，分块重试次数重新计数
+                attempt = 1 if chunk.downloaded > downloaded else attempt + 1
+                delay = self._retry_delay(e, chunk_index, attempt)
+                if delay is None:
+                    raise
+            
+            # 退避等待期间可被暂停/停止打断
+            if self._pause_flag.wait(delay):
+                return
+    
+    def _retry_delay(self, error: Exception, chunk_index: int, attempt: int) -> Optional[float]:
+        """
+        判断分块是否可以重试
+        
+        Args:
+            error: 分块下载的异常
+            chunk_index: 分块索引
+            attempt: 分块连续失败的次数
+        
+        Returns:
+            Optional[float]: 重试前的等待秒数，不能重试时返回None
+        """
+        if self._tuner is not None and self.retry_policy.is_throttled(error) and self._tuner.throttled():
+            self.logger.warning(f"服务器限制请求，连接数减少为 {self._tuner.limit}: {self.task.filename}")
+        if not self.retry_policy.is_retryable(error) or attempt > self.retry_policy.max_retries:
+            return None
+        if not self._retry_budget.acquire():
+            self.logger.error(f"任务重试次数已用完: {self.task.filename}")
+            return None
+        
+        self.task.increment_retry()
+        delay = self.retry_policy.backoff(attempt, error)
+        self.logger.warning(f"分块 {chunk_index} 下载出错，{delay:.1f} 秒后第 {attempt} 次重试: {error}")
+        return delay
+    
+    def _create_retry_policy(self) -> RetryPolicy:
+        """按配置创建重试策略"""
+        return RetryPolicy.from_config(self.config)
+    
+    def _download_chunk(self, chunk_index: int, chunk: ChunkView, slot: int, buffer: ChunkBuffer):
+        """下载单个分块，有镜像时选择一个镜像并记录其吞吐量和错误"""
+        pool = self.mirror_pool
+        if pool is None:
+            self._download_range(chunk, slot, buffer, self.source_url)
+            return
+        
+        mirror = pool.acquire()
+        began = time.monotonic()
+        downloaded = chunk.downloaded
+        try:
+            self._download_range(chunk, slot, buffer, mirror.url, mirror, began)
+        except Exception as e:
+            self._release_mirror(mirror, chunk.downloaded - downloaded, began, e)
+        else:
+            pool.release(mirror, chunk.downloaded - downloaded, time.monotonic() - began)
+    
+    def _release_mirror(self, mirror: Mirror, received: int, began: float, error: Exception):
+        """
+        请求出错或需要切换镜像时归还镜像并重新抛出异常：镜像本身出错且还有其他可用镜像时
+        改为抛出 MirrorSwitch，由其他镜像立即接着下载
+        """
+        pool = self.mirror_pool
+        elapsed = time.monotonic() - began
+        if isinstance(error, MirrorSwitch) or self._pause_flag.is_set() or not self._is_mirror_error(error):
+            pool.release(mirror, received, elapsed)
+            raise error
+        
+        fatal = not self.retry_policy.is_retryable(error)
+        if pool.release(mirror, received, elapsed, error, fatal):
+            raise MirrorSwitch(f"{mirror.url}: {error}") from error
+        raise error
+    
+    def _is_mirror_error(self, error: Exception) -> bool:
+        """是否是下载源的错误（网络错误和HTTP错误，不包括写入文件等本地错误）"""
+        return isinstance(error, requests.RequestException) or self.retry_policy.is_retryable(error)
+    
+    def _download_range(self, chunk: ChunkView, slot: int, buffer: ChunkBuffer, url: str,
+                        mirror: Optional[Mirror] = None, began: float = 0.0):
+        """
+        从指定下载源下载分块的剩余区间（分块的end可能在下载过程中被调度器缩短），
+        请求前先取得下载源主机的连接名额，等待期间暂停或停止时放弃
+        
+        Args:
+            chunk: 分块
+            slot: 进度计数槽位
+            buffer: 读写缓冲区
+            url: 下载源URL
+            mirror: 使用的镜像，明显慢于其他镜像时抛出 MirrorSwitch
+            began: 请求开始时间（time.monotonic）
+        """
+        host = host_of(url)
+        if not self.hosts.acquire(host, self._pause_flag):
+            return
+        try:
+            self._fetch_range(chunk, slot, buffer, url, mirror, began)
+        finally:
+            self.hosts.release(host)
+    
+    def _fetch_range(self, chunk: ChunkView, slot: int, buffer: ChunkBuffer, url: str,
+                     mirror: Optional[Mirror], began: float):
+        """发送Range请求并把数据写入分块（参数见 _download_range）"""
+        start = chunk.start + chunk.downloaded
+        end = chunk.end
+        
+        if start > end:
+            return
+        
+        timeout = self.config.get('network.timeout', 30)
+        headers = {
+            'User-Agent': 'Mozilla/5.0',
+            'Range': f'bytes={start}-{end}',
+            'Accept-Encoding': 'identity'
+        }
+        
+        response = self.pool.request(
+            'GET',
+            url,
+            headers=headers,
+            timeout=timeout,
+            stream=True
+        )
+        
+        # 网络数据直接读入预分配缓冲区，写满后通过共享写入器按偏移写入
+        # （关闭响应以便连接归还连接池）
+        write_at = self._writer.write_at
+        limiter = self.limiter
+        task_id = self.task.task_id
+        tuner = self._tuner
+        with response:
             response.raise_for_status()
             
-            # 写入文件
-            with open(temp_file, 'r+b') as f:
-                f.seek(start)
-                
-                for data in response.iter_content(chunk_size=8192):
-                    if self._stop_flag.is_set() or self._pause_flag.is_set():
-                        break
+            if response.status_code != 206 and start > 0:
+                raise IOError(f"服务器未按Range返回数据: HTTP {response.status_code}")
+            
+            readinto = self._get_readinto(response)
+            offset = start
+            buffer.begin(offset)
+            
+            try:
+                while True:
+                    # 分块被拆分后只读到新的end为止
+                    limit = chunk.end - offset - buffer.filled + 1
+                    if limiter.enabled:
+                        # 限速时缩小单次读取量，读取后按实际字节数付账（等待时休眠）
+                        count = buffer.read_from(readinto, min(limit, limiter.quantum(task_id))) if limit > 0 else 0
+                        limiter.throttle(task_id, count, self._pause_flag)
+                    else:
+                        count = buffer.read_from(readinto, limit) if limit > 0 else 0
+                    reached_end = count >= limit
+                    # 连接数减少时超出的连接写完缓冲区后交回剩余区间
+                    stopping = self._stop_flag.is_set() or self._pause_flag.is_set() or \
+                        (tuner is not None and not tuner.allows(slot))
                     
-                    if data:
-                        f.write(data)
-                        chunk_size = len(data)
+                    if buffer.is_full or reached_end or stopping or count == 0:
+                        written = buffer.flush_to(write_at, offset, chunk.end - offset + 1)
+                        offset += written
+                        buffer.begin(offset)
                         
-                        # 更新进度
-                        with self._lock:
-                            chunk['downloaded'] = chunk.get('downloaded', 0) + chunk_size
-                            self._downloaded_chunks[chunk_index] = chunk['downloaded']
-                            self._update_progress()
-        
-        except Exception as e:
-            self.logger.error(f"分块 {chunk_index} 下载失败: {e}")
-            raise
+                        # 更新进度（分块只由当前线程写入，计数槽位为线程独占）
+                        chunk.downloaded += written
+                        self._counter.add(slot, written)
+                        
+                        # 缓冲区已写出，可以把剩余区间交给更快的镜像
+                        if mirror is not None and not (reached_end or stopping) and \
+                                self.mirror_pool.should_switch(mirror, offset - start, time.monotonic() - began):
+                            raise MirrorSwitch(f"镜像速度过慢: {mirror.url}")
+                    
+                    if reached_end or stopping:
+                        break
+                    if count == 0:
+                        raise TransientError(f"连接提前关闭，已接收至偏移 {offset}")
+            except Exception as e:
+                if self.retry_policy.is_retryable(e):
+                    # 连接中途断开时保留已读到的数据，重试从这里继续
+                    written = buffer.flush_to(write_at, offset, chunk.end - offset + 1)
+                    chunk.downloaded += written
+                    self._counter.add(slot, written)
+                raise
+            
+            self._release_response(response)
+    
+    def _create_buffer(self) -> ChunkBuffer:
+        """按配置创建工作线程的读写缓冲区"""
+        # 写缓冲区不能超过最小拆分大小，保证拆分点不会落在未写入的缓冲数据之内
+        min_split_size = self.config.get('download.min_split_size', 1048576)
+        write_buffer_size = min(self.config.get('download.write_buffer_size', 1048576), min_split_size)
+        return ChunkBuffer(
+            write_buffer_size=write_buffer_size,
+            read_size=self.config.get('download.read_size', 65536),
+            min_read_size=self.config.get('download.min_read_size', 16384),
+            max_read_size=self.config.get('download.max_read_size', 1048576)
+        )
+    
+    @staticmethod
+    def _get_readinto(response):
+        """获取响应体的readinto方法（优先使用底层http.client响应，避免逐块创建bytes）"""
+        fp = getattr(response.raw, '_fp', None)
+        if fp is not None and hasattr(fp, 'readinto') and not response.headers.get('Content-Encoding'):
+            return fp.readinto
+        return response.raw.readinto
+    
+    @staticmethod
+    def _release_response(response):
+        """响应体已读完时把连接归还连接池"""
+        fp = getattr(response.raw, '_fp', None)
+        if fp is not None and fp.isclosed():
+            response.raw.release_conn()
     
     def _download_single(self):
         """单线程下载（不支持分块）"""
+        host = host_of(self.source_url)
+        if not self.hosts.acquire(host, self._pause_flag):
+            return
         try:
             timeout = self.config.get('network.timeout', 30)
             headers = {'User-Agent': 'Mozilla/5.0'}
             
-            response = requests.get(
-                self.task.url,
+            response = self.pool.request(
+                'GET',
+                self.source_url,
                 headers=headers,
                 timeout=timeout,
                 stream=True
             )
             response.raise_for_status()
             
-            # 写入文件
+            self._counter = ProgressCounter(1)
+            self._last_downloaded_size = 0
+            self._last_update_time = time.time()
+            progress_interval = self.config.get('download.progress_interval', 1.0)
+            
+            # 写入文件，有期望摘要时边写边计算
             final_file_path = os.path.join(self.task.save_path, self.task.filename)
-            with open(final_file_path, 'wb') as f:
-                for data in response.iter_content(chunk_size=8192):
+            read_size = self.config.get('download.read_size', 65536)
+            digest = self._create_digest()
+            with response, open(final_file_path, 'wb') as f:
+                for data in response.iter_content(chunk_size=read_size):
                     if self._stop_flag.is_set() or self._pause_flag.is_set():
                         break
                     
                     if data:
                         f.write(data)
-                        chunk_size = len(data)
+                        if digest is not None:
+                            digest.update(data)
+                        self.limiter.throttle(self.task.task_id, len(data), self._pause_flag)
                         
-                        # 更新进度
-                        with self._lock:
-                            self.task.downloaded_size += chunk_size
+                        # 更新进度（单线程，按时间间隔上报）
+                        self._counter.add(0, len(data))
+                        if time.time() - self._last_update_time >= progress_interval:
                             self._update_progress()
+            
+            self.task.downloaded_size = self._counter.total()
+            if digest is not None:
+                self._digest = digest.hexdigest()
         
         except Exception as e:
             self.logger.error(f"下载失败: {e}")
             raise
+        finally:
+            self.hosts.release(host)
+    
+    def _create_digest(self):
+        """有整个文件的期望摘要时，创建单连接下载边写边计算的hashlib对象"""
+        expected = self.expected_checksum
+        if expected is None or not expected.digest:
+            return None
+        return hashlib.new(expected.algorithm)
     
     def _update_progress(self):
-        """更新下载进度"""
+        """汇总计数器并更新下载进度（由调用方控制上报频率）"""
         current_time = time.time()
         time_diff = current_time - self._last_update_time
         
-        # 每秒更新一次
-        if time_diff >= 1.0:
-            # 计算总已下载大小
-            total_downloaded = sum(self._downloaded_chunks.values())
-            
-            # 计算速度
-            size_diff = total_downloaded - self._last_downloaded_size
-            speed = size_diff / time_diff if time_diff > 0 else 0
-            
-            # 更新任务
-            self.task.update_progress(total_downloaded, speed)
-            
-            # 通知回调
-            self._notify_progress()
-            
-            # 更新统计信息
-            self._last_update_time = current_time
-            self._last_downloaded_size = total_downloaded
+        # 计算总已下载大小
+        total_downloaded = self._counter.total()
+        
+        # 计算速度
+        size_diff = total_downloaded - self._last_downloaded_size
+        speed = size_diff / time_diff if time_diff > 0 else 0
+        
+        # 更新任务
+        self.task.update_progress(total_downloaded, speed)
+        
+        # 通知回调
+        self._notify_progress()
+        
+        # 更新统计信息
+        self._last_update_time = current_time
+        self._last_downloaded_size = total_downloaded
     
     def _notify_progress(self):
         """通知进度更新"""
@@ -273,20 +988,36 @@ class Downloader:
             except Exception as e:
                 self.logger.error(f"进度回调失败: {e}")
     
-    def _load_progress(self, temp_file: str):
-        """加载下载进度"""
+    def _load_progress(self, temp_file: str, journal: ProgressJournal) -> bool:
+        """
+        加载下载进度
+        
+        Returns:
+            bool: 是否找到了有效的进度日志
+        """
+        resumed = False
         try:
-            file_size = os.path.getsize(temp_file)
+            chunks = journal.load(self.task.url, self.task.total_size)
             
-            # 简单实现：假设从头开始
-            # 实际应该保存分块的下载进度
-            self.task.downloaded_size = 0
+            if chunks is not None:
+                # 按进度日志从各分块的断点继续
+                self.task.chunks = chunks
+                resumed = True
+            else:
+                # 没有可信的进度记录，从头下载
+                self.logger.warning(f"未找到有效的进度日志，从头下载: {temp_file}")
+                for chunk in self.task.chunks:
+                    chunk['downloaded'] = 0
             
-            for chunk in self.task.chunks:
-                chunk['downloaded'] = 0
+            self.task.downloaded_size = self.task.chunks.total_downloaded()
+            self.logger.info(f"恢复下载进度: {self.task.downloaded_size}/{self.task.total_size} 字节")
         
         except Exception as e:
             self.logger.error(f"加载进度失败: {e}")
+            for chunk in self.task.chunks:
+                chunk['downloaded'] = 0
+            self.task.downloaded_size = 0
+        return resumed
     
     def _verify_download(self) -> bool:
         """验证下载是否完成"""
@@ -298,12 +1029,44 @@ class Downloader:
             file_size = os.path.getsize(final_file_path)
             
             # 如果知道文件大小，检查是否匹配
-            if self.task.total_size > 0:
-                return file_size == self.task.total_size
+            if self.task.total_size > 0 and file_size != self.task.total_size:
+                return False
             
             # 如果不知道文件大小，只要文件存在就认为成功
-            return file_size > 0
+            if file_size <= 0:
+                return False
+            
+            return self._verify_checksum(final_file_path, file_size)
         
         except Exception as e:
             self.logger.error(f"验证下载失败: {e}")
             return False
+    
+    def _verify_checksum(self, file_path: str, file_size: int) -> bool:
+        """
+        比较下载过程中计算的摘要（分块下载在提交临时文件前已校验）
+        
+        Args:
+            file_path: 下载完成的文件
+            file_size: 文件大小
+        
+        Returns:
+            bool: 没有期望校验和或校验通过时返回True
+        """
+        expected = self.expected_checksum
+        if expected is None or self._verified:
+            return True
+        
+        if expected.digest:
+            if self._digest != expected.digest:
+                self.logger.error(
+                    f"{expected.algorithm} 校验和不一致: {self.task.filename}, {self._digest} != {expected.digest}"
+                )
+                return False
+            return True
+        
+        # 只有分片摘要（单连接下载无法只重新下载损坏的区间）
+        bad = find_bad_pieces(file_path, expected.pieces, file_size)
+        if bad:
+            self.logger.error(f"{len(bad)} 个分片校验失败: {self.task.filename}")
+        return not bad
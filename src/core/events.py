@@ -0,0 +1,51 @@
+"""
+事件模块
+不依赖Qt的简单事件（接口与Qt信号的 connect/disconnect/emit 一致）
+"""
+import threading
+from typing import Callable, List
+
+
+class Event:
+    """事件
+
+    回调在 emit() 的调用线程中同步执行，接口与Qt信号相同，
+    因此无界面的下载引擎和基于Qt的下载管理器可以共用同一套代码。
+    """
+
+    def __init__(self):
+        """初始化事件"""
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable] = []
+
+    def connect(self, callback: Callable):
+        """
+        连接回调
+
+        Args:
+            callback: 回调函数
+        """
+        with self._lock:
+            self._callbacks = self._callbacks + [callback]
+
+    def disconnect(self, callback: Callable):
+        """
+        断开回调
+
+        Args:
+            callback: 回调函数
+        """
+        with self._lock:
+            callbacks = list(self._callbacks)
+            callbacks.remove(callback)
+            self._callbacks = callbacks
+
+    def emit(self, *args):
+        """
+        触发事件，按连接顺序调用回调
+
+        Args:
+            *args: 传给回调的参数
+        """
+        for callback in self._callbacks:
+            callback(*args)
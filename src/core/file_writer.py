@@ -0,0 +1,151 @@
+"""
+任务文件写入模块
+每个任务只打开一次临时文件，所有分块线程按偏移并发写入
+"""
+import errno
+import os
+import threading
+
+from .io_buffer import pwrite_all
+from ..utils.logger import Logger
+
+
+class TaskFileWriter:
+    """任务级共享文件写入器
+
+    文件只打开一次，分块线程通过 write_at() 按偏移写入（支持pwrite的平台
+    无需加锁，也不使用文件的共享读写位置）。新文件优先用 posix_fallocate
+    预分配空间以减少碎片，不支持时退化为稀疏文件。
+
+    同步策略（fsync_policy）：
+        journal  - 仅在写入进度日志时同步（默认）
+        interval - 另外每写入 fsync_interval_mb 兆字节同步一次
+        final    - 只在暂停、停止和完成时同步并写入进度日志
+    """
+
+    POLICIES = ('journal', 'interval', 'final')
+
+    def __init__(self, path: str, fsync_policy: str = 'journal', fsync_interval_mb: int = 64):
+        """
+        初始化写入器
+
+        Args:
+            path: 文件路径
+            fsync_policy: 同步策略
+            fsync_interval_mb: interval策略下的同步间隔（MB）
+        """
+        self.path = path
+        self.fsync_policy = fsync_policy if fsync_policy in self.POLICIES else 'journal'
+        self.fsync_interval = max(1, int(fsync_interval_mb)) * 1024 * 1024
+        self.logger = Logger()
+
+        self._fd = None
+        self._has_pwrite = hasattr(os, 'pwrite')
+        self._write_lock = threading.Lock()  # 仅在不支持pwrite时串行化写入
+        self._sync_lock = threading.Lock()
+        self._unsynced = 0
+
+    @property
+    def fd(self) -> int:
+        """底层文件描述符"""
+        if self._fd is None:
+            raise ValueError(f"文件未打开: {self.path}")
+        return self._fd
+
+    @property
+    def periodic_journal(self) -> bool:
+        """是否需要定期写入进度日志"""
+        return self.fsync_policy != 'final'
+
+    def open(self, size: int, preallocate: bool = True) -> bool:
+        """
+        打开文件并保证其大小为size
+
+        Args:
+            size: 文件目标大小
+            preallocate: 新建文件时是否预分配磁盘空间
+
+        Returns:
+            bool: 文件是否为新建
+        """
+        created = not os.path.exists(self.path)
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+        self._fd = os.open(self.path, flags, 0o644)
+
+        current_size = os.fstat(self._fd).st_size
+        if created and preallocate and size > 0:
+            self._preallocate(size)
+        elif current_size != size:
+            os.ftruncate(self._fd, size)
+
+        return created
+
+    def write_at(self, data, offset: int) -> int:
+        """
+        在指定偏移写入数据（线程安全）
+
+        Args:
+            data: 要写入的数据（bytes/memoryview）
+            offset: 文件偏移
+
+        Returns:
+            int: 写入的字节数
+        """
+        if self._has_pwrite:
+            written = pwrite_all(self.fd, data, offset)
+        else:
+            with self._write_lock:
+                written = pwrite_all(self.fd, data, offset)
+
+        if self.fsync_policy == 'interval':
+            self._maybe_sync(written)
+
+        return written
+
+    def sync(self):
+        """把已写入的数据同步到磁盘"""
+        if self._fd is None:
+            return
+
+        with self._sync_lock:
+            os.fsync(self._fd)
+            self._unsynced = 0
+
+    def close(self, sync: bool = True):
+        """
+        关闭文件
+
+        Args:
+            sync: 关闭前是否同步到磁盘
+        """
+        if self._fd is None:
+            return
+
+        try:
+            if sync:
+                self.sync()
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def _maybe_sync(self, written: int):
+        """interval策略：累计写入量达到阈值时同步"""
+        with self._sync_lock:
+            self._unsynced += written
+            if self._unsynced < self.fsync_interval:
+                return
+            self._unsynced = 0
+        os.fsync(self._fd)
+
+    def _preallocate(self, size: int):
+        """预分配磁盘空间，不支持时退化为稀疏文件"""
+        if hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(self._fd, 0, size)
+                return
+            except OSError as e:
+                if e.errno not in (errno.EOPNOTSUPP, errno.EINVAL, getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP)):
+                    raise
+                self.logger.debug(f"文件系统不支持预分配，使用稀疏文件: {self.path}")
+
+        os.ftruncate(self._fd, size)
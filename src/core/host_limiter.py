@@ -0,0 +1,189 @@
+"""
+主机连接限制模块
+所有任务共用：限制每个主机同时进行的请求数，并让同一主机的请求按最小间隔依次发出，
+避免同一主机的大量任务同时下载时被限流或封禁
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+from ..utils.config import ConfigManager
+
+
+class HostLimiter:
+    """主机连接限制器（线程安全）
+
+    下载器每次发送请求前调用 acquire()（线程）或 reserve()（协程轮询）取得主机的
+    连接名额，请求结束后调用 release() 归还。名额用完时等待其他请求结束；同一主机
+    两次请求开始的间隔不小于 request_interval。任务调度器按同一上限为各主机分配连接，
+    某个主机的名额用完时先启动其他主机的任务，全局连接预算不会闲置。
+    """
+
+    WAIT_SLICE = 0.25  # 等待期间检查中断的间隔（秒）
+
+    def __init__(self, max_connections: int = 0, request_interval: float = 0.0):
+        """
+        初始化主机连接限制器
+
+        Args:
+            max_connections: 每个主机的最大并发连接数，0表示不限制
+            request_interval: 同一主机两次请求开始的最小间隔（秒）
+        """
+        self._condition = threading.Condition()
+        self._active: Dict[str, int] = {}  # host -> 正在进行的请求数
+        self._next_start: Dict[str, float] = {}  # host -> 下一个请求最早的开始时间（time.monotonic）
+        self.max_connections = 0
+        self.request_interval = 0.0
+        self.set_limits(max_connections, request_interval)
+
+    @classmethod
+    def from_config(cls, config: Optional[ConfigManager] = None) -> 'HostLimiter':
+        """
+        根据配置创建主机连接限制器
+
+        Args:
+            config: 配置管理器，为None时读取默认配置
+
+        Returns:
+            HostLimiter: 主机连接限制器实例
+        """
+        limiter = cls()
+        limiter.apply_config(config or ConfigManager())
+        return limiter
+
+    def apply_config(self, config: ConfigManager):
+        """
+        应用配置中的主机限制（设置修改后调用）
+
+        Args:
+            config: 配置管理器
+        """
+        self.set_limits(
+            config.get('network.host.max_connections', 16),
+            config.get('network.host.request_interval', 0.05)
+        )
+
+    def set_limits(self, max_connections: int, request_interval: float):
+        """
+        修改限制，正在等待的请求按新限制重新检查
+
+        Args:
+            max_connections: 每个主机的最大并发连接数，0表示不限制
+            request_interval: 同一主机两次请求开始的最小间隔（秒）
+        """
+        with self._condition:
+            self.max_connections = max(0, int(max_connections or 0))
+            self.request_interval = max(0.0, float(request_interval or 0.0))
+            self._condition.notify_all()
+
+    def available(self, host: str, used: int) -> int:
+        """
+        主机还能分配的连接数
+
+        Args:
+            host: 主机
+            used: 已分配给该主机的连接数
+
+        Returns:
+            int: 剩余连接数，不限制时返回一个足够大的值
+        """
+        if not self.max_connections or not host:
+            return 1 << 30
+        return self.max_connections - used
+
+    def active(self, host: str) -> int:
+        """主机正在进行的请求数"""
+        with self._condition:
+            return self._active.get(host, 0)
+
+    def reserve(self, host: str) -> Optional[float]:
+        """
+        尝试取得主机的连接名额（不等待）
+
+        Args:
+            host: 主机
+
+        Returns:
+            Optional[float]: 取得名额后发送请求前需要等待的秒数；名额已用完时返回None
+        """
+        with self._condition:
+            return self._reserve(host)
+
+    def acquire(self, host: str, interrupt: Optional[threading.Event] = None) -> bool:
+        """
+        取得主机的连接名额，名额用完或未到请求间隔时等待
+
+        Args:
+            host: 主机
+            interrupt: 中断事件（暂停/停止），等待期间被设置时放弃
+
+        Returns:
+            bool: 是否取得名额（被中断时为False）
+        """
+        with self._condition:
+            while True:
+                if interrupt is not None and interrupt.is_set():
+                    return False
+                delay = self._reserve(host)
+                if delay is not None:
+                    break
+                self._condition.wait(self.WAIT_SLICE)
+
+        if delay > 0:
+            if interrupt is None:
+                time.sleep(delay)
+            elif interrupt.wait(delay):
+                self.release(host)
+                return False
+        return True
+
+    def release(self, host: str):
+        """
+        归还主机的连接名额
+
+        Args:
+            host: 主机
+        """
+        with self._condition:
+            count = self._active.get(host, 0) - 1
+            if count > 0:
+                self._active[host] = count
+            else:
+                self._active.pop(host, None)
+                # 主机空闲且已过请求间隔时不再保留其状态
+                if self._next_start.get(host, 0.0) <= time.monotonic():
+                    self._next_start.pop(host, None)
+            self._condition.notify_all()
+
+    def _reserve(self, host: str) -> Optional[float]:
+        """取得名额并安排请求开始时间（调用方需持有锁）"""
+        active = self._active.get(host, 0)
+        if self.max_connections and active >= self.max_connections:
+            return None
+
+        self._active[host] = active + 1
+        now = time.monotonic()
+        start = max(now, self._next_start.get(host, 0.0))
+        if self.request_interval > 0:
+            self._next_start[host] = start + self.request_interval
+        return start - now
+
+
+# 全局主机连接限制器实例
+_limiter_instance: Optional[HostLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_host_limiter() -> HostLimiter:
+    """
+    获取全局主机连接限制器实例（单例模式）
+
+    Returns:
+        HostLimiter: 主机连接限制器实例
+    """
+    global _limiter_instance
+    if _limiter_instance is None:
+        with _limiter_lock:
+            if _limiter_instance is None:
+                _limiter_instance = HostLimiter.from_config()
+    return _limiter_instance
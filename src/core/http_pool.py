@@ -0,0 +1,231 @@
+"""
+HTTP连接池模块
+为所有下载器提供进程级共享、按主机划分的持久连接会话
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..utils.config import ConfigManager
+
+
+class _HostSession:
+    """单个主机的会话及其使用信息"""
+
+    def __init__(self, session: requests.Session):
+        self.session = session
+        self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """按主机划分的HTTP会话池
+
+    同一主机的所有请求（包括同一任务的各个分块、不同任务之间）复用同一个
+    requests.Session，从而复用底层TCP/TLS连接，避免每个分块重复握手。
+    """
+
+    def __init__(self, max_connections_per_host: int = 32, max_hosts: int = 64,
+                 keepalive_timeout: float = 60.0):
+        """
+        初始化连接池
+
+        Args:
+            max_connections_per_host: 每个主机保留的最大空闲连接数
+            max_hosts: 最多同时保留会话的主机数量，超出时淘汰最久未使用的主机
+            keepalive_timeout: 会话空闲超过该秒数后关闭，避免复用已被服务器断开的连接
+        """
+        self.max_connections_per_host = max(1, int(max_connections_per_host))
+        self.max_hosts = max(1, int(max_hosts))
+        self.keepalive_timeout = float(keepalive_timeout)
+
+        self._sessions: 'OrderedDict[str, _HostSession]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 已关闭会话的累计统计
+        self._retired_requests = 0
+        self._retired_connections = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[ConfigManager] = None) -> 'ConnectionPool':
+        """
+        根据配置创建连接池
+
+        Args:
+            config: 配置管理器，为None时读取默认配置
+
+        Returns:
+            ConnectionPool: 连接池实例
+        """
+        config = config or ConfigManager()
+        return cls(
+            max_connections_per_host=config.get('network.pool.max_connections_per_host', 32),
+            max_hosts=config.get('network.pool.max_hosts', 64),
+            keepalive_timeout=config.get('network.pool.keepalive_timeout', 60)
+        )
+
+    def get_session(self, url: str) -> requests.Session:
+        """
+        获取URL所属主机的会话
+
+        Args:
+            url: 请求URL
+
+        Returns:
+            requests.Session: 该主机共享的会话
+        """
+        key = self._host_key(url)
+        now = time.monotonic()
+
+        with self._lock:
+            self._expire_idle(now)
+
+            host_session = self._sessions.get(key)
+            if host_session is None:
+                host_session = _HostSession(self._create_session())
+                self._sessions[key] = host_session
+
+                # 超出主机数量上限时淘汰最久未使用的会话
+                while len(self._sessions) > self.max_hosts:
+                    _, evicted = self._sessions.popitem(last=False)
+                    self._retire(evicted)
+            else:
+                self._sessions.move_to_end(key)
+
+            host_session.last_used = now
+            return host_session.session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        通过共享会话发送请求
+
+        Args:
+            method: HTTP方法
+            url: 请求URL
+            **kwargs: 透传给requests的参数
+
+        Returns:
+            requests.Response: 响应对象
+        """
+        return self.get_session(url).request(method, url, **kwargs)
+
+    def get_stats(self) -> dict:
+        """
+        获取连接复用统计
+
+        Returns:
+            dict: 包含hosts、requests、connections、reused键的统计信息
+        """
+        with self._lock:
+            requests_count = self._retired_requests
+            connections_count = self._retired_connections
+            for host_session in self._sessions.values():
+                session_requests, session_connections = self._session_counters(host_session.session)
+                requests_count += session_requests
+                connections_count += session_connections
+            hosts = len(self._sessions)
+
+        return {
+            'hosts': hosts,
+            'requests': requests_count,
+            'connections': connections_count,
+            'reused': max(0, requests_count - connections_count)
+        }
+
+    def close(self):
+        """关闭所有会话"""
+        with self._lock:
+            while self._sessions:
+                _, host_session = self._sessions.popitem(last=False)
+                self._retire(host_session)
+
+    def _create_session(self) -> requests.Session:
+        """创建配置好连接池大小的会话"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.max_connections_per_host,
+            pool_block=False
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _expire_idle(self, now: float):
+        """关闭空闲超时的会话（调用方需持有锁）"""
+        if self.keepalive_timeout <= 0:
+            return
+
+        expired = [
+            key for key, host_session in self._sessions.items()
+            if now - host_session.last_used > self.keepalive_timeout
+        ]
+        for key in expired:
+            self._retire(self._sessions.pop(key))
+
+    def _retire(self, host_session: _HostSession):
+        """累计统计并关闭会话（调用方需持有锁）"""
+        session_requests, session_connections = self._session_counters(host_session.session)
+        self._retired_requests += session_requests
+        self._retired_connections += session_connections
+        host_session.session.close()
+
+    @staticmethod
+    def _session_counters(session: requests.Session) -> tuple:
+        """
+        读取会话底层urllib3连接池的请求数和新建连接数
+
+        Returns:
+            tuple: (请求数, 新建连接数)
+        """
+        requests_count = 0
+        connections_count = 0
+        seen = set()
+
+        for adapter in session.adapters.values():
+            if id(adapter) in seen:
+                continue
+            seen.add(id(adapter))
+
+            pools = getattr(getattr(adapter, 'poolmanager', None), 'pools', None)
+            if pools is None:
+                continue
+
+            for pool_key in list(pools.keys()):
+                pool = pools.get(pool_key)
+                if pool is None:
+                    continue
+                requests_count += getattr(pool, 'num_requests', 0)
+                connections_count += getattr(pool, 'num_connections', 0)
+
+        return requests_count, connections_count
+
+    @staticmethod
+    def _host_key(url: str) -> str:
+        """获取URL的主机键（协议+主机+端口）"""
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+
+# 全局连接池实例
+_pool_instance: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_connection_pool() -> ConnectionPool:
+    """
+    获取全局连接池实例（单例模式）
+
+    Returns:
+        ConnectionPool: 连接池实例
+    """
+    global _pool_instance
+    if _pool_instance is None:
+        with _pool_lock:
+            if _pool_instance is None:
+                _pool_instance = ConnectionPool.from_config()
+    return _pool_instance
@@ -0,0 +1,367 @@
+"""
+完整性校验模块
+解析任务的期望校验和（直接给出的摘要、.sha256 等校验文件或 Metalink），下载时增量计算
+摘要，并按分片校验已下载的文件以便只重新下载损坏的区间
+"""
+import hashlib
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from .http_pool import ConnectionPool, get_connection_pool
+from .piece_index import hash_pieces, piece_count
+
+
+# 支持的摘要算法：规范名 -> 十六进制摘要长度
+HASH_ALGORITHMS = {'md5': 32, 'sha1': 40, 'sha256': 64}
+
+# 校验文件扩展名 -> 算法
+SIDECAR_SUFFIXES = {'.md5': 'md5', '.sha1': 'sha1', '.sha256': 'sha256'}
+
+# Metalink 校验文件扩展名
+METALINK_SUFFIXES = ('.meta4', '.metalink')
+
+# 每次读取文件计算摘要的字节数
+HASH_READ_SIZE = 4 * 1048576
+
+
+class ChecksumError(IOError):
+    """下载的文件与期望的校验和不一致"""
+
+
+def normalize_algorithm(name: str) -> str:
+    """
+    规范化算法名（SHA-256、sha_256 等都转为 sha256）
+
+    Raises:
+        ValueError: 不支持的算法
+    """
+    algorithm = re.sub(r'[-_]', '', name.strip().lower())
+    if algorithm not in HASH_ALGORITHMS:
+        raise ValueError(f"不支持的校验算法: {name}")
+    return algorithm
+
+
+@dataclass(frozen=True)
+class PieceHashes:
+    """分片摘要：文件按固定大小分片，每片一个摘要"""
+    algorithm: str
+    piece_size: int
+    hashes: Tuple[str, ...]
+
+    def piece_range(self, index: int, total_size: int) -> Tuple[int, int]:
+        """分片的字节范围 (start, end)，end 包含在内"""
+        start = index * self.piece_size
+        return start, min(start + self.piece_size, total_size) - 1
+
+
+@dataclass(frozen=True)
+class Checksum:
+    """期望的校验和"""
+    algorithm: str  # 规范算法名
+    digest: str  # 整个文件的十六进制摘要（小写），只有分片摘要时为空
+    pieces: Optional[PieceHashes] = None
+
+
+def parse_checksum(spec: str) -> Tuple[str, str]:
+    """
+    解析任务的校验和参数
+
+    支持 "sha256:十六进制摘要"、"sha256:校验文件URL"，以及只给出校验文件URL
+    （算法由 .md5/.sha1/.sha256 扩展名决定，Metalink 文件自带算法）。
+
+    Args:
+        spec: 校验和参数
+
+    Returns:
+        Tuple[str, str]: (算法，未知时为空字符串; 摘要或校验文件URL)
+
+    Raises:
+        ValueError: 格式错误
+    """
+    spec = spec.strip()
+    if re.match(r'^https?://', spec, re.IGNORECASE):
+        suffix = os.path.splitext(urlsplit(spec).path)[1].lower()
+        if suffix in SIDECAR_SUFFIXES:
+            return SIDECAR_SUFFIXES[suffix], spec
+        if suffix in METALINK_SUFFIXES:
+            return '', spec
+        raise ValueError(f"无法从校验文件扩展名判断算法: {spec}")
+
+    if ':' not in spec:
+        raise ValueError(f"校验和格式应为 算法:摘要 或 算法:URL: {spec}")
+    name, value = spec.split(':', 1)
+    algorithm = normalize_algorithm(name)
+    value = value.strip()
+    if not re.match(r'^https?://', value, re.IGNORECASE):
+        value = value.lower()
+        if len(value) != HASH_ALGORITHMS[algorithm] or not re.fullmatch(r'[0-9a-f]+', value):
+            raise ValueError(f"{algorithm} 摘要格式错误: {value}")
+    return algorithm, value
+
+
+def parse_checksum_file(text: str, algorithm: str, filename: str) -> str:
+    """
+    从校验文件内容中找出文件的摘要
+
+    支持 sha256sum 格式（"摘要  文件名"、"摘要 *文件名"）、BSD 格式
+    （"SHA256 (文件名) = 摘要"）和只有摘要的文件。有多行时优先选择文件名匹配的一行。
+
+    Args:
+        text: 校验文件内容
+        algorithm: 规范算法名
+        filename: 下载的文件名
+
+    Returns:
+        str: 十六进制摘要
+
+    Raises:
+        ValueError: 找不到摘要
+    """
+    length = HASH_ALGORITHMS[algorithm]
+    entries: List[Tuple[str, str]] = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        match = re.fullmatch(r'\w+ \((.+)\) = ([0-9a-fA-F]+)', line)
+        if match:
+            entries.append((match.group(2).lower(), match.group(1)))
+            continue
+        parts = line.split(None, 1)
+        entries.append((parts[0].lower(), parts[1].lstrip('*').strip() if len(parts) > 1 else ''))
+
+    entries = [(digest, name) for digest, name in entries
+               if len(digest) == length and re.fullmatch(r'[0-9a-f]+', digest)]
+    for digest, name in entries:
+        if name and os.path.basename(name) == filename:
+            return digest
+    if len(entries) == 1 or (entries and not any(name for _, name in entries)):
+        return entries[0][0]
+    raise ValueError(f"校验文件中没有 {filename} 的 {algorithm} 摘要")
+
+
+def parse_metalink(text: str, filename: str) -> Checksum:
+    """
+    从 Metalink（RFC 5854 的 .meta4 或 3.0 版的 .metalink）中读取文件摘要和分片摘要
+
+    Args:
+        text: Metalink 内容
+        filename: 下载的文件名（有多个文件时按名称选择）
+
+    Returns:
+        Checksum: 期望的校验和（选择支持的最强算法）
+
+    Raises:
+        ValueError: 找不到可用的摘要
+    """
+    root = ET.fromstring(text)
+    files = [element for element in root.iter() if _local_name(element) == 'file']
+    if not files:
+        raise ValueError("Metalink 中没有文件")
+    chosen = next((f for f in files if os.path.basename(f.get('name', '')) == filename), files[0])
+
+    # <pieces> 下的 <hash> 是分片摘要，其余 <hash> 是整个文件的摘要
+    pieces = {}
+    piece_elements = set()
+    for element in chosen.iter():
+        if _local_name(element) != 'pieces':
+            continue
+        children = [h for h in element if _local_name(h) == 'hash']
+        piece_elements.update(id(h) for h in children)
+        try:
+            algorithm = normalize_algorithm(element.get('type', ''))
+        except ValueError:
+            continue
+        hashes = tuple((h.text or '').strip().lower() for h in children)
+        if hashes:
+            pieces[algorithm] = PieceHashes(algorithm, int(element.get('length')), hashes)
+
+    digests = {}
+    for element in chosen.iter():
+        if _local_name(element) == 'hash' and id(element) not in piece_elements and element.text:
+            try:
+                digests[normalize_algorithm(element.get('type', ''))] = element.text.strip().lower()
+            except ValueError:
+                continue
+
+    for algorithm in ('sha256', 'sha1', 'md5'):
+        if algorithm in digests or algorithm in pieces:
+            return Checksum(algorithm, digests.get(algorithm, ''), pieces.get(algorithm))
+    raise ValueError("Metalink 中没有支持的摘要")
+
+
+def _local_name(element) -> str:
+    """去掉命名空间的标签名"""
+    return element.tag.rsplit('}', 1)[-1]
+
+
+def resolve_checksum(spec: str, filename: str, pool: Optional[ConnectionPool] = None,
+                     timeout: float = 30) -> Checksum:
+    """
+    解析校验和参数，需要时下载校验文件
+
+    Args:
+        spec: 任务的校验和参数
+        filename: 下载的文件名
+        pool: 连接池，为None时使用全局连接池
+        timeout: 超时时间（秒）
+
+    Returns:
+        Checksum: 期望的校验和
+
+    Raises:
+        ValueError: 格式错误或校验文件中没有摘要
+        requests.RequestException: 下载校验文件失败
+    """
+    algorithm, value = parse_checksum(spec)
+    if not re.match(r'^https?://', value, re.IGNORECASE):
+        return Checksum(algorithm, value)
+
+    pool = pool or get_connection_pool()
+    response = pool.request('GET', value, headers={'User-Agent': 'Mozilla/5.0'}, timeout=timeout)
+    with response:
+        response.raise_for_status()
+        text = response.content.decode('utf-8', errors='replace')
+
+    if not algorithm or text.lstrip().startswith('<'):
+        return parse_metalink(text, filename)
+    return Checksum(algorithm, parse_checksum_file(text, algorithm, unquote(filename)))
+
+
+class PrefixHasher:
+    """已写入前缀的增量摘要
+
+    分块下载时文件的各部分并不按顺序写入，后台线程定期从文件中读取
+    [已计算位置, 已连续写入位置) 的数据更新摘要。刚写入的数据通常还在页缓存中，
+    下载结束时只需补算剩余的一小段，不必再完整读取一遍文件。
+    """
+
+    def __init__(self, algorithm: str, path: str, frontier: Callable[[], int],
+                 interval: float = 0.5):
+        """
+        初始化增量摘要
+
+        Args:
+            algorithm: 规范算法名
+            path: 临时文件路径（单独打开一个只读句柄）
+            frontier: 返回已连续写入到的位置（此前的字节都已写入文件且不会再修改）
+            interval: 后台线程检查的间隔（秒）
+        """
+        self.algorithm = algorithm
+        self.path = path
+        self.frontier = frontier
+        self.interval = interval
+        self.position = 0
+
+        self._hash = hashlib.new(algorithm)
+        self._file = None
+        self._error: Optional[BaseException] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动后台线程"""
+        if self._file is None:
+            self._file = open(self.path, 'rb')
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="PrefixHasher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台线程"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """停止后台线程并关闭文件"""
+        self.stop()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def reset(self):
+        """从头重新计算（如修复了已计算过的区间）"""
+        self._hash = hashlib.new(self.algorithm)
+        self.position = 0
+
+    def finish(self, total_size: int) -> str:
+        """
+        停止后台线程，补算剩余部分
+
+        Args:
+            total_size: 文件大小
+
+        Returns:
+            str: 整个文件的十六进制摘要
+        """
+        self.stop()
+        if self._error is not None:
+            raise self._error
+        self._advance(total_size)
+        return self._hash.hexdigest()
+
+    def _run(self):
+        """后台线程：跟随已写入的位置计算摘要（出错时停止，由 finish() 抛出）"""
+        try:
+            while not self._stopped.wait(self.interval):
+                self._advance(self.frontier())
+        except Exception as e:
+            self._error = e
+
+    def _advance(self, end: int):
+        """读取并计算 [position, end) 的摘要"""
+        self._file.seek(self.position)
+        while self.position < end:
+            data = self._file.read(min(HASH_READ_SIZE, end - self.position))
+            if not data:
+                raise ChecksumError(f"读取文件失败，位置 {self.position}")
+            self._hash.update(data)
+            self.position += len(data)
+
+
+def find_bad_pieces(path: str, pieces: PieceHashes, total_size: int,
+                    workers: Optional[int] = None) -> List[int]:
+    """
+    并行校验文件的各个分片（见 piece_index.hash_pieces）
+
+    Args:
+        path: 文件路径
+        pieces: 分片摘要
+        total_size: 文件大小
+        workers: 线程数，为None时使用CPU核数
+
+    Returns:
+        List[int]: 摘要不一致的分片索引（按顺序）
+    """
+    count = piece_count(total_size, pieces.piece_size)
+    digests = hash_pieces(path, range(min(count, len(pieces.hashes))), pieces.piece_size,
+                          total_size, pieces.algorithm, workers)
+    return [
+        index for index in range(count)
+        if index >= len(pieces.hashes) or index not in digests or digests[index].hex() != pieces.hashes[index]
+    ]
+
+
+def hash_file(path: str, algorithm: str) -> str:
+    """
+    计算整个文件的摘要
+
+    Args:
+        path: 文件路径
+        algorithm: 规范算法名
+
+    Returns:
+        str: 十六进制摘要
+    """
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for data in iter(lambda: f.read(HASH_READ_SIZE), b''):
+            digest.update(data)
+    return digest.hexdigest()
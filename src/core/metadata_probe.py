@@ -0,0 +1,286 @@
+"""
+元数据探测模块
+并发获取下载链接的文件信息（大小、是否支持Range、ETag等），结果按TTL缓存，
+下载器开始或恢复下载时直接使用缓存，不必在下载线程中先等待一次HEAD请求
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from ..utils.config import ConfigManager
+from ..utils.helpers import get_filename_from_headers
+from .http_pool import ConnectionPool, get_connection_pool
+
+
+@dataclass(frozen=True)
+class FileMetadata:
+    """下载链接的文件信息"""
+    url: str  # 请求的URL
+    final_url: str  # 重定向后的URL
+    size: int = 0  # 文件大小，未知时为0
+    accept_ranges: bool = False  # 是否支持Range请求
+    etag: str = ''
+    last_modified: str = ''
+    filename: str = ''  # Content-Disposition 中的文件名
+
+    @classmethod
+    def from_response(cls, url: str, final_url: str, status_code: int, headers) -> 'FileMetadata':
+        """
+        从HEAD响应或 Range: bytes=0-0 的GET响应中提取文件信息
+
+        Args:
+            url: 请求的URL
+            final_url: 重定向后的URL
+            status_code: HTTP状态码
+            headers: 响应头
+
+        Returns:
+            FileMetadata: 文件信息
+        """
+        size = 0
+        content_range = headers.get('Content-Range', '')
+        if status_code == 206 and '/' in content_range:
+            # bytes 0-0/12345
+            total = content_range.rsplit('/', 1)[1].strip()
+            size = int(total) if total.isdigit() else 0
+        elif status_code != 206:
+            size = int(headers.get('Content-Length') or 0)
+
+        return cls(
+            url=url,
+            final_url=final_url or url,
+            size=size,
+            accept_ranges=status_code == 206 or headers.get('Accept-Ranges', 'none').lower() == 'bytes',
+            etag=headers.get('ETag', ''),
+            last_modified=headers.get('Last-Modified', ''),
+            filename=get_filename_from_headers(headers)
+        )
+
+
+def probe_metadata(url: str, pool: Optional[ConnectionPool] = None,
+                   timeout: float = 30) -> FileMetadata:
+    """
+    获取文件信息：先发送HEAD请求，失败或没有返回大小时改用 Range: bytes=0-0 的GET请求
+
+    Args:
+        url: 下载链接
+        pool: 连接池，为None时使用全局连接池
+        timeout: 超时时间（秒）
+
+    Returns:
+        FileMetadata: 文件信息
+
+    Raises:
+        requests.RequestException: 请求失败
+    """
+    pool = pool or get_connection_pool()
+    headers = {'User-Agent': 'Mozilla/5.0', 'Accept-Encoding': 'identity'}
+
+    try:
+        response = pool.request('HEAD', url, headers=headers, timeout=timeout, allow_redirects=True)
+        with response:
+            if response.status_code < 400 and response.headers.get('Content-Length'):
+                return FileMetadata.from_response(url, response.url, response.status_code, response.headers)
+    except Exception:
+        # 有些服务器不支持HEAD，改用GET
+        pass
+
+    headers['Range'] = 'bytes=0-0'
+    response = pool.request('GET', url, headers=headers, timeout=timeout,
+                            allow_redirects=True, stream=True)
+    with response:
+        response.raise_for_status()
+        return FileMetadata.from_response(url, response.url, response.status_code, response.headers)
+
+
+class MetadataProber:
+    """元数据探测器（线程安全）
+
+    prefetch() 在后台线程池中探测，fetch() 优先使用缓存，其次等待正在进行的同一URL
+    的探测，都没有时在调用线程中探测。同一URL同时只有一个请求，成功的结果按
+    network.probe.cache_ttl 缓存，条目数超过 network.probe.cache_size 时淘汰最久未用的。
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: Optional[int] = None,
+                 workers: Optional[int] = None, pool: Optional[ConnectionPool] = None):
+        """
+        初始化元数据探测器
+
+        Args:
+            ttl: 缓存有效期（秒），为None时使用配置值
+            max_entries: 最多缓存的条目数，为None时使用配置值
+            workers: 后台探测线程数，为None时使用配置值
+            pool: 连接池，为None时使用全局连接池
+        """
+        self.config = ConfigManager()
+        self.ttl = float(ttl if ttl is not None else self.config.get('network.probe.cache_ttl', 300))
+        self.max_entries = max(1, int(
+            max_entries if max_entries is not None else self.config.get('network.probe.cache_size', 4096)
+        ))
+        self.workers = max(1, int(workers if workers is not None else self.config.get('network.probe.workers', 8)))
+        self.pool = pool
+
+        self._lock = threading.Lock()
+        self._cache: 'OrderedDict[str, Tuple[float, FileMetadata]]' = OrderedDict()  # url -> (过期时间, 信息)
+        self._inflight: Dict[str, Future] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # 统计
+        self.hits = 0
+        self.misses = 0
+
+    def get_cached(self, url: str) -> Optional[FileMetadata]:
+        """
+        获取未过期的缓存
+
+        Args:
+            url: 下载链接
+
+        Returns:
+            Optional[FileMetadata]: 文件信息，没有缓存或已过期时返回None
+        """
+        with self._lock:
+            return self._lookup(url)
+
+    def put(self, metadata: FileMetadata):
+        """
+        写入缓存（如异步下载器自己探测到的结果）
+
+        Args:
+            metadata: 文件信息
+        """
+        with self._lock:
+            self._store(metadata)
+
+    def invalidate(self, url: str):
+        """
+        删除缓存（如下载时发现文件已变化）
+
+        Args:
+            url: 下载链接
+        """
+        with self._lock:
+            self._cache.pop(url, None)
+
+    def prefetch(self, url: str) -> Future:
+        """
+        在后台探测（已有缓存或正在探测时不重复请求）
+
+        Args:
+            url: 下载链接
+
+        Returns:
+            Future: 探测结果
+        """
+        future, owner = self._claim(url)
+        if owner:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="Probe")
+                executor = self._executor
+            executor.submit(self._run, url, future)
+        return future
+
+    def fetch(self, url: str) -> FileMetadata:
+        """
+        获取文件信息：使用缓存、等待正在进行的探测，或在当前线程中探测
+
+        Args:
+            url: 下载链接
+
+        Returns:
+            FileMetadata: 文件信息
+
+        Raises:
+            requests.RequestException: 请求失败
+        """
+        future, owner = self._claim(url)
+        if owner:
+            self._run(url, future)
+        return future.result()
+
+    def close(self):
+        """停止后台探测并清空缓存"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._cache.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _claim(self, url: str) -> Tuple[Future, bool]:
+        """取得URL的探测结果：(Future, 是否需要由调用方执行探测)"""
+        with self._lock:
+            metadata = self._lookup(url)
+            if metadata is not None:
+                self.hits += 1
+                future = Future()
+                future.set_result(metadata)
+                return future, False
+
+            future = self._inflight.get(url)
+            if future is not None:
+                return future, False
+
+            self.misses += 1
+            future = Future()
+            self._inflight[url] = future
+            return future, True
+
+    def _run(self, url: str, future: Future):
+        """执行探测并写入缓存"""
+        try:
+            metadata = probe_metadata(url, self.pool, self.config.get('network.timeout', 30))
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(url, None)
+            future.set_exception(e)
+            return
+
+        with self._lock:
+            self._inflight.pop(url, None)
+            self._store(metadata)
+        future.set_result(metadata)
+
+    def _lookup(self, url: str) -> Optional[FileMetadata]:
+        """查找未过期的缓存（调用方需持有锁）"""
+        entry = self._cache.get(url)
+        if entry is None:
+            return None
+        expires, metadata = entry
+        if time.monotonic() >= expires:
+            del self._cache[url]
+            return None
+        self._cache.move_to_end(url)
+        return metadata
+
+    def _store(self, metadata: FileMetadata):
+        """写入缓存并淘汰多余条目（调用方需持有锁）"""
+        if self.ttl <= 0:
+            return
+        self._cache[metadata.url] = (time.monotonic() + self.ttl, metadata)
+        self._cache.move_to_end(metadata.url)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+
+# 全局元数据探测器实例
+_prober_instance: Optional[MetadataProber] = None
+_prober_lock = threading.Lock()
+
+
+def get_metadata_prober() -> MetadataProber:
+    """
+    获取全局元数据探测器实例（单例模式）
+
+    Returns:
+        MetadataProber: 元数据探测器实例
+    """
+    global _prober_instance
+    if _prober_instance is None:
+        with _prober_lock:
+            if _prober_instance is None:
+                _prober_instance = MetadataProber()
+    return _prober_instance
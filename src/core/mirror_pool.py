@@ -0,0 +1,212 @@
+"""
+镜像调度模块
+多镜像分块下载时为每个请求选择镜像：按实测吞吐量和错误率评分，
+把区间从慢速或出错的镜像转移到其他镜像
+"""
+import threading
+import time
+from typing import List, Optional
+
+from ..utils.config import ConfigManager
+from .metadata_probe import FileMetadata
+
+
+class MirrorSwitch(Exception):
+    """当前镜像明显慢于其他镜像或已不可用，分块剩余区间改从其他镜像下载（不计入重试）"""
+
+
+def check_mirror(primary: FileMetadata, mirror: FileMetadata) -> str:
+    """
+    检查镜像与主链接是否为同一文件，只有一致时才能混用两者的数据
+
+    Args:
+        primary: 主链接的文件信息
+        mirror: 镜像的文件信息
+
+    Returns:
+        str: 不一致的原因，一致时为空字符串
+    """
+    if not mirror.accept_ranges:
+        return "不支持Range请求"
+    if mirror.size != primary.size:
+        return f"文件大小不一致（{mirror.size} != {primary.size}）"
+    # 弱ETag（W/前缀）只表示语义相同，不能保证字节一致
+    if primary.etag and mirror.etag and \
+            not primary.etag.startswith('W/') and not mirror.etag.startswith('W/') and \
+            primary.etag != mirror.etag:
+        return f"ETag不一致（{mirror.etag} != {primary.etag}）"
+    return ""
+
+
+class Mirror:
+    """镜像状态"""
+
+    __slots__ = ('url', 'speed', 'error_rate', 'active', 'requests', 'failures',
+                 'downloaded', 'disabled_until', 'dropped')
+
+    def __init__(self, url: str):
+        self.url = url
+        self.speed = 0.0  # 单连接吞吐量的指数滑动平均（字节/秒），0表示尚未测量
+        self.error_rate = 0.0  # 请求出错率的指数滑动平均
+        self.active = 0  # 正在进行的请求数
+        self.requests = 0  # 已结束的请求数
+        self.failures = 0  # 连续失败次数
+        self.downloaded = 0  # 从该镜像下载的字节数
+        self.disabled_until = 0.0  # 出错后暂停使用到此时刻（time.monotonic）
+        self.dropped = False  # 是否已停用（不可恢复的错误）
+
+    def usable(self, now: float) -> bool:
+        """当前是否可以分配请求"""
+        return not self.dropped and now >= self.disabled_until
+
+
+class MirrorPool:
+    """镜像池（线程安全）
+
+    acquire() 选择评分最高的镜像：评分为单连接吞吐量 × (1 - 错误率) / (1 + 正在进行的请求数)，
+    尚未测量过的镜像优先尝试，因此各镜像都会先分到区间，之后按实测结果分配。
+    请求出错的镜像暂停使用一段时间（连续出错时加倍），不可重试的错误直接停用该镜像，
+    但至少保留一个镜像。下载过程中通过 should_switch() 判断当前镜像是否明显慢于其他镜像，
+    是则由下载器把剩余区间交给其他镜像。
+    """
+
+    # 请求持续时间短于 MIN_SAMPLE_TIME 秒且数据少于 MIN_SAMPLE_BYTES 时不计入吞吐量，
+    # 避免连接建立时间造成偏差
+    MIN_SAMPLE_TIME = 0.5
+    MIN_SAMPLE_BYTES = 1048576
+
+    def __init__(self, urls: List[str], config: Optional[ConfigManager] = None):
+        """
+        初始化镜像池
+
+        Args:
+            urls: 镜像URL列表（第一个为主链接）
+            config: 配置管理器，为None时读取默认配置
+        """
+        config = config or ConfigManager()
+        self.slow_ratio = float(config.get('download.mirrors.slow_ratio', 3.0))
+        self.switch_after = float(config.get('download.mirrors.switch_after', 3.0))
+        self.cooldown = float(config.get('download.mirrors.cooldown', 5.0))
+        self.max_cooldown = float(config.get('download.mirrors.max_cooldown', 60.0))
+        self.smoothing = float(config.get('download.mirrors.smoothing', 0.3))
+
+        self._lock = threading.Lock()
+        self.mirrors = [Mirror(url) for url in dict.fromkeys(urls)]
+
+    def __len__(self) -> int:
+        return len(self.mirrors)
+
+    def acquire(self) -> Mirror:
+        """
+        选择镜像并记为正在使用，请求结束后必须调用 release()
+
+        Returns:
+            Mirror: 选中的镜像（全部暂停使用时返回最早恢复的镜像）
+        """
+        with self._lock:
+            now = time.monotonic()
+            candidates = [m for m in self.mirrors if m.usable(now)]
+            if candidates:
+                best_speed = max(m.speed for m in candidates)
+                mirror = max(candidates, key=lambda m: self._score(m, best_speed))
+            else:
+                mirror = min((m for m in self.mirrors if not m.dropped), key=lambda m: m.disabled_until)
+            mirror.active += 1
+            return mirror
+
+    def release(self, mirror: Mirror, received: int, elapsed: float,
+                error: Optional[BaseException] = None, fatal: bool = False) -> bool:
+        """
+        请求结束，记录吞吐量和错误
+
+        Args:
+            mirror: acquire() 返回的镜像
+            received: 本次请求写入的字节数
+            elapsed: 本次请求的持续时间（秒）
+            error: 请求出错时的异常（切换镜像不算出错）
+            fatal: 错误是否不可重试（如HTTP 404），是则停用该镜像
+
+        Returns:
+            bool: 出错后是否还有其他可用的镜像（有则可以立即改用其他镜像重试）
+        """
+        with self._lock:
+            now = time.monotonic()
+            mirror.active -= 1
+            mirror.requests += 1
+            mirror.downloaded += received
+            if received > 0 and elapsed > 0 and \
+                    (elapsed >= self.MIN_SAMPLE_TIME or received >= self.MIN_SAMPLE_BYTES):
+                self._record_speed(mirror, received / elapsed)
+
+            failed = 1.0 if error is not None else 0.0
+            mirror.error_rate += self.smoothing * (failed - mirror.error_rate)
+            if error is None:
+                mirror.failures = 0
+                return False
+
+            mirror.failures += 1
+            others = [m for m in self.mirrors if m is not mirror and m.usable(now)]
+            if fatal and others:
+                mirror.dropped = True
+            else:
+                mirror.disabled_until = now + min(
+                    self.max_cooldown, self.cooldown * 2 ** (mirror.failures - 1)
+                )
+            return bool(others)
+
+    def should_switch(self, mirror: Mirror, received: int, elapsed: float) -> bool:
+        """
+        当前请求是否应该改从其他镜像下载
+
+        Args:
+            mirror: 正在使用的镜像
+            received: 本次请求已写入的字节数
+            elapsed: 本次请求已持续的时间（秒）
+
+        Returns:
+            bool: 其他可用镜像的评分超过当前吞吐量的 slow_ratio 倍时返回True
+        """
+        if elapsed < self.switch_after or len(self.mirrors) < 2:
+            return False
+
+        current = received / elapsed
+        with self._lock:
+            now = time.monotonic()
+            others = [m for m in self.mirrors if m is not mirror and m.usable(now) and m.speed > 0]
+            if not others:
+                return False
+            best = max(self._score(m, 0.0) for m in others)
+            if best <= current * self.slow_ratio:
+                return False
+            # 记下当前的慢速，之后的选择会避开该镜像
+            self._record_speed(mirror, current)
+            return True
+
+    def snapshot(self) -> List[dict]:
+        """
+        获取各镜像的统计信息
+
+        Returns:
+            List[dict]: 每个镜像的URL、吞吐量、错误率、下载量和是否停用
+        """
+        with self._lock:
+            return [{
+                'url': m.url,
+                'speed': m.speed,
+                'error_rate': m.error_rate,
+                'downloaded': m.downloaded,
+                'dropped': m.dropped
+            } for m in self.mirrors]
+
+    def _record_speed(self, mirror: Mirror, speed: float):
+        """更新吞吐量的滑动平均（调用方需持有锁）"""
+        if mirror.speed <= 0:
+            mirror.speed = speed
+        else:
+            mirror.speed += self.smoothing * (speed - mirror.speed)
+
+    @staticmethod
+    def _score(mirror: Mirror, best_speed: float) -> float:
+        """镜像评分（调用方需持有锁）：未测量的镜像按最快镜像的2倍估计，保证先被尝试"""
+        speed = mirror.speed if mirror.speed > 0 else max(best_speed, 1.0) * 2
+        return speed * (1.0 - mirror.error_rate) / (1 + mirror.active)
@@ -0,0 +1,338 @@
+"""
+分片摘要索引模块
+下载过程中按固定大小的分片记录已写入数据的摘要，保存在临时文件旁；崩溃或校验失败后
+按索引并行重新校验临时文件，只重新下载损坏或缺失的分片
+"""
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..utils.logger import Logger
+
+
+def piece_count(total_size: int, piece_size: int) -> int:
+    """文件的分片数"""
+    return (total_size + piece_size - 1) // piece_size if total_size > 0 else 0
+
+
+def pieces_to_chunks(good: Sequence[bool], piece_size: int, total_size: int) -> List[dict]:
+    """
+    按分片是否完好生成分块列表：连续的完好分片合并为已完成的分块，
+    连续的损坏或缺失分片合并为未下载的分块
+
+    Args:
+        good: 每个分片是否完好
+        piece_size: 分片大小
+        total_size: 文件大小
+
+    Returns:
+        List[dict]: 连续覆盖整个文件的分块列表
+    """
+    chunks: List[dict] = []
+    for index, ok in enumerate(good):
+        start = index * piece_size
+        end = min(start + piece_size, total_size) - 1
+        if chunks and chunks[-1]['ok'] == ok:
+            chunks[-1]['end'] = end
+        else:
+            chunks.append({'start': start, 'end': end, 'ok': ok})
+    return [
+        {'start': c['start'], 'end': c['end'], 'downloaded': c['end'] - c['start'] + 1 if c['ok'] else 0}
+        for c in chunks
+    ]
+
+
+def hash_pieces(path: str, indices: Iterable[int], piece_size: int, total_size: int,
+                algorithm: str, workers: Optional[int] = None) -> Dict[int, bytes]:
+    """
+    并行计算文件中指定分片的摘要（内存映射，hashlib 计算时释放GIL，多线程可以利用多核）
+
+    Args:
+        path: 文件路径
+        indices: 分片索引
+        piece_size: 分片大小
+        total_size: 文件大小（文件短于此值时，超出部分的分片不计算）
+        algorithm: hashlib 算法名
+        workers: 线程数，为None时使用CPU核数
+
+    Returns:
+        Dict[int, bytes]: 分片索引 -> 摘要
+    """
+    size = min(total_size, os.path.getsize(path))
+    indices = [i for i in indices if min((i + 1) * piece_size, total_size) <= size]
+    if not indices:
+        return {}
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as view:
+        def digest(index: int) -> bytes:
+            start = index * piece_size
+            return hashlib.new(algorithm, view[start:min(start + piece_size, total_size)]).digest()
+
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 4,
+                                thread_name_prefix="PieceHash") as executor:
+            return dict(zip(indices, executor.map(digest, indices)))
+
+
+class PieceIndex:
+    """分片摘要索引
+
+    保存在 ``<文件名>.tmp.pieces``：文件头之后每个分片一个固定长度的槽位
+    （1字节标记 + 摘要），分片写完后原地写入对应槽位，不需要重写整个文件。
+    索引记录的是数据写入时的摘要，并不保证数据已经落盘，崩溃后通过 recheck
+    比较临时文件的实际内容，不一致的分片重新下载。
+    """
+
+    MAGIC = b'PDPI'
+    VERSION = 1
+    # 魔数、版本、摘要长度、算法名、分片大小、文件大小、URL的CRC32
+    HEADER = struct.Struct('<4sBB8sQQI')
+
+    def __init__(self, temp_file: str, url: str, total_size: int,
+                 piece_size: int = 1048576, algorithm: str = 'sha1'):
+        """
+        初始化分片摘要索引
+
+        Args:
+            temp_file: 下载临时文件路径
+            url: 下载URL（URL或大小变化后旧索引失效）
+            total_size: 文件大小
+            piece_size: 分片大小
+            algorithm: hashlib 算法名
+        """
+        self.temp_file = temp_file
+        self.path = temp_file + '.pieces'
+        self.url = url
+        self.total_size = total_size
+        self.piece_size = max(1, int(piece_size))
+        self.algorithm = algorithm
+        self.digest_size = hashlib.new(algorithm).digest_size
+        self.count = piece_count(total_size, self.piece_size)
+        self.logger = Logger()
+
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._recorded = bytearray(self.count)  # 每个分片是否已记录
+
+    @property
+    def slot_size(self) -> int:
+        """每个分片槽位的字节数"""
+        return 1 + self.digest_size
+
+    def open(self, reset: bool = False) -> bool:
+        """
+        打开索引文件
+
+        Args:
+            reset: 是否清空已有记录（重新开始下载时）
+
+        Returns:
+            bool: 是否沿用了与任务匹配的已有记录
+        """
+        header = self.HEADER.pack(
+            self.MAGIC, self.VERSION, self.digest_size, self.algorithm.encode('ascii')[:8],
+            self.piece_size, self.total_size, zlib.crc32(self.url.encode('utf-8'))
+        )
+        size = self.HEADER.size + self.count * self.slot_size
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+
+        if not reset and os.fstat(self._fd).st_size == size and self._read(self.HEADER.size, 0) == header:
+            data = self._read(size - self.HEADER.size, self.HEADER.size)
+            for index in range(self.count):
+                self._recorded[index] = data[index * self.slot_size]
+            return True
+
+        # 与任务不匹配或需要清空：重建索引
+        os.ftruncate(self._fd, 0)
+        os.ftruncate(self._fd, size)
+        self._write(header, 0)
+        self._recorded = bytearray(self.count)
+        return False
+
+    def close(self):
+        """关闭索引文件"""
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def remove(self):
+        """关闭并删除索引文件"""
+        self.close()
+        if os.path.exists(self.path):
+            try:
+                os.remove(self.path)
+            except OSError as e:
+                self.logger.warning(f"删除分片索引失败: {e}")
+
+    def piece_range(self, index: int) -> Tuple[int, int]:
+        """分片的字节范围 (start, end)，end 包含在内"""
+        start = index * self.piece_size
+        return start, min(start + self.piece_size, self.total_size) - 1
+
+    def is_recorded(self, index: int) -> bool:
+        """分片是否已记录"""
+        return bool(self._recorded[index])
+
+    @property
+    def recorded_count(self) -> int:
+        """已记录的分片数"""
+        return sum(self._recorded)
+
+    def record(self, index: int, digest: bytes):
+        """
+        记录分片的摘要
+
+        Args:
+            index: 分片索引
+            digest: 摘要
+        """
+        self._write(b'\x01' + digest, self.HEADER.size + index * self.slot_size)
+        self._recorded[index] = 1
+
+    def clear_range(self, start: int, end: int):
+        """
+        清除与字节范围 [start, end] 重叠的分片记录（该范围将被重新下载）
+
+        Args:
+            start: 起始位置
+            end: 结束位置（包含）
+        """
+        for index in range(start // self.piece_size, min(end // self.piece_size + 1, self.count)):
+            if self._recorded[index]:
+                self._recorded[index] = 0
+                self._write(b'\x00', self.HEADER.size + index * self.slot_size)
+
+    def recorded_digests(self) -> Dict[int, bytes]:
+        """
+        读取所有已记录的分片摘要
+
+        Returns:
+            Dict[int, bytes]: 分片索引 -> 摘要
+        """
+        data = self._read(self.count * self.slot_size, self.HEADER.size)
+        digests = {}
+        for index in range(self.count):
+            offset = index * self.slot_size
+            if data[offset]:
+                digests[index] = bytes(data[offset + 1:offset + self.slot_size])
+        return digests
+
+    def recheck(self, workers: Optional[int] = None) -> List[bool]:
+        """
+        并行校验临时文件中已记录的分片，清除不一致的记录
+
+        Args:
+            workers: 线程数，为None时使用CPU核数
+
+        Returns:
+            List[bool]: 每个分片是否完好（未记录的分片视为缺失）
+        """
+        recorded = self.recorded_digests()
+        actual = hash_pieces(self.temp_file, recorded, self.piece_size, self.total_size,
+                             self.algorithm, workers)
+        good = [False] * self.count
+        for index, digest in recorded.items():
+            if actual.get(index) == digest:
+                good[index] = True
+            else:
+                self.clear_range(*self.piece_range(index))
+        return good
+
+    def _read(self, length: int, offset: int) -> bytes:
+        """在指定偏移处读取"""
+        with self._lock:
+            if hasattr(os, 'pread'):
+                return os.pread(self._fd, length, offset)
+            os.lseek(self._fd, offset, os.SEEK_SET)
+            return os.read(self._fd, length)
+
+    def _write(self, data: bytes, offset: int):
+        """在指定偏移处写入"""
+        with self._lock:
+            if hasattr(os, 'pwrite'):
+                os.pwrite(self._fd, data, offset)
+            else:
+                os.lseek(self._fd, offset, os.SEEK_SET)
+                os.write(self._fd, data)
+
+
+class PieceRecorder:
+    """分片记录线程
+
+    定期取得临时文件中已写入的字节范围，为完整落在其中且尚未记录的分片计算摘要并写入索引。
+    刚写入的数据通常还在页缓存中，读取代价很小。
+    """
+
+    def __init__(self, index: PieceIndex, written: Callable[[], List[Tuple[int, int]]],
+                 interval: float = 1.0):
+        """
+        初始化分片记录线程
+
+        Args:
+            index: 分片摘要索引
+            written: 返回已写入的字节范围列表 [(start, end)]，end 不包含在内
+            interval: 检查间隔（秒）
+        """
+        self.index = index
+        self.written = written
+        self.interval = interval
+        self.logger = Logger()
+
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动后台线程"""
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="PieceRecorder", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台线程，并记录停止时已写完的分片"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._record_pass()
+
+    def _run(self):
+        """后台线程"""
+        while not self._stopped.wait(self.interval):
+            self._record_pass()
+
+    def _record_pass(self):
+        """记录所有已写完但尚未记录的分片"""
+        try:
+            with open(self.index.temp_file, 'rb') as f:
+                for index in self._complete_pieces():
+                    if self.index.is_recorded(index):
+                        continue
+                    start, end = self.index.piece_range(index)
+                    f.seek(start)
+                    data = f.read(end - start + 1)
+                    if len(data) != end - start + 1:
+                        return
+                    self.index.record(index, hashlib.new(self.index.algorithm, data).digest())
+        except Exception as e:
+            self.logger.warning(f"记录分片摘要失败: {e}")
+
+    def _complete_pieces(self) -> Iterable[int]:
+        """完整落在已写入范围内的分片"""
+        ranges = sorted(r for r in self.written() if r[1] > r[0])
+        merged: List[List[int]] = []
+        for start, end in ranges:
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        piece_size = self.index.piece_size
+        for start, end in merged:
+            first = (start + piece_size - 1) // piece_size
+            last = self.index.count if end >= self.index.total_size else end // piece_size
+            yield from range(first, last)
@@ -0,0 +1,97 @@
+"""
+进度缓冲区模块
+收集下载线程上报的进度和结束事件，由引擎所在线程批量取出（不依赖Qt）
+"""
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class ProgressBuffer:
+    """进度缓冲区（线程安全）
+
+    post() 和 post_finished() 可以在任意线程调用，只记录任务ID：同一任务在两次取出
+    之间的多次进度更新合并为一次，结束事件按顺序全部保留。缓冲区由空变为非空时调用
+    on_wake 回调（在上报线程中执行，只应做线程安全的唤醒操作），无界面运行时也可以
+    用 wait() 阻塞等待。
+    """
+
+    def __init__(self, on_wake: Optional[Callable[[], None]] = None):
+        """
+        初始化进度缓冲区
+
+        Args:
+            on_wake: 缓冲区由空变为非空时的回调
+        """
+        self.on_wake = on_wake
+
+        self._lock = threading.Lock()
+        self._pending: Dict[str, None] = {}  # 按首次上报顺序排列的任务ID
+        self._finished: List[Tuple[str, Any]] = []
+        self._ready = threading.Event()
+
+    def post(self, task_id: str):
+        """
+        上报任务进度有更新
+
+        Args:
+            task_id: 任务ID
+        """
+        with self._lock:
+            self._pending[task_id] = None
+            if self._ready.is_set():
+                return
+            self._ready.set()
+        self._wake()
+
+    def post_finished(self, task_id: str, downloader: Any):
+        """
+        上报下载器已退出
+
+        Args:
+            task_id: 任务ID
+            downloader: 已退出的下载器
+        """
+        with self._lock:
+            self._finished.append((task_id, downloader))
+            if self._ready.is_set():
+                return
+            self._ready.set()
+        self._wake()
+
+    def notify(self):
+        """不带事件地唤醒所有者线程（如有待执行的调用）"""
+        with self._lock:
+            if self._ready.is_set():
+                return
+            self._ready.set()
+        self._wake()
+
+    def drain(self) -> Tuple[List[str], List[Tuple[str, Any]]]:
+        """
+        取出并清空缓冲区
+
+        Returns:
+            (有进度更新的任务ID列表, [(任务ID, 下载器), ...])
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            finished, self._finished = self._finished, []
+            self._ready.clear()
+        return list(pending), finished
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待缓冲区中有事件
+
+        Args:
+            timeout: 最长等待时间（秒），为None时一直等待
+
+        Returns:
+            bool: 是否有事件
+        """
+        return self._ready.wait(timeout)
+
+    def _wake(self):
+        """通知缓冲区中有新事件"""
+        if self.on_wake is not None:
+            self.on_wake()
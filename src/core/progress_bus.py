@@ -0,0 +1,100 @@
+"""
+进度总线模块
+把进度缓冲区中的事件按界面刷新频率在GUI线程中批量分发
+"""
+from typing import Optional
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from .progress_buffer import ProgressBuffer
+
+
+class ProgressBus(QObject):
+    """进度总线
+
+    post() 和 post_finished() 可以在任意线程调用，事件记入 ProgressBuffer：同一任务
+    在一帧内的多次进度更新合并为一次，结束事件按顺序全部保留。缓冲区由空变为非空时
+    通过排队信号唤醒GUI线程上的单次定时器，定时器到期后在GUI线程中一次性取出缓冲区，
+    先发出 updates_ready（本帧有更新的任务ID列表），再逐个发出 task_finished，最后发出 flushed。
+    因此每帧最多跨线程投递一个事件，槽函数都在总线所在的线程中执行。
+    """
+
+    updates_ready = Signal(list)  # 本帧有进度更新的任务ID列表
+    task_finished = Signal(str, object)  # 下载器已退出(task_id, downloader)
+    flushed = Signal()  # 本帧的事件已分发完（缓冲区被唤醒后每帧一次）
+    _wake = Signal()  # 缓冲区由空变为非空（跨线程时自动排队到总线所在线程）
+
+    def __init__(self, refresh_rate: float = 10.0, parent=None,
+                 buffer: Optional[ProgressBuffer] = None):
+        """
+        初始化进度总线
+
+        Args:
+            refresh_rate: 每秒最多分发的批次数
+            parent: 父对象
+            buffer: 使用的进度缓冲区，为None时新建
+        """
+        super().__init__(parent)
+
+        self.buffer = buffer or ProgressBuffer()
+        self.buffer.on_wake = self._wake.emit
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self.set_refresh_rate(refresh_rate)
+        self._wake.connect(self._start_timer)
+
+    @property
+    def refresh_rate(self) -> float:
+        """每秒最多分发的批次数"""
+        return 1000.0 / self._timer.interval()
+
+    def set_refresh_rate(self, refresh_rate: float):
+        """
+        设置刷新频率
+
+        Args:
+            refresh_rate: 每秒最多分发的批次数（1-120）
+        """
+        refresh_rate = min(120.0, max(1.0, float(refresh_rate)))
+        self._timer.setInterval(int(round(1000.0 / refresh_rate)))
+
+    def post(self, task_id: str):
+        """
+        上报任务进度有更新（线程安全）
+
+        Args:
+            task_id: 任务ID
+        """
+        self.buffer.post(task_id)
+
+    def post_finished(self, task_id: str, downloader):
+        """
+        上报下载器已退出（线程安全）
+
+        Args:
+            task_id: 任务ID
+            downloader: 已退出的下载器
+        """
+        self.buffer.post_finished(task_id, downloader)
+
+    def flush(self) -> int:
+        """
+        立即分发缓冲区中的事件（只能在总线所在线程调用）
+
+        Returns:
+            int: 分发的事件数
+        """
+        pending, finished = self.buffer.drain()
+        if pending:
+            self.updates_ready.emit(pending)
+        for task_id, downloader in finished:
+            self.task_finished.emit(task_id, downloader)
+        self.flushed.emit()
+        return len(pending) + len(finished)
+
+    def _start_timer(self):
+        """在总线所在线程启动分发定时器"""
+        if not self._timer.isActive():
+            self._timer.start()
@@ -0,0 +1,44 @@
+"""
+进度计数模块
+提供低竞争的下载字节计数，避免热路径上的加锁
+"""
+from array import array
+
+
+class ProgressCounter:
+    """按工作线程分槽的字节计数器
+
+    每个工作线程只写自己的槽位（单写者），因此累加时无需加锁；
+    汇总方（进度上报线程）按需对所有槽位求和。读取到的总数可能
+    略微滞后于正在进行的写入，但不会丢失计数。
+    """
+
+    def __init__(self, slots: int, base: int = 0):
+        """
+        初始化计数器
+
+        Args:
+            slots: 槽位数量（通常等于工作线程数）
+            base: 起始字节数（恢复下载时已完成的部分）
+        """
+        self._slots = array('q', [0] * max(1, slots))
+        self._base = base
+
+    def add(self, slot: int, count: int):
+        """
+        累加字节数（只能由槽位的所属线程调用）
+
+        Args:
+            slot: 槽位索引
+            count: 新增字节数
+        """
+        self._slots[slot] += count
+
+    def total(self) -> int:
+        """
+        获取累计字节数
+
+        Returns:
+            int: 起始字节数与各槽位之和
+        """
+        return self._base + sum(self._slots)
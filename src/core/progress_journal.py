@@ -0,0 +1,165 @@
+"""
+分块进度日志模块
+将每个分块的下载进度持久化到临时文件旁，实现崩溃安全的断点续传
+"""
+import json
+import os
+import zlib
+from typing import List, Optional
+
+from ..utils.logger import Logger
+
+
+class ProgressJournal:
+    """分块进度日志
+
+    日志文件保存在 ``<文件名>.tmp.progress``。写入顺序保证崩溃安全：
+    先对数据文件执行fsync，再原子替换日志文件，因此日志记录的进度
+    永远不会超过已落盘的数据。每个分块额外记录已写入区域末尾一段数据的
+    CRC32，加载时校验，防止数据文件被截断或损坏后仍按旧进度续传。
+    """
+
+    VERSION = 1
+    TAIL_BLOCK_SIZE = 65536  # 校验的末尾数据块大小
+
+    def __init__(self, temp_file: str):
+        """
+        初始化进度日志
+
+        Args:
+            temp_file: 下载临时文件路径
+        """
+        self.temp_file = temp_file
+        self.path = temp_file + '.progress'
+        self.logger = Logger()
+
+    def save(self, url: str, total_size: int, chunks: List[dict], data_fd: Optional[int] = None):
+        """
+        保存分块进度
+
+        Args:
+            url: 下载URL
+            total_size: 文件总大小
+            chunks: 分块信息列表
+            data_fd: 已打开的数据文件描述符，为None时临时打开
+        """
+        # 先记录快照，再同步数据文件，保证快照中的字节都已落盘
+        snapshot = [
+            {'start': chunk['start'], 'end': chunk['end'], 'downloaded': chunk.get('downloaded', 0)}
+            for chunk in chunks
+        ]
+
+        own_fd = data_fd is None
+        fd = os.open(self.temp_file, os.O_RDWR | getattr(os, 'O_BINARY', 0)) if own_fd else data_fd
+        try:
+            os.fsync(fd)
+            for chunk in snapshot:
+                chunk['crc32'] = self._tail_crc(fd, chunk)
+        finally:
+            if own_fd:
+                os.close(fd)
+
+        body = {
+            'version': self.VERSION,
+            'url': url,
+            'total_size': total_size,
+            'chunks': snapshot
+        }
+        payload = json.dumps(body, separators=(',', ':'), sort_keys=True)
+        record = json.dumps({'checksum': zlib.crc32(payload.encode('utf-8')), 'body': body})
+
+        # 写入临时日志后原子替换
+        new_path = self.path + '.new'
+        with open(new_path, 'w', encoding='utf-8') as f:
+            f.write(record)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(new_path, self.path)
+
+    def load(self, url: str, total_size: int) -> Optional[List[dict]]:
+        """
+        加载并校验分块进度
+
+        Args:
+            url: 下载URL
+            total_size: 文件总大小
+
+        Returns:
+            分块信息列表；日志不存在、损坏或与任务不匹配时返回None
+        """
+        if not os.path.exists(self.path) or not os.path.exists(self.temp_file):
+            return None
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+
+            body = record['body']
+            payload = json.dumps(body, separators=(',', ':'), sort_keys=True)
+            if zlib.crc32(payload.encode('utf-8')) != record['checksum']:
+                self.logger.warning(f"进度日志校验失败: {self.path}")
+                return None
+
+            if body.get('version') != self.VERSION or body.get('url') != url \
+                    or body.get('total_size') != total_size:
+                self.logger.warning(f"进度日志与任务不匹配: {self.path}")
+                return None
+
+            chunks = body['chunks']
+            fd = os.open(self.temp_file, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+            try:
+                for index, chunk in enumerate(chunks):
+                    expected_crc = chunk.pop('crc32', None)
+                    if chunk['downloaded'] > 0 and self._tail_crc(fd, chunk) != expected_crc:
+                        # 末尾数据与记录不符，该分块从头下载
+                        self.logger.warning(f"分块 {index} 末尾数据校验失败，重新下载该分块")
+                        chunk['downloaded'] = 0
+            finally:
+                os.close(fd)
+
+            return chunks
+
+        except Exception as e:
+            self.logger.error(f"读取进度日志失败: {e}")
+            return None
+
+    def remove(self):
+        """删除进度日志"""
+        for path in (self.path, self.path + '.new'):
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    self.logger.warning(f"删除进度日志失败: {e}")
+
+    @classmethod
+    def _tail_crc(cls, fd: int, chunk: dict) -> int:
+        """
+        计算分块已下载区域末尾数据块的CRC32
+
+        Args:
+            fd: 数据文件描述符
+            chunk: 分块信息
+
+        Returns:
+            int: CRC32值，分块未下载时为0
+        """
+        downloaded = chunk.get('downloaded', 0)
+        if downloaded <= 0:
+            return 0
+
+        length = min(downloaded, cls.TAIL_BLOCK_SIZE)
+        offset = chunk['start'] + downloaded - length
+        data = _read_at(fd, length, offset)
+        if len(data) != length:
+            return -1
+        return zlib.crc32(data)
+
+
+def _read_at(fd: int, length: int, offset: int) -> bytes:
+    """在指定偏移处读取数据"""
+    if hasattr(os, 'pread'):
+        return os.pread(fd, length, offset)
+
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, length)
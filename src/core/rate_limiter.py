@@ -0,0 +1,304 @@
+"""
+限速模块
+实现全局与单任务两级令牌桶限速，所有下载器共享
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from ..utils.config import ConfigManager
+
+
+class TokenBucket:
+    """令牌桶（预约模式）
+
+    reserve() 立即扣除令牌并返回需要等待的秒数。令牌可以为负（欠账），
+    后来的调用者要等前面的欠账还清，因此等待顺序天然是先到先得。
+    """
+
+    def __init__(self, rate: float = 0, burst: float = 0):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 速率（字节/秒），0表示不限速
+            burst: 桶容量（允许的突发字节数）
+        """
+        self._lock = threading.Lock()
+        self.rate = 0.0
+        self.burst = 0.0
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self.set_rate(rate, burst)
+
+    @property
+    def limited(self) -> bool:
+        """是否启用限速"""
+        return self.rate > 0
+
+    def set_rate(self, rate: float, burst: float):
+        """
+        修改速率（运行中生效，清除已有欠账）
+
+        Args:
+            rate: 速率（字节/秒），0表示不限速
+            burst: 桶容量
+        """
+        with self._lock:
+            self.rate = max(0.0, float(rate))
+            self.burst = max(0.0, float(burst))
+            self._tokens = self.burst
+            self._last = time.monotonic()
+
+    def reserve(self, amount: int, now: Optional[float] = None) -> float:
+        """
+        预约令牌
+
+        Args:
+            amount: 字节数
+            now: 当前单调时钟时间
+
+        Returns:
+            float: 需要等待的秒数
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class _TaskBuckets:
+    """单个任务的令牌桶：用户设置的单任务限速和全局拥塞时的公平份额"""
+
+    def __init__(self):
+        self.limit = TokenBucket()
+        self.fair = TokenBucket()
+
+
+class RateLimiter:
+    """两级限速器
+
+    每次读取后调用 throttle()（线程）或 reserve()（协程）按实际字节数付账：
+    - 全局桶限制所有任务的总速度；
+    - 单任务桶限制每个任务的速度；
+    - 全局桶拥塞时，每个任务还要受公平份额（全局速率 / 活动任务数）约束，
+      防止连接数多的任务挤占其他任务；不拥塞时不受此约束，带宽不会闲置。
+    被限速的线程在事件上等待（不忙等），限速修改后正在等待的线程会立即被唤醒。
+    """
+
+    MIN_BURST = 65536  # 最小突发字节数
+    QUANTUM_TIME = 0.1  # 限速时单次读取量对应的时间（秒）
+    MIN_QUANTUM = 4096  # 限速时单次读取量下限
+    WAIT_SLICE = 0.25  # 等待期间检查中断和限速修改的间隔（秒）
+
+    def __init__(self, global_limit: float = 0, per_task_limit: float = 0, burst_seconds: float = 1.0):
+        """
+        初始化限速器
+
+        Args:
+            global_limit: 全局限速（字节/秒），0表示不限速
+            per_task_limit: 单任务限速（字节/秒），0表示不限速
+            burst_seconds: 突发容量相当于多少秒的流量
+        """
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, _TaskBuckets] = {}
+        self._global = TokenBucket()
+        self._generation = 0
+        self.global_limit = 0.0
+        self.per_task_limit = 0.0
+        self.burst_seconds = burst_seconds
+        self.set_limits(global_limit, per_task_limit)
+
+    @classmethod
+    def from_config(cls, config: Optional[ConfigManager] = None) -> 'RateLimiter':
+        """
+        根据配置创建限速器
+
+        Args:
+            config: 配置管理器，为None时读取默认配置
+
+        Returns:
+            RateLimiter: 限速器实例
+        """
+        limiter = cls()
+        limiter.apply_config(config or ConfigManager())
+        return limiter
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用了任何限速"""
+        return self.global_limit > 0 or self.per_task_limit > 0
+
+    def apply_config(self, config: ConfigManager):
+        """
+        按配置（设置对话框保存的 speed.* 项）更新限速，运行中的任务立即生效
+
+        Args:
+            config: 配置管理器
+        """
+        global_limit = 0
+        if config.get('speed.global_limit_enabled', False):
+            global_limit = config.get('speed.global_limit_kbps', 0) * 1024
+
+        per_task_limit = 0
+        if config.get('speed.per_task_limit_enabled', False):
+            per_task_limit = config.get('speed.per_task_limit_kbps', 0) * 1024
+
+        self.burst_seconds = config.get('speed.burst_seconds', 1.0)
+        self.set_limits(global_limit, per_task_limit)
+
+    def set_limits(self, global_limit: float, per_task_limit: float):
+        """
+        修改限速
+
+        Args:
+            global_limit: 全局限速（字节/秒），0表示不限速
+            per_task_limit: 单任务限速（字节/秒），0表示不限速
+        """
+        with self._lock:
+            self.global_limit = max(0.0, float(global_limit))
+            self.per_task_limit = max(0.0, float(per_task_limit))
+            self._global.set_rate(self.global_limit, self._burst(self.global_limit))
+            for buckets in self._tasks.values():
+                buckets.limit.set_rate(self.per_task_limit, self._burst(self.per_task_limit))
+            self._update_fair_share()
+            self._generation += 1
+
+    def register(self, task_id: str):
+        """
+        登记活动任务
+
+        Args:
+            task_id: 任务ID
+        """
+        with self._lock:
+            if task_id in self._tasks:
+                return
+            buckets = _TaskBuckets()
+            buckets.limit.set_rate(self.per_task_limit, self._burst(self.per_task_limit))
+            self._tasks[task_id] = buckets
+            self._update_fair_share()
+
+    def unregister(self, task_id: str):
+        """
+        注销任务
+
+        Args:
+            task_id: 任务ID
+        """
+        with self._lock:
+            if self._tasks.pop(task_id, None) is not None:
+                self._update_fair_share()
+
+    def quantum(self, task_id: str) -> int:
+        """
+        限速时单次读取的建议字节数，保证每次付账的等待时间较短
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            int: 字节数，不限速时返回一个很大的值
+        """
+        rates = [rate for rate in (self.global_limit, self.per_task_limit) if rate > 0]
+        if not rates:
+            return 1 << 30
+        return max(self.MIN_QUANTUM, int(min(rates) * self.QUANTUM_TIME))
+
+    def reserve(self, task_id: str, amount: int) -> Tuple[float, int]:
+        """
+        为已读取的字节付账
+
+        Args:
+            task_id: 任务ID
+            amount: 字节数
+
+        Returns:
+            tuple: (需要等待的秒数, 当前限速版本号)
+        """
+        generation = self._generation
+        if amount <= 0 or not self.enabled:
+            return 0.0, generation
+
+        buckets = self._tasks.get(task_id)
+        now = time.monotonic()
+
+        delay = self._global.reserve(amount, now)
+        if buckets is not None:
+            if delay > 0:
+                # 全局带宽不足，按公平份额排队
+                delay = max(delay, buckets.fair.reserve(amount, now))
+            delay = max(delay, buckets.limit.reserve(amount, now))
+
+        return delay, generation
+
+    def throttle(self, task_id: str, amount: int, interrupt: Optional[threading.Event] = None):
+        """
+        为已读取的字节付账，必要时阻塞等待（供下载线程调用）
+
+        Args:
+            task_id: 任务ID
+            amount: 字节数
+            interrupt: 被设置时立即结束等待（暂停/停止）
+        """
+        delay, generation = self.reserve(task_id, amount)
+        deadline = time.monotonic() + delay
+
+        while delay > 0:
+            wait_time = min(delay, self.WAIT_SLICE)
+            if interrupt is not None:
+                if interrupt.wait(wait_time):
+                    return
+            else:
+                time.sleep(wait_time)
+
+            if self._generation != generation:
+                # 限速已修改，欠账已清除
+                return
+            delay = deadline - time.monotonic()
+
+    def is_current(self, generation: int) -> bool:
+        """限速版本号是否仍然有效（协程等待期间用于检测限速修改）"""
+        return self._generation == generation
+
+    def _burst(self, rate: float) -> float:
+        """计算突发容量"""
+        if rate <= 0:
+            return 0.0
+        return max(self.MIN_BURST, rate * self.burst_seconds)
+
+    def _update_fair_share(self):
+        """按活动任务数重新计算公平份额（调用方需持有锁）"""
+        if not self._tasks:
+            return
+
+        share = self.global_limit / len(self._tasks) if self.global_limit > 0 else 0
+        for buckets in self._tasks.values():
+            buckets.fair.set_rate(share, self._burst(share))
+
+
+# 全局限速器实例
+_limiter_instance: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    获取全局限速器实例（单例模式）
+
+    Returns:
+        RateLimiter: 限速器实例
+    """
+    global _limiter_instance
+    if _limiter_instance is None:
+        with _limiter_lock:
+            if _limiter_instance is None:
+                _limiter_instance = RateLimiter.from_config()
+    return _limiter_instance
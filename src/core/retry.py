@@ -0,0 +1,184 @@
+"""
+重试策略模块
+实现指数退避、随机抖动以及分块级和任务级的重试预算
+"""
+import http.client
+import random
+import socket
+import threading
+from typing import Optional, Tuple
+
+import requests
+
+from ..utils.config import ConfigManager
+
+
+class TransientError(IOError):
+    """可重试的临时错误（如连接提前关闭）"""
+
+
+class RetryBudget:
+    """任务级重试预算（线程安全）"""
+
+    def __init__(self, limit: int):
+        """
+        初始化重试预算
+
+        Args:
+            limit: 整个任务允许的重试次数
+        """
+        self.limit = max(0, int(limit))
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """
+        消耗一次重试机会
+
+        Returns:
+            bool: 预算是否还有剩余
+        """
+        with self._lock:
+            if self.used >= self.limit:
+                return False
+            self.used += 1
+            return True
+
+
+class RetryPolicy:
+    """重试策略
+
+    临时错误（连接重置、超时、提前断开、5xx/408/429等）可以重试，每次重试
+    从分块当前位置继续下载。分块连续失败 max_retries 次（期间有新数据写入会
+    重新计数），或整个任务的重试次数用完后，不再重试。
+
+    退避时间使用 full jitter：在 [0, min(max_delay, base_delay * 2^attempt)]
+    之间均匀随机，避免大量连接同时重连；服务器给出 Retry-After 时以其为下限。
+    """
+
+    RETRYABLE_STATUS = (408, 425, 429, 500, 502, 503, 504)
+    THROTTLE_STATUS = (429, 503)  # 服务器因请求过多拒绝
+    TRANSIENT_ERRORS: Tuple[type, ...] = (
+        TransientError,
+        ConnectionError,
+        socket.timeout,
+        TimeoutError,
+        http.client.HTTPException,
+        requests.ConnectionError,
+        requests.Timeout,
+        requests.exceptions.ChunkedEncodingError,
+    )
+
+    def __init__(self, max_retries: int = 3, task_retries: int = 20, base_delay: float = 1.0,
+                 max_delay: float = 30.0, transient_errors: Tuple[type, ...] = ()):
+        """
+        初始化重试策略
+
+        Args:
+            max_retries: 每个分块连续失败时的最大重试次数
+            task_retries: 整个任务的最大重试次数
+            base_delay: 退避基准时间（秒）
+            max_delay: 退避时间上限（秒）
+            transient_errors: 额外视为临时错误的异常类型（如aiohttp的异常）
+        """
+        self.max_retries = max(0, int(max_retries))
+        self.task_retries = max(0, int(task_retries))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.transient_errors = self.TRANSIENT_ERRORS + tuple(transient_errors)
+
+    @classmethod
+    def from_config(cls, config: Optional[ConfigManager] = None,
+                    transient_errors: Tuple[type, ...] = ()) -> 'RetryPolicy':
+        """
+        根据配置创建重试策略
+
+        Args:
+            config: 配置管理器，为None时读取默认配置
+            transient_errors: 额外视为临时错误的异常类型
+
+        Returns:
+            RetryPolicy: 重试策略实例
+        """
+        config = config or ConfigManager()
+        # 设置对话框保存的是 max_retries，默认配置中是 retry_count
+        max_retries = config.get('network.max_retries', config.get('network.retry_count', 3))
+        return cls(
+            max_retries=max_retries,
+            task_retries=config.get('network.retry.task_budget', 20),
+            base_delay=config.get('network.retry.base_delay', 1.0),
+            max_delay=config.get('network.retry.max_delay', 30.0),
+            transient_errors=transient_errors
+        )
+
+    def new_budget(self) -> RetryBudget:
+        """创建一个任务级重试预算"""
+        return RetryBudget(self.task_retries)
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """
+        判断错误是否可以重试
+
+        Args:
+            error: 捕获的异常
+
+        Returns:
+            bool: 是否为临时错误
+        """
+        status = self._status_of(error)
+        if status is not None:
+            return status in self.RETRYABLE_STATUS
+        return isinstance(error, self.transient_errors)
+
+    def is_throttled(self, error: BaseException) -> bool:
+        """
+        判断错误是否表示服务器限制请求（429/503），此时应减少连接数
+
+        Args:
+            error: 捕获的异常
+
+        Returns:
+            bool: 是否为限流错误
+        """
+        return self._status_of(error) in self.THROTTLE_STATUS
+
+    def backoff(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """
+        计算第attempt次重试前的等待时间
+
+        Args:
+            attempt: 重试序号（从1开始）
+            error: 导致重试的异常，用于读取Retry-After
+
+        Returns:
+            float: 等待秒数
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** max(0, attempt - 1)))
+        delay = random.uniform(0, ceiling)
+
+        retry_after = self._retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    @staticmethod
+    def _status_of(error: Optional[BaseException]) -> Optional[int]:
+        """从HTTP错误中取出状态码（兼容requests和aiohttp）"""
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None)
+        if status is None:
+            status = getattr(error, 'status', None)
+        return status if isinstance(status, int) else None
+
+    @staticmethod
+    def _retry_after(error: Optional[BaseException]) -> Optional[float]:
+        """读取响应头中的Retry-After（只支持秒数格式）"""
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None) or getattr(error, 'headers', None)
+        if not headers:
+            return None
+
+        try:
+            return float(headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            return None
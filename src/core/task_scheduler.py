@@ -0,0 +1,310 @@
+"""
+任务调度模块
+按优先级、文件大小和创建时间排队，并在并发任务数和全局连接数预算内分配下载
+"""
+import heapq
+import itertools
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .download_task import DownloadTask
+from .host_limiter import HostLimiter
+
+
+class TaskScheduler:
+    """任务调度器（线程安全）
+
+    等待中的任务保存在最小堆中，排序键为 (-优先级, 文件大小, 创建时间, 序号)：
+    优先级高的先下载，同优先级时小文件优先（未知大小排在最后），再按先来后到。
+    取消排队或修改优先级时只把旧条目标记为失效（懒删除），入队和出队都是 O(log n)。
+
+    启动任务时从全局连接预算中为其分配连接数，预算不足任务所需时分配剩余部分，
+    预算用完或并发任务数达到上限时暂停出队，直到有任务归还连接。同一任务暂停后
+    立即重新开始时，旧下载器退出前两次分配会同时存在，按分配顺序依次归还。
+
+    指定主机限制器时，分配给同一主机的连接数不超过其每主机上限：排在前面的任务
+    所在主机已没有名额时，把条目移到该主机的等待堆中（保留排队位置），先启动其他主机
+    的任务；该主机归还连接时，按归还的名额把等待堆中排在最前面的条目放回队列。每个条目
+    在主机名额用完期间只移动一次，同一主机有大量排队任务时出队仍是 O(log n)。
+    """
+
+    _REMOVED = None  # 失效条目的任务ID
+
+    def __init__(self, max_tasks: int = 3, max_connections: int = 32,
+                 demand: Optional[Callable[[str], Optional[int]]] = None,
+                 hosts: Optional[HostLimiter] = None, host_of: Optional[Callable[[str], str]] = None):
+        """
+        初始化任务调度器
+
+        Args:
+            max_tasks: 最大并发任务数
+            max_connections: 所有任务的连接总数上限
+            demand: 出队时查询任务当前希望的连接数（如按主机实测的最佳连接数），
+                返回None时使用入队时的值
+            hosts: 主机连接限制器，为None时不按主机限制
+            host_of: 出队时查询任务下载的主机
+        """
+        self.max_tasks = max(1, int(max_tasks))
+        self.max_connections = max(1, int(max_connections))
+        self.demand = demand
+        self.hosts = hosts
+        self.host_of = host_of
+
+        self._lock = threading.Lock()
+        self._heap: List[list] = []
+        self._entries: Dict[str, list] = {}  # task_id -> 堆中的有效条目
+        self._parked: Dict[str, List[list]] = {}  # host -> 等待主机名额的条目（最小堆）
+        self._parked_count = 0  # 等待堆中的条目数（含失效条目）
+        self._active: Dict[str, List[list]] = {}  # task_id -> 各次分配的 [连接数, 主机]（按分配顺序）
+        self._active_runs = 0
+        self._used_connections = 0
+        self._host_connections: Dict[str, int] = {}  # host -> 已分配的连接数
+        self._counter = itertools.count()
+
+    @property
+    def active_count(self) -> int:
+        """正在下载的任务数"""
+        return self._active_runs
+
+    @property
+    def queued_count(self) -> int:
+        """排队中的任务数"""
+        return len(self._entries)
+
+    @property
+    def used_connections(self) -> int:
+        """已分配的连接数"""
+        return self._used_connections
+
+    def host_connections(self, host: str) -> int:
+        """已分配给主机的连接数"""
+        return self._host_connections.get(host, 0)
+
+    def set_limits(self, max_tasks: int, max_connections: int):
+        """
+        修改并发限制（已启动的任务不受影响）
+
+        Args:
+            max_tasks: 最大并发任务数
+            max_connections: 所有任务的连接总数上限
+        """
+        with self._lock:
+            self.max_tasks = max(1, int(max_tasks))
+            self.max_connections = max(1, int(max_connections))
+
+    def push(self, task: DownloadTask, connections: Optional[int] = None):
+        """
+        任务入队（已在队列中时按新的优先级重新排队）
+
+        Args:
+            task: 下载任务
+            connections: 任务希望使用的连接数，为None时使用task.connections
+        """
+        wanted = max(1, int(connections or task.connections or 1))
+        size_key = task.total_size if task.total_size > 0 else float('inf')
+        created = task.created_at.timestamp() if task.created_at else 0.0
+
+        with self._lock:
+            self._invalidate(task.task_id)
+            entry = [-task.priority, size_key, created, next(self._counter), task.task_id, wanted, None]
+            self._entries[task.task_id] = entry
+            heapq.heappush(self._heap, entry)
+
+    def remove(self, task_id: str) -> bool:
+        """
+        取消排队
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            bool: 任务是否在队列中
+        """
+        with self._lock:
+            return self._invalidate(task_id)
+
+    def peek(self, count: int) -> List[str]:
+        """
+        按出队顺序查看排在最前面的任务（不出队，不含等待主机名额的任务）
+
+        从堆顶开始按顺序展开子节点，只访问排在前面的条目，开销与队列长度无关，
+        每次调度时都可以调用。
+
+        Args:
+            count: 最多返回的任务数
+
+        Returns:
+            List[str]: 任务ID列表
+        """
+        task_ids = []
+        with self._lock:
+            heap = self._heap
+            # 先丢弃堆顶的失效条目
+            while heap and heap[0][4] is self._REMOVED:
+                heapq.heappop(heap)
+
+            frontier = [(heap[0], 0)] if heap else []  # (条目, 堆中下标)
+            while frontier and len(task_ids) < count:
+                entry, index = heapq.heappop(frontier)
+                if entry[4] is not self._REMOVED:
+                    task_ids.append(entry[4])
+                for child in (2 * index + 1, 2 * index + 2):
+                    if child < len(heap):
+                        heapq.heappush(frontier, (heap[child], child))
+        return task_ids
+
+    def is_queued(self, task_id: str) -> bool:
+        """任务是否在排队"""
+        return task_id in self._entries
+
+    def is_active(self, task_id: str) -> bool:
+        """任务是否已分配连接"""
+        return task_id in self._active
+
+    def next_task(self) -> Optional[Tuple[str, int]]:
+        """
+        取出下一个可以启动的任务并为其分配连接
+
+        Returns:
+            (任务ID, 分配的连接数)；队列为空或没有剩余容量时返回None
+        """
+        with self._lock:
+            available = self.max_connections - self._used_connections
+            if self._active_runs >= self.max_tasks or available < 1:
+                return None
+
+            while self._heap:
+                entry = heapq.heappop(self._heap)
+                task_id = entry[4]
+                if task_id is self._REMOVED:
+                    continue
+
+                host = self.host_of(task_id) if self.host_of else ''
+                host_available = self._host_available(host)
+                if host_available < 1:
+                    # 该主机的名额已用完，等它归还连接，让后面其他主机的任务先下载
+                    entry[6] = host
+                    heapq.heappush(self._parked.setdefault(host, []), entry)
+                    self._parked_count += 1
+                    continue
+
+                del self._entries[task_id]
+                wanted = (self.demand(task_id) if self.demand else None) or entry[5]
+                granted = min(wanted, available, host_available)
+                self._active.setdefault(task_id, []).append([granted, host])
+                self._active_runs += 1
+                self._used_connections += granted
+                self._host_connections[host] = self._host_connections.get(host, 0) + granted
+                return task_id, granted
+
+            return None
+
+    def shrink(self, task_id: str, connections: int) -> int:
+        """
+        任务实际只需要更少的连接（如连接数已按实测吞吐量固定），归还多余的部分
+
+        Args:
+            task_id: 任务ID
+            connections: 任务当前需要的连接数
+
+        Returns:
+            int: 归还的连接数
+        """
+        with self._lock:
+            grants = self._active.get(task_id)
+            if not grants:
+                return 0
+
+            grant = grants[-1]
+            freed = grant[0] - max(1, int(connections))
+            if freed <= 0:
+                return 0
+            grant[0] -= freed
+            self._used_connections -= freed
+            self._release_host(grant[1], freed)
+            return freed
+
+    def release(self, task_id: str) -> bool:
+        """
+        任务的一次下载结束，归还其最早一次分配的连接
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            bool: 任务之前是否处于活动状态
+        """
+        with self._lock:
+            grants = self._active.get(task_id)
+            if not grants:
+                return False
+
+            granted, host = grants.pop(0)
+            self._used_connections -= granted
+            self._release_host(host, granted)
+            self._active_runs -= 1
+            if not grants:
+                del self._active[task_id]
+            return True
+
+    def _host_available(self, host: str) -> int:
+        """主机还能分配的连接数（调用方需持有锁）"""
+        if self.hosts is None:
+            return self.max_connections
+        return self.hosts.available(host, self._host_connections.get(host, 0))
+
+    def _release_host(self, host: str, connections: int):
+        """归还主机的连接数，并放回等待该主机名额的条目（调用方需持有锁）"""
+        remaining = self._host_connections.get(host, 0) - connections
+        if remaining > 0:
+            self._host_connections[host] = remaining
+        else:
+            self._host_connections.pop(host, None)
+        self._unpark(host, connections)
+
+    def _unpark(self, host: str, count: int):
+        """
+        把等待主机名额的条目中排在最前面的几个放回队列（调用方需持有锁）
+
+        每个条目至少占用一个连接，放回的条目数不超过主机剩余的名额；
+        放回的条目出队时名额又已用完的，会再次移入等待堆。
+
+        Args:
+            host: 主机
+            count: 最多放回的条目数
+        """
+        parked = self._parked.get(host)
+        if not parked:
+            return
+
+        count = min(count, self._host_available(host))
+        while parked and count > 0:
+            entry = heapq.heappop(parked)
+            self._parked_count -= 1
+            if entry[4] is not self._REMOVED:
+                heapq.heappush(self._heap, entry)
+                count -= 1
+        if not parked:
+            del self._parked[host]
+
+    def _invalidate(self, task_id: str) -> bool:
+        """把任务的排队条目标记为失效（调用方需持有锁）"""
+        entry = self._entries.pop(task_id, None)
+        if entry is None:
+            return False
+
+        entry[4] = self._REMOVED
+        if entry[6] is not None:
+            # 从等待堆放回队列的条目失效，补放一个同一主机的条目
+            self._unpark(entry[6], 1)
+        # 失效条目过多时重建堆，避免长期占用内存
+        if len(self._heap) + self._parked_count > 2 * len(self._entries) + 64:
+            self._heap = [e for e in self._heap if e[4] is not self._REMOVED]
+            heapq.heapify(self._heap)
+            for host, parked in list(self._parked.items()):
+                parked[:] = [e for e in parked if e[4] is not self._REMOVED]
+                heapq.heapify(parked)
+                if not parked:
+                    del self._parked[host]
+            self._parked_count = sum(len(parked) for parked in self._parked.values())
+        return True
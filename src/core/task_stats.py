@@ -0,0 +1,126 @@
+"""
+任务统计模块
+增量维护各状态任务数、总下载速度和剩余字节数，供状态栏和外部监控读取
+"""
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Tuple
+
+from .download_task import DownloadTask
+
+
+@dataclass(frozen=True)
+class TaskStatsSnapshot:
+    """任务统计快照"""
+    total: int = 0  # 任务总数
+    counts: Dict[str, int] = field(default_factory=dict)  # 状态 -> 任务数
+    total_speed: float = 0.0  # 下载中任务的速度之和（字节/秒）
+    remaining_bytes: int = 0  # 未完成且大小已知的任务的剩余字节数
+
+    def count(self, status: str) -> int:
+        """
+        某个状态的任务数
+
+        Args:
+            status: 任务状态
+
+        Returns:
+            int: 任务数
+        """
+        return self.counts.get(status, 0)
+
+    def to_dict(self) -> dict:
+        """转换为字典"""
+        return {
+            'total': self.total,
+            'counts': dict(self.counts),
+            'total_speed': self.total_speed,
+            'remaining_bytes': self.remaining_bytes
+        }
+
+
+class TaskStats:
+    """任务统计（线程安全）
+
+    为每个任务记录上次计入的 (状态, 速度, 剩余字节数)，任务变化时减去旧值、
+    加上新值，每次更新都是 O(1)，读取时不需要遍历任务。
+    """
+
+    def __init__(self):
+        """初始化任务统计"""
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[str, float, int]] = {}  # task_id -> 计入的值
+        self._counts: Dict[str, int] = {}
+        self._speed = 0.0
+        self._remaining = 0
+
+    def update(self, task: DownloadTask):
+        """
+        添加任务或按任务当前状态更新统计
+
+        Args:
+            task: 下载任务
+        """
+        entry = self._entry(task)
+        with self._lock:
+            old = self._entries.get(task.task_id)
+            if old == entry:
+                return
+            if old is not None:
+                self._apply(old, -1)
+            self._entries[task.task_id] = entry
+            self._apply(entry, 1)
+
+    def update_many(self, tasks: Iterable[DownloadTask]):
+        """
+        批量更新统计
+
+        Args:
+            tasks: 下载任务
+        """
+        for task in tasks:
+            self.update(task)
+
+    def remove(self, task_id: str):
+        """
+        从统计中移除任务
+
+        Args:
+            task_id: 任务ID
+        """
+        with self._lock:
+            old = self._entries.pop(task_id, None)
+            if old is not None:
+                self._apply(old, -1)
+
+    def snapshot(self) -> TaskStatsSnapshot:
+        """
+        获取统计快照
+
+        Returns:
+            TaskStatsSnapshot: 统计快照
+        """
+        with self._lock:
+            return TaskStatsSnapshot(
+                total=len(self._entries),
+                counts={status: count for status, count in self._counts.items() if count},
+                total_speed=self._speed,
+                remaining_bytes=self._remaining
+            )
+
+    def _apply(self, entry: Tuple[str, float, int], sign: int):
+        """计入或减去一个任务的值（调用方需持有锁）"""
+        status, speed, remaining = entry
+        self._counts[status] = self._counts.get(status, 0) + sign
+        self._remaining += sign * remaining
+        self._speed += sign * speed
+        # 速度是浮点数，反复加减会累积误差；没有下载中的任务时归零
+        if not self._counts.get('downloading'):
+            self._speed = 0.0
+
+    @staticmethod
+    def _entry(task: DownloadTask) -> Tuple[str, float, int]:
+        """任务计入统计的值"""
+        speed = task.speed if task.status == 'downloading' else 0.0
+        remaining = task.remaining_size if task.total_size > 0 and task.status != 'completed' else 0
+        return task.status, speed, remaining
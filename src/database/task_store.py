@@ -0,0 +1,410 @@
+"""
+任务存储模块
+使用SQLite（WAL模式）持久化下载任务和分块进度
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..core.chunk_table import ChunkTable
+from ..core.download_task import DownloadTask
+from ..utils.logger import Logger
+
+
+# 任务表的列（顺序与 _task_row 一致）
+TASK_COLUMNS = (
+    'task_id', 'url', 'filename', 'save_path', 'total_size', 'downloaded_size',
+    'status', 'progress', 'speed', 'created_at', 'started_at', 'completed_at',
+    'error_message', 'retry_count', 'connections', 'priority', 'mirrors', 'checksum'
+)
+
+SCHEMA_VERSION = 4
+
+# 旧版本之后新增的任务表列（CREATE TABLE IF NOT EXISTS 不会修改已有的表，升级时逐列添加）
+ADDED_COLUMNS = (
+    ('mirrors', "TEXT NOT NULL DEFAULT '[]'"),  # 版本3
+    ('checksum', "TEXT NOT NULL DEFAULT ''"),  # 版本4
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    filename TEXT NOT NULL DEFAULT '',
+    save_path TEXT NOT NULL DEFAULT '',
+    total_size INTEGER NOT NULL DEFAULT 0,
+    downloaded_size INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'waiting',
+    progress REAL NOT NULL DEFAULT 0,
+    speed REAL NOT NULL DEFAULT 0,
+    created_at TEXT,
+    started_at TEXT,
+    completed_at TEXT,
+    error_message TEXT NOT NULL DEFAULT '',
+    retry_count INTEGER NOT NULL DEFAULT 0,
+    connections INTEGER NOT NULL DEFAULT 8,
+    priority INTEGER NOT NULL DEFAULT 0,
+    mirrors TEXT NOT NULL DEFAULT '[]',
+    checksum TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status_completed
+    ON tasks (status, completed_at, task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_active
+    ON tasks (created_at) WHERE status != 'completed';
+CREATE TABLE IF NOT EXISTS chunks (
+    task_id TEXT NOT NULL REFERENCES tasks (task_id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    start_pos INTEGER NOT NULL,
+    end_pos INTEGER NOT NULL,
+    downloaded INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (task_id, idx)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS commands (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    command TEXT NOT NULL,
+    args TEXT NOT NULL DEFAULT '{}',
+    created_at TEXT NOT NULL
+);
+"""
+
+
+class TaskStore:
+    """任务存储
+
+    每次保存只处理有修改记录的任务（DownloadTask.is_dirty），并且只写入与
+    上次保存（或加载）内容不同的任务行和分块行，所有改动在一个事务中批量提交。启动时只加载未完成的任务，
+    历史记录通过 load_history() 按完成时间分页读取（基于索引的键集分页，
+    不随历史记录数量变慢）。
+    
+    commands 表是其他进程（如命令行）发给守护进程的命令队列，见 push_command()。
+    """
+
+    def __init__(self, db_path: str):
+        """
+        初始化任务存储
+
+        Args:
+            db_path: 数据库文件路径
+        """
+        self.db_path = db_path
+        self.logger = Logger()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # 命令行和守护进程可能同时打开数据库，写锁被占用时最多等待10秒
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        self._init_schema()
+
+        # 最近一次写入（或读出）的行内容，用于只写入变化的行
+        self._saved_tasks: Dict[str, tuple] = {}
+        self._saved_chunks: Dict[str, List[tuple]] = {}
+
+    def save(self, tasks: Iterable[DownloadTask]) -> int:
+        """
+        保存任务（只写入有变化的任务和分块）
+
+        Args:
+            tasks: 任务列表，没有修改记录的任务会被跳过
+
+        Returns:
+            int: 实际写入的任务数
+        """
+        with self._lock:
+            tasks = [task for task in tasks if task.is_dirty]
+            if not tasks:
+                return 0
+
+            dirty = {task.task_id: task.pop_dirty() for task in tasks}
+            try:
+                return self._write(tasks)
+            except Exception:
+                # 写入失败，恢复修改记录等待下次保存
+                for task in tasks:
+                    task.mark_dirty(*dirty[task.task_id])
+                raise
+
+    def _write(self, tasks: List[DownloadTask]) -> int:
+        """把任务中与已保存内容不同的行写入数据库（调用方需持有锁）"""
+        task_rows = []
+        chunk_updates: List[Tuple[str, List[tuple], List[tuple]]] = []
+
+        for task in tasks:
+            row = self._task_row(task)
+            if self._saved_tasks.get(task.task_id) != row:
+                task_rows.append(row)
+
+            chunks = task.chunks.rows()
+            saved = self._saved_chunks.get(task.task_id, [])
+            if chunks != saved:
+                chunk_updates.append((task.task_id, chunks, saved))
+
+        if not task_rows and not chunk_updates:
+            return 0
+
+        placeholders = ', '.join('?' * len(TASK_COLUMNS))
+        updates = ', '.join(f'{column} = excluded.{column}' for column in TASK_COLUMNS[1:])
+
+        with self._conn:
+            self._conn.executemany(
+                f'INSERT INTO tasks ({", ".join(TASK_COLUMNS)}) VALUES ({placeholders}) '
+                f'ON CONFLICT (task_id) DO UPDATE SET {updates}',
+                task_rows
+            )
+
+            for task_id, chunks, saved in chunk_updates:
+                changed = [
+                    (task_id, index) + chunk
+                    for index, chunk in enumerate(chunks)
+                    if index >= len(saved) or saved[index] != chunk
+                ]
+                self._conn.executemany(
+                    'INSERT INTO chunks (task_id, idx, start_pos, end_pos, downloaded) VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT (task_id, idx) DO UPDATE SET start_pos = excluded.start_pos, '
+                    'end_pos = excluded.end_pos, downloaded = excluded.downloaded',
+                    changed
+                )
+                if len(chunks) < len(saved):
+                    self._conn.execute(
+                        'DELETE FROM chunks WHERE task_id = ? AND idx >= ?', (task_id, len(chunks))
+                    )
+
+        for row in task_rows:
+            self._saved_tasks[row[0]] = row
+        for task_id, chunks, _ in chunk_updates:
+            self._saved_chunks[task_id] = chunks
+
+        return len(task_rows)
+
+    def delete(self, task_id: str):
+        """
+        删除任务及其分块
+
+        Args:
+            task_id: 任务ID
+        """
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM tasks WHERE task_id = ?', (task_id,))
+        self._saved_tasks.pop(task_id, None)
+        self._saved_chunks.pop(task_id, None)
+
+    def load_active(self) -> List[DownloadTask]:
+        """
+        加载所有未完成的任务
+
+        Returns:
+            List[DownloadTask]: 任务列表（按创建时间排序）
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT {", ".join(TASK_COLUMNS)} FROM tasks '
+                f"WHERE status != 'completed' ORDER BY created_at"
+            ).fetchall()
+            chunk_rows = self._conn.execute(
+                'SELECT task_id, start_pos, end_pos, downloaded FROM chunks '
+                "WHERE task_id IN (SELECT task_id FROM tasks WHERE status != 'completed') "
+                'ORDER BY task_id, idx'
+            ).fetchall()
+
+        chunks: Dict[str, List[tuple]] = {}
+        for task_id, start, end, downloaded in chunk_rows:
+            chunks.setdefault(task_id, []).append((start, end, downloaded))
+
+        return [self._load_task(row, chunks.get(row[0], [])) for row in rows]
+
+    def load(self, task_id: str) -> Optional[DownloadTask]:
+        """
+        加载单个任务（包括分块）
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            Optional[DownloadTask]: 任务，不存在时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                f'SELECT {", ".join(TASK_COLUMNS)} FROM tasks WHERE task_id = ?', (task_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            chunks = self._conn.execute(
+                'SELECT start_pos, end_pos, downloaded FROM chunks WHERE task_id = ? ORDER BY idx',
+                (task_id,)
+            ).fetchall()
+
+        return self._load_task(row, chunks)
+
+    def find_task_ids(self, prefix: str) -> List[str]:
+        """
+        按前缀查找任务ID
+
+        Args:
+            prefix: 任务ID前缀
+
+        Returns:
+            List[str]: 匹配的任务ID
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT task_id FROM tasks WHERE task_id >= ? AND task_id < ? ORDER BY task_id',
+                (prefix, prefix + '\uffff')
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def push_command(self, command: str, **args) -> int:
+        """
+        添加一条待执行的命令
+
+        Args:
+            command: 命令名
+            **args: 命令参数（需可JSON序列化）
+
+        Returns:
+            int: 命令ID
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'INSERT INTO commands (command, args, created_at) VALUES (?, ?, ?)',
+                (command, json.dumps(args, ensure_ascii=False), datetime.now().isoformat())
+            )
+        return cursor.lastrowid
+
+    def pop_commands(self) -> List[Tuple[int, str, dict]]:
+        """
+        按提交顺序取出并删除所有待执行的命令
+
+        Returns:
+            List[Tuple[int, str, dict]]: (命令ID, 命令名, 参数)
+        """
+        with self._lock, self._conn:
+            rows = self._conn.execute('SELECT id, command, args FROM commands ORDER BY id').fetchall()
+            if rows:
+                self._conn.execute('DELETE FROM commands WHERE id <= ?', (rows[-1][0],))
+        return [(command_id, command, json.loads(args)) for command_id, command, args in rows]
+
+    def load_history(self, limit: int = 100, before: Optional[DownloadTask] = None) -> List[DownloadTask]:
+        """
+        按完成时间倒序分页读取已完成的任务
+
+        Args:
+            limit: 每页数量
+            before: 上一页的最后一个任务，为None时读取第一页
+
+        Returns:
+            List[DownloadTask]: 任务列表
+        """
+        columns = ', '.join(TASK_COLUMNS)
+        with self._lock:
+            if before is None:
+                rows = self._conn.execute(
+                    f"SELECT {columns} FROM tasks WHERE status = 'completed' "
+                    'ORDER BY completed_at DESC, task_id DESC LIMIT ?',
+                    (limit,)
+                ).fetchall()
+            else:
+                completed_at = before.completed_at.isoformat() if before.completed_at else ''
+                rows = self._conn.execute(
+                    f"SELECT {columns} FROM tasks WHERE status = 'completed' "
+                    'AND (completed_at, task_id) < (?, ?) '
+                    'ORDER BY completed_at DESC, task_id DESC LIMIT ?',
+                    (completed_at, before.task_id, limit)
+                ).fetchall()
+
+        # 已完成任务的分块信息没有用处，不读取
+        return [self._load_task(row, None) for row in rows]
+
+    def count(self, status: Optional[str] = None) -> int:
+        """
+        统计任务数量
+
+        Args:
+            status: 只统计该状态的任务，为None时统计全部
+
+        Returns:
+            int: 任务数量
+        """
+        with self._lock:
+            if status is None:
+                return self._conn.execute('SELECT COUNT(*) FROM tasks').fetchone()[0]
+            return self._conn.execute(
+                'SELECT COUNT(*) FROM tasks WHERE status = ?', (status,)
+            ).fetchone()[0]
+
+    def migrate_json(self, json_path: str) -> int:
+        """
+        导入旧版 tasks.json，导入后把文件重命名为 .migrated
+
+        Args:
+            json_path: tasks.json 路径
+
+        Returns:
+            int: 导入的任务数
+        """
+        if not os.path.exists(json_path):
+            return 0
+
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                tasks = [DownloadTask.from_dict(data) for data in json.load(f)]
+        except Exception as e:
+            self.logger.error(f"读取旧任务文件失败: {e}")
+            return 0
+
+        self.save(tasks)
+        os.replace(json_path, json_path + '.migrated')
+        self.logger.info(f"从 {json_path} 导入了 {len(tasks)} 个任务")
+        return len(tasks)
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    def _init_schema(self):
+        """创建表结构"""
+        version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+            columns = {row[1] for row in self._conn.execute('PRAGMA table_info(tasks)')}
+            for column, definition in ADDED_COLUMNS:
+                if column not in columns:
+                    self._conn.execute(f'ALTER TABLE tasks ADD COLUMN {column} {definition}')
+            self._conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    @staticmethod
+    def _task_row(task: DownloadTask) -> tuple:
+        """任务对象转换为任务表的一行"""
+        row = []
+        for column in TASK_COLUMNS:
+            value = getattr(task, column)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, list):
+                value = json.dumps(value, ensure_ascii=False)
+            row.append(value)
+        return tuple(row)
+
+    def _load_task(self, row: tuple, chunks: Optional[List[tuple]]) -> DownloadTask:
+        """任务表的一行转换为任务对象，并记录为已保存的内容"""
+        data = dict(zip(TASK_COLUMNS, row))
+        data['mirrors'] = json.loads(data['mirrors'] or '[]')
+        data['chunks'] = ChunkTable.from_rows(chunks or [])
+        task = DownloadTask.from_dict(data)
+        task.pop_dirty()
+
+        if chunks is not None:
+            self._saved_tasks[task.task_id] = row
+            self._saved_chunks[task.task_id] = list(chunks)
+        return task
@@ -5,11 +5,11 @@
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QToolBar, QStatusBar, QMenuBar, QMenu, QMessageBox,
-    QScrollArea, QLabel, QPushButton, QFileDialog
+    QListView, QAbstractItemView, QLabel, QPushButton, QFileDialog
 )
-from PySide6.QtCore import Qt, Signal, QTimer
-from PySide6.QtGui import QAction, QIcon, QKeySequence
-from typing import List, Optional
+from PySide6.QtCore import Qt, Signal, QTimer, QUrl
+from PySide6.QtGui import QAction, QIcon, QKeySequence, QDesktopServices
+from typing import Dict, List, Optional
 import os
 
 from ..core.download_task import DownloadTask
@@ -20,7 +20,8 @@ from ..utils.helpers import format_size, format_speed
 from ..utils.icon_manager import IconManager
 from .add_download_dialog import AddDownloadDialog
 from .settings_dialog import SettingsDialog
-from .download_item import DownloadItem
+from .task_list_model import TaskListModel
+from .task_item_delegate import TaskItemDelegate
 
 
 class MainWindow(QMainWindow):
@@ -31,7 +32,8 @@ class MainWindow(QMainWindow):
         self.config = ConfigManager()
         self.logger = Logger()
         self.download_manager = DownloadManager()
-        self.download_items = {}  # 存储下载项UI组件
+        self.task_model = TaskListModel(self)  # 下载列表模型
+        self._shown_status: Dict[str, str] = {}  # 列表中各任务最近一次重绘时的状态
         
         self._init_ui()
         self._create_actions()
@@ -62,20 +64,17 @@ class MainWindow(QMainWindow):
         main_layout.setContentsMargins(0, 0, 0, 0)
         main_layout.setSpacing(0)
         
-        # 创建滚动区域用于显示下载列表
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        
-        # 下载列表容器
-        self.download_list_widget = QWidget()
-        self.download_list_layout = QVBoxLayout(self.download_list_widget)
-        self.download_list_layout.setContentsMargins(5, 5, 5, 5)
-        self.download_list_layout.setSpacing(5)
-        self.download_list_layout.addStretch()
-        
-        scroll_area.setWidget(self.download_list_widget)
-        main_layout.addWidget(scroll_area)
+        # 下载列表：模型/视图，由委托绘制可见的行
+        self.task_delegate = TaskItemDelegate(self)
+        self.download_list_view = QListView()
+        self.download_list_view.setModel(self.task_model)
+        self.download_list_view.setItemDelegate(self.task_delegate)
+        self.download_list_view.setUniformItemSizes(True)
+        self.download_list_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.download_list_view.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.download_list_view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.download_list_view.setMouseTracking(True)
+        main_layout.addWidget(self.download_list_view)
         
         # 如果没有下载任务，显示提示
         self.empty_label = QLabel("暂无下载任务\n点击「添加下载」开始")
@@ -87,7 +86,7 @@ class MainWindow(QMainWindow):
                 padding: 50px;
             }
         """)
-        self.download_list_layout.insertWidget(0, self.empty_label)
+        main_layout.addWidget(self.empty_label)
     
     def _create_actions(self):
         """创建动作"""
@@ -201,8 +200,23 @@ class MainWindow(QMainWindow):
         """连接信号"""
         # 连接下载管理器信号
         self.download_manager.task_added.connect(self._on_task_added)
+        self.download_manager.tasks_added.connect(self._on_tasks_added)
+        self.download_manager.import_finished.connect(self._on_import_finished)
         self.download_manager.task_removed.connect(self._on_task_removed)
         self.download_manager.task_updated.connect(self._on_task_updated)
+        # 进度按刷新周期批量重绘，相邻的行合并为一次 dataChanged
+        self.download_manager.tasks_updated.connect(self.task_model.update_tasks)
+        
+        # 连接列表项按钮信号
+        self.task_delegate.start_requested.connect(self.download_manager.start_task)
+        self.task_delegate.pause_requested.connect(self.download_manager.pause_task)
+        self.task_delegate.resume_requested.connect(self.download_manager.resume_task)
+        self.task_delegate.remove_requested.connect(self.download_manager.remove_task)
+        self.task_delegate.open_file_requested.connect(self._on_open_file)
+        
+        # 显示启动时已加载的任务
+        self.task_model.set_tasks(self.download_manager.get_all_tasks())
+        self._update_empty_state()
     
     def _load_settings(self):
         """加载设置"""
@@ -221,24 +235,20 @@ class MainWindow(QMainWindow):
     
     def _update_statusbar(self):
         """更新状态栏"""
-        # 获取所有任务
-        tasks = self.download_manager.get_all_tasks()
-        
-        # 统计任务数量
-        downloading = sum(1 for t in tasks if t.status == 'downloading')
-        completed = sum(1 for t in tasks if t.status == 'completed')
-        failed = sum(1 for t in tasks if t.status == 'failed')
-        paused = sum(1 for t in tasks if t.status == 'paused')
-        
-        # 计算总速度
-        total_speed = sum(t.speed for t in tasks if t.status == 'downloading')
+        stats = self.download_manager.get_stats()
+        downloading = stats.count('downloading')
         
         # 更新标签
-        self.task_count_label.setText(f"任务: {len(tasks)} (下载:{downloading} 完成:{completed} 失败:{failed} 暂停:{paused})")
-        self.speed_label.setText(f"速度: {format_speed(total_speed)}")
+        self.task_count_label.setText(
+            f"任务: {stats.total} (下载:{downloading} 完成:{stats.count('completed')} "
+            f"失败:{stats.count('failed')} 暂停:{stats.count('paused')})"
+        )
+        self.speed_label.setText(f"速度: {format_speed(stats.total_speed)}")
         
         if downloading > 0:
-            self.status_label.setText(f"正在下载 {downloading} 个任务")
+            self.status_label.setText(
+                f"正在下载 {downloading} 个任务，剩余 {format_size(stats.remaining_bytes)}"
+            )
         else:
             self.status_label.setText("就绪")
     
@@ -258,19 +268,28 @@ class MainWindow(QMainWindow):
             self, "选择URL列表文件", "", "文本文件 (*.txt);;所有文件 (*)"
         )
         if file_path:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    urls = [line.strip() for line in f if line.strip()]
-                
-                save_dir = self.config.get('general.download_directory')
-                for url in urls:
-                    self.download_manager.add_task(url, save_dir)
-                
-                self.logger.info(f"批量添加 {len(urls)} 个下载任务")
-                QMessageBox.information(self, "成功", f"已添加 {len(urls)} 个下载任务")
-            except Exception as e:
-                self.logger.error(f"批量添加失败: {e}")
-                QMessageBox.critical(self, "错误", f"批量添加失败: {e}")
+            # 在后台逐行解析并分批添加，结束时由 _on_import_finished 提示结果
+            save_dir = self.config.get('general.download_directory') or self.config.get_download_path()
+            self.download_manager.import_urls(file_path, save_dir)
+            self.status_label.setText("正在导入URL列表...")
+            self.logger.info(f"开始批量导入: {file_path}")
+    
+    def _on_import_finished(self, result):
+        """批量导入结束事件"""
+        if result.cancelled:
+            return
+        
+        message = f"已添加 {result.added} 个下载任务"
+        skipped = [
+            f"{text} {count} 个" for text, count in (
+                ("重复", result.duplicates), ("无效链接", result.invalid), ("文件已存在", result.failed)
+            ) if count
+        ]
+        if skipped:
+            message += "，跳过" + "、".join(skipped)
+        
+        self.logger.info(f"批量导入完成: {message}")
+        QMessageBox.information(self, "批量添加", message)
     
     def _on_start_all(self):
         """开始所有任务"""
@@ -326,38 +345,50 @@ class MainWindow(QMainWindow):
     
     def _on_task_added(self, task: DownloadTask):
         """任务添加事件"""
-        # 隐藏空提示
-        if self.empty_label.isVisible():
-            self.empty_label.hide()
-        
-        # 创建下载项UI
-        download_item = DownloadItem(task)
-        self.download_items[task.task_id] = download_item
+        # 添加到列表模型
+        self.task_model.add_task(task)
+        self._update_empty_state()
         
-        # 添加到列表
-        count = self.download_list_layout.count()
-        self.download_list_layout.insertWidget(count - 1, download_item)  # 插入到stretch之前
+        self.logger.debug(f"任务已添加到界面: {task.filename}")
+    
+    def _on_tasks_added(self, tasks: list):
+        """批量添加任务事件（一次插入所有行）"""
+        self.task_model.add_tasks(tasks)
+        self._update_empty_state()
         
-        self.logger.info(f"任务已添加到界面: {task.filename}")
+        self.logger.debug(f"{len(tasks)} 个任务已添加到界面")
     
     def _on_task_removed(self, task_id: str):
         """任务移除事件"""
-        if task_id in self.download_items:
-            item = self.download_items[task_id]
-            self.download_list_layout.removeWidget(item)
-            item.deleteLater()
-            del self.download_items[task_id]
-            
+        self._shown_status.pop(task_id, None)
+        if self.task_model.remove_task(task_id):
             # 如果没有任务了，显示空提示
-            if not self.download_items:
-                self.empty_label.show()
+            self._update_empty_state()
             
             self.logger.info(f"任务已从界面移除: {task_id}")
     
+    def _update_empty_state(self):
+        """没有任务时显示空提示，否则显示下载列表"""
+        empty = self.task_model.rowCount() == 0
+        self.empty_label.setVisible(empty)
+        self.download_list_view.setVisible(not empty)
+    
     def _on_task_updated(self, task: DownloadTask):
-        """任务更新事件"""
-        if task.task_id in self.download_items:
-            self.download_items[task.task_id].update_task(task)
+        """任务更新事件（只在状态变化时重绘该任务所在的行，进度由 tasks_updated 批量重绘）"""
+        if self._shown_status.get(task.task_id) == task.status:
+            return
+        self._shown_status[task.task_id] = task.status
+        self.task_model.update_tasks([task])
+    
+    def _on_open_file(self, task_id: str):
+        """打开已下载的文件"""
+        task = self.download_manager.get_task(task_id)
+        if task is None:
+            return
+        
+        file_path = os.path.join(task.save_path, task.filename)
+        if not QDesktopServices.openUrl(QUrl.fromLocalFile(file_path)):
+            QMessageBox.warning(self, "提示", f"无法打开文件: {file_path}")
     
     def closeEvent(self, event):
         """关闭事件"""
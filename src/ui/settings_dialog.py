@@ -11,6 +11,7 @@ from PySide6.QtCore import Qt
 import os
 
 from ..utils.config import ConfigManager
+from ..core.rate_limiter import get_rate_limiter
 
 
 class SettingsDialog(QDialog):
@@ -313,7 +314,10 @@ class SettingsDialog(QDialog):
         self.config.set('speed.per_task_limit_kbps', self.task_limit_input.value())
         
         # 保存到文件
-        self.config.save()
+        self.config.save_config()
+        
+        # 限速立即对运行中的任务生效
+        get_rate_limiter().apply_config(self.config)
     
     def _on_browse_download_dir(self):
         """浏览下载目录"""
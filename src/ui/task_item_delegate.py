@@ -0,0 +1,315 @@
+"""
+任务项绘制委托
+
+在 QListView 中直接绘制下载任务（文件信息、进度条、状态和控制按钮），
+不为每个任务创建控件，视图只绘制可见的行。
+"""
+
+import os
+from typing import Dict, List, Tuple
+
+from PySide6.QtWidgets import (
+    QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton,
+    QStyleOptionProgressBar, QStyleOptionViewItem
+)
+from PySide6.QtCore import QEvent, QModelIndex, QRect, QSize, Qt, Signal
+from PySide6.QtGui import QColor, QFont, QFontMetrics, QPainter, QPalette, QPixmap
+
+from src.core.download_task import DownloadTask
+from src.utils.helpers import format_size, format_speed, format_time
+from src.utils.icon_manager import IconManager
+from .task_list_model import TaskListModel
+
+
+# 状态 -> (状态文本, 状态颜色)
+STATUS_INFO = {
+    "waiting": ("等待中", "blue"),
+    "downloading": ("下载中", "green"),
+    "paused": ("已暂停", "orange"),
+    "completed": ("已完成", "darkgreen"),
+    "failed": ("失败", "red"),
+    "stopped": ("已停止", "gray")
+}
+
+
+class TaskItemDelegate(QStyledItemDelegate):
+    """任务项委托类
+
+    绘制单个下载任务，并处理行内开始/暂停、打开、删除按钮的点击。
+    文件类型图标和状态图标按扩展名和状态缓存为位图。
+    """
+
+    # 信号定义（与原 DownloadItem 组件一致）
+    start_requested = Signal(str)  # 开始下载请求(task_id)
+    pause_requested = Signal(str)  # 暂停下载请求(task_id)
+    resume_requested = Signal(str)  # 恢复下载请求(task_id)
+    remove_requested = Signal(str)  # 删除任务请求(task_id)
+    open_file_requested = Signal(str)  # 打开文件请求(task_id)
+
+    ROW_HEIGHT = 88
+    MARGIN = 8
+    ICON_SIZE = 32
+    BUTTON_WIDTH = 72
+    BUTTON_HEIGHT = 26
+    BUTTON_SPACING = 5
+    BUTTONS = ('action', 'open', 'remove')
+
+    def __init__(self, parent=None):
+        """初始化任务项委托
+
+        Args:
+            parent: 父对象
+        """
+        super().__init__(parent)
+
+        self._file_icons: Dict[str, QPixmap] = {}  # 扩展名 -> 位图
+        self._status_icons: Dict[str, QPixmap] = {}  # 状态 -> 位图
+        self._pressed: Tuple[str, str] = ('', '')  # (task_id, 按钮名)
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:
+        """每行固定高度"""
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex):
+        """绘制任务项
+
+        Args:
+            painter: 绘制器
+            option: 样式选项
+            index: 模型索引
+        """
+        task = index.data(TaskListModel.TaskRole)
+        if task is None:
+            super().paint(painter, option, index)
+            return
+
+        widget = option.widget
+        style = widget.style() if widget is not None else QApplication.style()
+
+        painter.save()
+
+        # 背景（选中、悬停）
+        background = QStyleOptionViewItem(option)
+        self.initStyleOption(background, index)
+        background.text = ""
+        style.drawControl(QStyle.CE_ItemViewItem, background, painter, widget)
+
+        rect = option.rect.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+        buttons = self._button_rects(option.rect)
+        text_left = rect.left() + self.ICON_SIZE + self.MARGIN
+        text_right = buttons[0][1].left() - self.MARGIN
+
+        # 文件类型图标
+        painter.drawPixmap(rect.left(), rect.top(), self._file_icon(task.filename))
+
+        # 文件名
+        name_font = QFont(option.font)
+        name_font.setBold(True)
+        name_metrics = QFontMetrics(name_font)
+        painter.setFont(name_font)
+        painter.setPen(option.palette.color(QPalette.Text))
+        name_rect = QRect(text_left, rect.top(), max(0, text_right - text_left), name_metrics.height())
+        painter.drawText(
+            name_rect, Qt.AlignLeft | Qt.AlignVCenter,
+            name_metrics.elidedText(task.filename, Qt.ElideMiddle, name_rect.width())
+        )
+
+        # URL
+        url_font = QFont(option.font)
+        url_font.setPointSizeF(max(1.0, option.font.pointSizeF() - 1))
+        url_metrics = QFontMetrics(url_font)
+        painter.setFont(url_font)
+        painter.setPen(QColor("gray"))
+        url_rect = QRect(text_left, name_rect.bottom() + 2, name_rect.width(), url_metrics.height())
+        painter.drawText(
+            url_rect, Qt.AlignLeft | Qt.AlignVCenter,
+            url_metrics.elidedText(task.url, Qt.ElideMiddle, url_rect.width())
+        )
+
+        # 进度条
+        progress = QStyleOptionProgressBar()
+        progress.rect = QRect(text_left, url_rect.bottom() + 4, rect.right() - text_left, 16)
+        progress.minimum = 0
+        progress.maximum = 1000
+        progress.progress = int(min(100.0, max(0.0, task.progress)) * 10)
+        progress.text = f"{task.progress:.1f}%"
+        progress.textVisible = True
+        progress.textAlignment = Qt.AlignCenter
+        progress.state = QStyle.State_Enabled | QStyle.State_Horizontal
+        progress.palette = option.palette
+        progress.fontMetrics = option.fontMetrics
+        style.drawControl(QStyle.CE_ProgressBar, progress, painter, widget)
+
+        # 状态图标和文本
+        info_top = progress.rect.bottom() + 4
+        info_height = max(16, option.fontMetrics.height())
+        painter.drawPixmap(text_left, info_top + (info_height - 16) // 2, self._status_icon(task.status))
+
+        painter.setFont(option.font)
+        status_text, status_color = self._status_info(task)
+        details = self._details_text(task)
+        details_width = option.fontMetrics.horizontalAdvance(details)
+        status_left = text_left + 16 + 4
+        status_rect = QRect(
+            status_left, info_top,
+            max(0, rect.right() - status_left - details_width - self.MARGIN), info_height
+        )
+        painter.setPen(QColor(status_color))
+        painter.drawText(
+            status_rect, Qt.AlignLeft | Qt.AlignVCenter,
+            option.fontMetrics.elidedText(status_text, Qt.ElideRight, status_rect.width())
+        )
+
+        # 大小、速度、剩余时间
+        painter.setPen(option.palette.color(QPalette.Text))
+        painter.drawText(
+            QRect(rect.right() - details_width, info_top, details_width, info_height),
+            Qt.AlignRight | Qt.AlignVCenter, details
+        )
+
+        # 控制按钮
+        for name, button_rect in buttons:
+            self._draw_button(painter, style, widget, task, name, button_rect)
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option: QStyleOptionViewItem, index: QModelIndex) -> bool:
+        """处理行内按钮的点击
+
+        Returns:
+            事件是否已被处理
+        """
+        if event.type() not in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease) \
+                or event.button() != Qt.LeftButton:
+            return super().editorEvent(event, model, option, index)
+
+        task = index.data(TaskListModel.TaskRole)
+        if task is None:
+            return False
+
+        hit = ''
+        position = event.position().toPoint()
+        for name, button_rect in self._button_rects(option.rect):
+            if button_rect.contains(position) and self._button_state(task, name)[2]:
+                hit = name
+                break
+
+        if event.type() == QEvent.MouseButtonPress:
+            self._pressed = (task.task_id, hit)
+            self._repaint(option)
+            return bool(hit)
+
+        pressed, self._pressed = self._pressed, ('', '')
+        self._repaint(option)
+        if not hit or pressed != (task.task_id, hit):
+            return False
+
+        self._trigger(task, hit)
+        return True
+
+    def _trigger(self, task: DownloadTask, name: str):
+        """发出按钮对应的请求信号"""
+        if name == 'remove':
+            self.remove_requested.emit(task.task_id)
+        elif name == 'open':
+            self.open_file_requested.emit(task.task_id)
+        elif task.status == "downloading":
+            self.pause_requested.emit(task.task_id)
+        elif task.status == "paused":
+            self.resume_requested.emit(task.task_id)
+        elif task.status in ("waiting", "stopped", "failed"):
+            self.start_requested.emit(task.task_id)
+
+    def _button_rects(self, row_rect: QRect) -> List[Tuple[str, QRect]]:
+        """计算行内按钮的位置（右上角，从左到右）"""
+        right = row_rect.right() - self.MARGIN
+        top = row_rect.top() + self.MARGIN
+        count = len(self.BUTTONS)
+        left = right - count * self.BUTTON_WIDTH - (count - 1) * self.BUTTON_SPACING + 1
+        return [
+            (name, QRect(left + i * (self.BUTTON_WIDTH + self.BUTTON_SPACING), top,
+                         self.BUTTON_WIDTH, self.BUTTON_HEIGHT))
+            for i, name in enumerate(self.BUTTONS)
+        ]
+
+    @staticmethod
+    def _button_state(task: DownloadTask, name: str) -> Tuple[str, str, bool]:
+        """按钮的 (图标名, 文本, 是否可用)"""
+        if name == 'remove':
+            return "delete", "删除", True
+        if name == 'open':
+            return "folder", "打开", task.status == "completed"
+        if task.status == "downloading":
+            return "pause", "暂停", True
+        if task.status == "completed":
+            return "start", "完成", False
+        return "start", "开始", True
+
+    def _draw_button(self, painter: QPainter, style, widget, task: DownloadTask, name: str, rect: QRect):
+        """绘制一个行内按钮"""
+        icon_name, text, enabled = self._button_state(task, name)
+
+        button = QStyleOptionButton()
+        button.rect = rect
+        button.text = text
+        button.icon = IconManager.get_icon(icon_name)
+        button.iconSize = QSize(16, 16)
+        button.state = QStyle.State_Enabled if enabled else QStyle.State_None
+        if self._pressed == (task.task_id, name):
+            button.state |= QStyle.State_Sunken
+        else:
+            button.state |= QStyle.State_Raised
+        style.drawControl(QStyle.CE_PushButton, button, painter, widget)
+
+    @staticmethod
+    def _repaint(option: QStyleOptionViewItem):
+        """重绘按钮所在的行（按下状态变化）"""
+        view = option.widget
+        if view is not None and hasattr(view, 'viewport'):
+            view.viewport().update(option.rect)
+
+    @staticmethod
+    def _status_info(task: DownloadTask) -> Tuple[str, str]:
+        """获取状态信息
+
+        Returns:
+            (状态文本, 状态颜色)
+        """
+        status_text, status_color = STATUS_INFO.get(task.status, ("未知", "black"))
+        if task.status == "failed" and task.error_message:
+            status_text = f"{status_text}: {task.error_message}"
+        return status_text, status_color
+
+    @staticmethod
+    def _details_text(task: DownloadTask) -> str:
+        """大小、速度和剩余时间"""
+        if task.total_size > 0:
+            size_text = f"大小: {format_size(task.downloaded_size)} / {format_size(task.total_size)}"
+        else:
+            size_text = "大小: 未知"
+
+        if task.status == "downloading" and task.speed > 0:
+            speed_text = f"速度: {format_speed(task.speed)}"
+            time_text = f"剩余: {format_time(int(task.eta))}" if task.total_size > 0 else "剩余: --"
+        else:
+            speed_text = "速度: --"
+            time_text = "剩余: --"
+
+        return f"{size_text}    {speed_text}    {time_text}"
+
+    def _file_icon(self, filename: str) -> QPixmap:
+        """按扩展名缓存的文件类型图标"""
+        ext = os.path.splitext(filename)[1].lower()
+        pixmap = self._file_icons.get(ext)
+        if pixmap is None:
+            pixmap = IconManager.get_file_type_icon(filename).pixmap(self.ICON_SIZE, self.ICON_SIZE)
+            self._file_icons[ext] = pixmap
+        return pixmap
+
+    def _status_icon(self, status: str) -> QPixmap:
+        """按状态缓存的状态图标"""
+        pixmap = self._status_icons.get(status)
+        if pixmap is None:
+            pixmap = IconManager.get_status_icon(status).pixmap(16, 16)
+            self._status_icons[status] = pixmap
+        return pixmap
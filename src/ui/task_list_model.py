@@ -0,0 +1,178 @@
+"""
+任务列表模型
+
+以 QAbstractListModel 的形式提供下载任务列表，配合 TaskItemDelegate 在 QListView 中显示。
+视图只为可见行调用 data() 和绘制，任务更新时只对变化的行发出 dataChanged。
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt
+
+from src.core.download_task import DownloadTask
+
+
+class TaskListModel(QAbstractListModel):
+    """任务列表模型类
+
+    每行对应一个下载任务，按添加顺序排列。
+    通过 TaskRole 取得任务对象，由委托负责绘制。
+    """
+
+    TaskRole = Qt.UserRole + 1  # 任务对象
+
+    def __init__(self, parent=None):
+        """初始化任务列表模型
+
+        Args:
+            parent: 父对象
+        """
+        super().__init__(parent)
+
+        self._tasks: List[DownloadTask] = []
+        self._rows: Dict[str, int] = {}  # task_id -> 行号
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """行数（列表模型没有子项）"""
+        if parent.isValid():
+            return 0
+        return len(self._tasks)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        """获取行数据
+
+        Args:
+            index: 模型索引
+            role: 数据角色
+
+        Returns:
+            对应角色的数据，不支持的角色返回None
+        """
+        if not index.isValid() or index.row() >= len(self._tasks):
+            return None
+
+        task = self._tasks[index.row()]
+        if role == self.TaskRole:
+            return task
+        if role == Qt.DisplayRole:
+            return task.filename
+        if role == Qt.ToolTipRole:
+            return task.url
+        return None
+
+    def task_at(self, index: QModelIndex) -> Optional[DownloadTask]:
+        """获取索引对应的任务
+
+        Args:
+            index: 模型索引
+
+        Returns:
+            下载任务，索引无效时返回None
+        """
+        if not index.isValid() or index.row() >= len(self._tasks):
+            return None
+        return self._tasks[index.row()]
+
+    def index_of(self, task_id: str) -> QModelIndex:
+        """获取任务所在行的索引
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            模型索引，任务不存在时返回无效索引
+        """
+        row = self._rows.get(task_id)
+        if row is None:
+            return QModelIndex()
+        return self.index(row, 0)
+
+    def set_tasks(self, tasks: Iterable[DownloadTask]):
+        """替换全部任务（重置模型）
+
+        Args:
+            tasks: 下载任务
+        """
+        self.beginResetModel()
+        self._tasks = []
+        self._rows = {}
+        for task in tasks:
+            if task.task_id not in self._rows:
+                self._rows[task.task_id] = len(self._tasks)
+                self._tasks.append(task)
+        self.endResetModel()
+
+    def add_task(self, task: DownloadTask):
+        """在末尾添加任务（已存在时按更新处理）
+
+        Args:
+            task: 下载任务
+        """
+        self.add_tasks([task])
+
+    def add_tasks(self, tasks: Iterable[DownloadTask]):
+        """在末尾批量添加任务，只发出一次行插入通知（已存在的任务按更新处理）
+
+        Args:
+            tasks: 下载任务
+        """
+        existing = []
+        new_tasks: Dict[str, DownloadTask] = {}
+        for task in tasks:
+            if task.task_id in self._rows:
+                existing.append(task)
+            else:
+                new_tasks[task.task_id] = task
+
+        if new_tasks:
+            first = len(self._tasks)
+            self.beginInsertRows(QModelIndex(), first, first + len(new_tasks) - 1)
+            for row, task in enumerate(new_tasks.values(), first):
+                self._tasks.append(task)
+                self._rows[task.task_id] = row
+            self.endInsertRows()
+
+        if existing:
+            self.update_tasks(existing)
+
+    def remove_task(self, task_id: str) -> bool:
+        """删除任务
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            任务是否存在
+        """
+        row = self._rows.get(task_id)
+        if row is None:
+            return False
+
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._tasks[row]
+        del self._rows[task_id]
+        for index in range(row, len(self._tasks)):
+            self._rows[self._tasks[index].task_id] = index
+        self.endRemoveRows()
+        return True
+
+    def update_tasks(self, tasks: Iterable[DownloadTask]):
+        """通知任务内容有变化，只对这些任务所在的行发出 dataChanged
+
+        相邻的行合并为一个区间，每个区间发出一次信号。
+
+        Args:
+            tasks: 有变化的任务
+        """
+        rows = sorted({self._rows[task.task_id] for task in tasks if task.task_id in self._rows})
+        if not rows:
+            return
+
+        first = last = rows[0]
+        for row in rows[1:]:
+            if row == last + 1:
+                last = row
+                continue
+            self.dataChanged.emit(self.index(first, 0), self.index(last, 0))
+            first = last = row
+        self.dataChanged.emit(self.index(first, 0), self.index(last, 0))
@@ -156,11 +156,79 @@ class ConfigManager:
                     'http': '',
                     'https': ''
                 },
-                'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+                'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+                'pool': {
+                    'max_connections_per_host': 32,
+                    'max_hosts': 64,
+                    'keepalive_timeout': 60
+                },
+                'async': {
+                    'max_connections': 1000
+                },
+                'probe': {
+                    'cache_ttl': 300,
+                    'cache_size': 4096,
+                    'workers': 8,
+                    'lookahead': 8
+                },
+                'host': {
+                    'max_connections': 16,
+                    'request_interval': 0.05
+                },
+                'adaptive': {
+                    'enabled': True,
+                    'initial': 2,
+                    'max_connections': 32,
+                    'window': 2.0,
+                    'marginal_gain': 0.5,
+                    'profile_ttl': 3600,
+                    'profile_size': 1024
+                },
+                'retry': {
+                    'task_budget': 20,
+                    'base_delay': 1.0,
+                    'max_delay': 30.0
+                }
+            },
+            'download': {
+                'engine': 'thread',
+                'max_total_connections': 32,
+                'progress_interval': 1.0,
+                'journal_interval': 2.0,
+                'min_split_size': 1048576,
+                'read_size': 65536,
+                'min_read_size': 16384,
+                'max_read_size': 1048576,
+                'write_buffer_size': 1048576,
+                'async_write_buffer_size': 262144,
+                'preallocate': True,
+                'fsync_policy': 'journal',
+                'fsync_interval_mb': 64,
+                'shutdown_timeout': 30.0,
+                'mirrors': {
+                    'slow_ratio': 3.0,
+                    'switch_after': 3.0,
+                    'cooldown': 5.0,
+                    'max_cooldown': 60.0,
+                    'smoothing': 0.3
+                },
+                'integrity': {
+                    'hash_interval': 0.5,
+                    'repair_rounds': 2,
+                    'workers': 0,
+                    'piece_size': 1048576,
+                    'piece_algorithm': 'sha1',
+                    'record_interval': 1.0
+                }
             },
             'speed': {
                 'global_limit': 0,
-                'per_task_limit': 0
+                'per_task_limit': 0,
+                'global_limit_enabled': False,
+                'global_limit_kbps': 0,
+                'per_task_limit_enabled': False,
+                'per_task_limit_kbps': 0,
+                'burst_seconds': 1.0
             },
             'ui': {
                 'theme': 'light',
@@ -169,7 +237,17 @@ class ConfigManager:
                     'height': 600
                 },
                 'show_tray_icon': True,
-                'minimize_to_tray': False
+                'minimize_to_tray': False,
+                'refresh_rate': 10
+            },
+            'control': {
+                'enabled': False,
+                'host': '127.0.0.1',
+                'port': 6801,
+                'token': '',
+                'allowed_roots': [],
+                'event_rate': 5,
+                'timeout': 30.0
             },
             'notifications': {
                 'download_complete': True,
@@ -178,6 +256,7 @@ class ConfigManager:
             },
             'database': {
                 'path': '~/.pydownloader/downloads.db',
+                'flush_interval': 5.0,
                 'auto_cleanup_days': 0
             },
             'logging': {
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+任务模型内存基准测试
+对比旧实现（数据类 + 分块字典列表）与 __slots__ 任务 + 分块表的内存占用和分块访问开销
+
+用法: python tests/benchmark_memory.py [--tasks 20000] [--chunks 8]
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.download_task import DownloadTask
+
+
+@dataclass
+class LegacyTask:
+    """旧实现：普通数据类，分块为字典列表"""
+    task_id: str
+    url: str
+    filename: str = ""
+    save_path: str = ""
+    total_size: int = 0
+    downloaded_size: int = 0
+    status: str = "waiting"
+    progress: float = 0.0
+    speed: float = 0.0
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    error_message: str = ""
+    retry_count: int = 0
+    connections: int = 8
+    priority: int = 0
+    chunks: List[dict] = field(default_factory=list)
+
+
+def make_chunks(total_size, count):
+    """与 calculate_chunks 相同的等分方式"""
+    chunk_size = total_size // count
+    return [
+        {
+            'start': i * chunk_size,
+            'end': total_size - 1 if i == count - 1 else (i + 1) * chunk_size - 1,
+            'downloaded': 0
+        }
+        for i in range(count)
+    ]
+
+
+def build(task_cls, tasks, chunks):
+    """创建任务并返回 (任务列表, 占用字节数)"""
+    tracemalloc.start()
+    result = [
+        task_cls(
+            task_id=f'{i:08x}', url=f'http://example.com/file{i}.bin',
+            filename=f'file{i}.bin', save_path='/tmp', total_size=1 << 30,
+            chunks=make_chunks(1 << 30, chunks)
+        )
+        for i in range(tasks)
+    ]
+    # 临时的分块字典在转换后已释放，当前占用即为任务常驻内存
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def touch_dicts(task_list, rounds):
+    """模拟下载循环中更新分块进度（字典写法），返回耗时（秒）"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for task in task_list:
+            for chunk in task.chunks:
+                chunk['downloaded'] += 1
+    return time.perf_counter() - start
+
+
+def touch_views(task_list, rounds):
+    """模拟下载循环中更新分块进度（下载器中的属性写法），返回耗时（秒）"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for task in task_list:
+            for chunk in task.chunks:
+                chunk.downloaded += 1
+    return time.perf_counter() - start
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="任务模型内存基准测试")
+    parser.add_argument('--tasks', type=int, default=20000, help="任务数量")
+    parser.add_argument('--chunks', type=int, default=8, help="每个任务的分块数")
+    parser.add_argument('--rounds', type=int, default=3, help="分块访问轮数")
+    args = parser.parse_args()
+
+    print(f"{args.tasks} 个任务, 每个任务 {args.chunks} 个分块")
+    cases = (
+        ("数据类+字典", LegacyTask, touch_dicts),
+        ("slots+分块表", DownloadTask, touch_views),
+    )
+    for name, task_cls, touch in cases:
+        task_list, used = build(task_cls, args.tasks, args.chunks)
+        elapsed = touch(task_list, args.rounds)
+        accesses = args.tasks * args.chunks * args.rounds
+        print(f"{name:<10} 内存: {used / 1024 ** 2:8.1f} MB ({used / args.tasks:6.0f} B/任务)"
+              f"   分块更新: {elapsed / accesses * 1e9:6.0f} ns/次")
+        del task_list
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+进度统计微基准测试
+对比旧实现（每次读取加锁 + 字典求和）与分槽计数器的每GB CPU开销
+
+用法: python tests/benchmark_progress.py [--gb 1] [--threads 8] [--read-size 8192]
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.progress_counter import ProgressCounter
+
+
+class LockedAccounting:
+    """旧实现：每次读取都加锁、更新字典并检查是否需要上报"""
+
+    def __init__(self, threads):
+        self.lock = threading.Lock()
+        self.downloaded_chunks = {}
+        self.last_update_time = time.time()
+        self.reports = 0
+
+    def worker(self, index, chunk, reads, read_size):
+        for _ in range(reads):
+            with self.lock:
+                chunk['downloaded'] = chunk.get('downloaded', 0) + read_size
+                self.downloaded_chunks[index] = chunk['downloaded']
+                self._update_progress()
+
+    def _update_progress(self):
+        current_time = time.time()
+        if current_time - self.last_update_time >= 1.0:
+            sum(self.downloaded_chunks.values())
+            self.last_update_time = current_time
+            self.reports += 1
+
+    def finish(self):
+        pass
+
+
+class SlotAccounting:
+    """新实现：线程独占计数槽位，由上报线程定期汇总"""
+
+    def __init__(self, threads):
+        self.counter = ProgressCounter(threads)
+        self.reports = 0
+        self._done = threading.Event()
+        self._reporter = threading.Thread(target=self._report_loop, daemon=True)
+        self._reporter.start()
+
+    def worker(self, index, chunk, reads, read_size):
+        counter = self.counter
+        for _ in range(reads):
+            chunk['downloaded'] += read_size
+            counter.add(index, read_size)
+
+    def _report_loop(self):
+        while not self._done.wait(1.0):
+            self.counter.total()
+            self.reports += 1
+
+    def finish(self):
+        self._done.set()
+        self._reporter.join()
+
+
+def run(accounting_cls, total_bytes, threads, read_size):
+    """运行一次基准测试，返回 (CPU秒, 墙钟秒)"""
+    reads_per_thread = total_bytes // read_size // threads
+    accounting = accounting_cls(threads)
+    chunks = [{'start': 0, 'end': 0, 'downloaded': 0} for _ in range(threads)]
+    workers = [
+        threading.Thread(target=accounting.worker, args=(i, chunks[i], reads_per_thread, read_size))
+        for i in range(threads)
+    ]
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    accounting.finish()
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    assert sum(chunk['downloaded'] for chunk in chunks) == reads_per_thread * read_size * threads
+    return cpu, wall
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="进度统计微基准测试")
+    parser.add_argument('--gb', type=float, default=1.0, help="模拟下载的数据量（GB）")
+    parser.add_argument('--threads', type=int, default=8, help="工作线程数")
+    parser.add_argument('--read-size', type=int, default=8192, help="每次读取的字节数")
+    args = parser.parse_args()
+
+    total_bytes = int(args.gb * 1024 ** 3)
+    gb = total_bytes / 1024 ** 3
+
+    print(f"模拟 {gb:.2f} GB, {args.threads} 线程, 每次读取 {args.read_size} 字节")
+    for name, accounting_cls in (("加锁+字典求和", LockedAccounting), ("分槽计数器", SlotAccounting)):
+        cpu, wall = run(accounting_cls, total_bytes, args.threads, args.read_size)
+        print(f"{name:<12} CPU: {cpu / gb * 1000:8.1f} ms/GB   墙钟: {wall / gb * 1000:8.1f} ms/GB")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
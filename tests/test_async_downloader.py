@@ -0,0 +1,241 @@
+"""
+异步下载器测试
+"""
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.async_downloader import AsyncDownloader, get_async_engine, shutdown_async_engine
+from src.core.download_engine import DownloadEngine
+from src.core.download_task import DownloadTask
+from src.core.host_limiter import HostLimiter
+from src.core.progress_journal import ProgressJournal
+from src.database.task_store import TaskStore
+
+
+DATA = bytes(range(256)) * 16384  # 4 MB
+
+
+def _serve(delay: float = 0.01, ranges: bool = True):
+    """本地服务器（每发送128KB等待 delay 秒），ranges 为False时不返回大小、不支持Range请求"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_HEAD(self):
+            self.send_response(200)
+            if ranges:
+                self.send_header('Content-Length', str(len(DATA)))
+                self.send_header('Accept-Ranges', 'bytes')
+            else:
+                self.send_header('Connection', 'close')
+            self.end_headers()
+
+        def do_GET(self):
+            start, end = 0, len(DATA) - 1
+            if not ranges:
+                self.close_connection = True
+                self.send_response(200)
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                try:
+                    self.wfile.write(DATA)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                return
+            if self.headers.get('Range'):
+                first, last = self.headers['Range'].split('=')[1].split('-')
+                start, end = int(first), min(int(last or end), end)
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{len(DATA)}')
+            else:
+                self.send_response(200)
+            self.send_header('Content-Length', str(end - start + 1))
+            self.end_headers()
+            try:
+                for offset in range(start, end + 1, 131072):
+                    self.wfile.write(DATA[offset:min(offset + 131072, end + 1)])
+                    time.sleep(delay)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _wait_progress(task: DownloadTask, timeout: float = 10.0):
+    """等待任务上报进度"""
+    deadline = time.monotonic() + timeout
+    while task.downloaded_size == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert task.downloaded_size > 0
+
+
+def test_async_download_completes(tmp_path):
+    server = _serve()
+    try:
+        for name in ('chunked.bin', 'single.bin'):
+            task = DownloadTask(url=f'http://127.0.0.1:{server.server_port}/{name}', save_path=str(tmp_path))
+            AsyncDownloader(task).start()
+            assert task.status == 'completed', task.error_message
+            assert (tmp_path / name).read_bytes() == DATA
+
+        single = _serve(ranges=False)
+        try:
+            task = DownloadTask(url=f'http://127.0.0.1:{single.server_port}/stream.bin', save_path=str(tmp_path))
+            AsyncDownloader(task).start()
+            assert task.status == 'completed', task.error_message
+            assert (tmp_path / 'stream.bin').read_bytes() == DATA
+        finally:
+            single.shutdown()
+            single.server_close()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert sorted(os.listdir(tmp_path)) == ['chunked.bin', 'single.bin', 'stream.bin']
+
+
+def test_verification_runs_off_the_event_loop(tmp_path):
+    server = _serve()
+    try:
+        task = DownloadTask(url=f'http://127.0.0.1:{server.server_port}/data.bin', save_path=str(tmp_path))
+        downloader = AsyncDownloader(task)
+        threads = []
+        verify = downloader._verify_download
+        downloader._verify_download = lambda: threads.append(threading.current_thread()) or verify()
+        downloader.start()
+
+        # 校验在线程池中进行，不阻塞事件循环上的其他下载
+        assert task.status == 'completed', task.error_message
+        assert len(threads) == 1 and threads[0] is not downloader.engine._thread
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_async_download_pauses_and_resumes(tmp_path):
+    server = _serve(delay=0.1)
+    try:
+        task = DownloadTask(url=f'http://127.0.0.1:{server.server_port}/data.bin', save_path=str(tmp_path))
+        downloader = AsyncDownloader(task)
+        future = downloader.submit()
+        _wait_progress(task)
+        downloader.pause()
+        future.result(10)
+
+        assert task.status == 'paused'
+        assert 0 < task.downloaded_size < len(DATA)
+        assert (tmp_path / 'data.bin.tmp').exists() and not (tmp_path / 'data.bin').exists()
+
+        # 从进度日志恢复，只下载剩余部分
+        resumed = AsyncDownloader(task)
+        resumed.start()
+        assert task.status == 'completed', task.error_message
+        assert (tmp_path / 'data.bin').read_bytes() == DATA
+        assert not (tmp_path / 'data.bin.tmp').exists()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_async_engine_restarts_after_shutdown(tmp_path):
+    server = _serve(delay=0.1)
+    try:
+        task = DownloadTask(url=f'http://127.0.0.1:{server.server_port}/data.bin', save_path=str(tmp_path))
+        downloader = AsyncDownloader(task)
+        future = downloader.submit()
+        _wait_progress(task)
+        downloader.stop()
+        future.result(10)
+        shutdown_async_engine()
+        assert downloader.engine.loop.is_running() is False
+
+        # 关闭后再创建的下载器使用新的事件循环
+        resumed = AsyncDownloader(task)
+        assert resumed.engine is get_async_engine() and resumed.engine is not downloader.engine
+        resumed.start()
+        assert task.status == 'completed', task.error_message
+        assert (tmp_path / 'data.bin').read_bytes() == DATA
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_single_download_paused_while_waiting_for_host_leaves_no_file(tmp_path):
+    server = _serve(ranges=False)
+    try:
+        host = f'127.0.0.1:{server.server_port}'
+        hosts = HostLimiter(max_connections=1)
+        assert hosts.reserve(host) == 0  # 名额被其他下载占用
+
+        task = DownloadTask(url=f'http://{host}/stream.bin', save_path=str(tmp_path))
+        downloader = AsyncDownloader(task)
+        downloader.hosts = hosts
+        future = downloader.submit()
+        time.sleep(0.5)
+        downloader.pause()
+        future.result(10)
+
+        assert task.status == 'paused'
+        assert not (tmp_path / 'stream.bin').exists()
+        assert hosts.active(host) == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _async_engine(db_path: str) -> DownloadEngine:
+    """使用异步下载器的引擎"""
+    engine = DownloadEngine(db_path)
+    engine.executor.shutdown()
+    engine.executor = None
+    engine.engine = 'async'
+    return engine
+
+
+def test_shutdown_waits_for_paused_async_download(tmp_path):
+    server = _serve(delay=0.25)
+    db_path = str(tmp_path / 'tasks.db')
+    engine = _async_engine(db_path)
+    try:
+        task = engine.add_task(f'http://127.0.0.1:{server.server_port}/data.bin', str(tmp_path))
+        deadline = time.monotonic() + 10
+        while task.downloaded_size == 0 and time.monotonic() < deadline:
+            engine.run_once(0.05)
+        assert task.status == 'downloading' and task.downloaded_size > 0
+
+        # 暂停后立即关闭：下载协程还没退出，关闭时要等它保存最终进度
+        engine.pause_task(task.task_id)
+        engine.shutdown()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    store = TaskStore(db_path)
+    try:
+        saved = store.load(task.task_id)
+    finally:
+        store.close()
+    assert saved.status == 'paused'
+
+    temp_file = str(tmp_path / 'data.bin.tmp')
+    chunks = ProgressJournal(temp_file).load(task.url, len(DATA))
+    assert chunks is not None
+    assert saved.downloaded_size == sum(chunk['downloaded'] for chunk in chunks) > 0
+    assert [chunk['downloaded'] for chunk in saved.chunks] == [chunk['downloaded'] for chunk in chunks]
+    with open(temp_file, 'rb') as f:
+        for chunk in chunks:
+            f.seek(chunk['start'])
+            assert f.read(chunk['downloaded']) == DATA[chunk['start']:chunk['start'] + chunk['downloaded']]
+    assert not os.path.exists(tmp_path / 'data.bin')
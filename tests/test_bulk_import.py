@@ -0,0 +1,70 @@
+"""
+批量导入测试
+"""
+import io
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.bulk_import import BulkImporter, iter_urls, normalize_url
+from src.core.download_engine import DownloadEngine
+
+
+class _HeadHandler(BaseHTTPRequestHandler):
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '1234')
+        self.send_header('Content-Disposition', f'attachment; filename="file-{self.path[-1]}.bin"')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_normalize_url_and_lazy_parse():
+    assert normalize_url('HTTP://Example.COM:80/a?x=1#top') == 'http://example.com/a?x=1'
+    assert normalize_url('https://example.com') == 'https://example.com/'
+    assert normalize_url('http://example.com:8080/a') == 'http://example.com:8080/a'
+
+    lines = iter(['# list\n', '\n', ' http://a/1 \n', 'http://a/2\n'])
+    urls = iter_urls(lines)
+    assert next(urls) == 'http://a/1'
+    assert next(lines) == 'http://a/2\n'  # 只读取到需要的行
+
+
+def test_import_dedupes_batches_and_fetches_metadata(tmp_path):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _HeadHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+
+    engine = DownloadEngine(str(tmp_path / 'tasks.db'))
+    engine.scheduler.max_tasks = 0  # 只排队，不发起下载
+    batches, results = [], []
+    engine.tasks_added.connect(lambda tasks: batches.append(len(tasks)))
+
+    source = io.StringIO('\n'.join([
+        '# exported list', f'{base}/dl?id=1', f'{base}/dl?id=2', 'not a url',
+        f'{base.upper().replace("HTTP", "http")}/dl?id=1#again', f'{base}/dl?id=3',
+    ]))
+    importer = BulkImporter(engine, str(tmp_path))
+    importer.batch_size = 2
+    importer.finished.connect(results.append)
+    importer.start(source)
+    try:
+        while not results:
+            engine.run_once(0.05)
+    finally:
+        engine.shutdown()
+        server.shutdown()
+
+    result = results[0]
+    assert (result.added, result.duplicates, result.invalid, result.failed) == (3, 1, 1, 0)
+    assert batches == [2, 1]
+    tasks = sorted(engine.get_all_tasks(), key=lambda task: task.url)
+    assert [task.filename for task in tasks] == ['file-1.bin', 'file-2.bin', 'file-3.bin']
+    assert all(task.total_size == 1234 for task in tasks)
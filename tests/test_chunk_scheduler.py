@@ -0,0 +1,67 @@
+"""
+分块调度器测试
+"""
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.chunk_scheduler import ChunkScheduler
+
+MB = 1048576
+
+
+def test_hands_out_pending_chunks_first():
+    chunks = [
+        {'start': 0, 'end': MB - 1, 'downloaded': MB},
+        {'start': MB, 'end': 2 * MB - 1, 'downloaded': 0},
+    ]
+    scheduler = ChunkScheduler(chunks, min_piece_size=MB)
+
+    assert scheduler.next_chunk() == 1
+
+
+def test_idle_worker_steals_second_half_of_largest_chunk():
+    chunks = [
+        {'start': 0, 'end': 8 * MB - 1, 'downloaded': 2 * MB},
+        {'start': 8 * MB, 'end': 10 * MB - 1, 'downloaded': 0},
+    ]
+    scheduler = ChunkScheduler(chunks, min_piece_size=MB)
+    assert scheduler.next_chunk() == 0
+    assert scheduler.next_chunk() == 1
+
+    stolen = scheduler.next_chunk()
+
+    assert stolen == 2
+    assert chunks[0] == {'start': 0, 'end': 5 * MB - 1, 'downloaded': 2 * MB}
+    assert chunks[2] == {'start': 5 * MB, 'end': 8 * MB - 1, 'downloaded': 0}
+
+
+def test_stops_splitting_below_min_piece_size():
+    chunks = [{'start': 0, 'end': 3 * MB - 1, 'downloaded': 2 * MB}]
+    scheduler = ChunkScheduler(chunks, min_piece_size=MB)
+    assert scheduler.next_chunk() == 0
+
+    assert scheduler.next_chunk() is None
+
+
+def test_failed_chunk_is_not_reassigned():
+    chunks = [{'start': 0, 'end': MB - 1, 'downloaded': 0}]
+    scheduler = ChunkScheduler(chunks, min_piece_size=MB)
+    index = scheduler.next_chunk()
+
+    scheduler.release(index, failed=True)
+
+    assert scheduler.next_chunk() is None
+
+
+def test_paused_chunk_is_reassigned():
+    chunks = [{'start': 0, 'end': MB - 1, 'downloaded': 10}]
+    scheduler = ChunkScheduler(chunks, min_piece_size=MB)
+    index = scheduler.next_chunk()
+
+    scheduler.release(index)
+
+    assert scheduler.next_chunk() == index
@@ -0,0 +1,49 @@
+"""
+分块表与任务模型测试
+"""
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.chunk_table import ChunkTable
+from src.core.download_task import DownloadTask
+
+
+CHUNKS = [
+    {'start': 0, 'end': 99, 'downloaded': 40},
+    {'start': 100, 'end': 199, 'downloaded': 0},
+]
+
+
+def test_rows_behave_like_chunk_dicts():
+    table = ChunkTable(CHUNKS)
+
+    table[0]['downloaded'] += 10
+    table[1].downloaded = 5
+
+    assert table[0].downloaded == 50
+    assert table[-1].get('end') == 199
+    assert dict(table[1]) == {'start': 100, 'end': 199, 'downloaded': 5}
+    assert table.total_downloaded() == 55
+    assert table[:1] == [{'start': 0, 'end': 99, 'downloaded': 50}]
+
+
+def test_task_round_trips_through_dict():
+    task = DownloadTask(url='http://example.com/a.bin', save_path='/tmp', chunks=CHUNKS)
+
+    assert isinstance(task.chunks, ChunkTable)
+    assert task.filename == 'a.bin'
+    assert task.to_dict()['chunks'] == CHUNKS
+    assert DownloadTask.from_dict(task.to_dict()) == task
+
+
+def test_task_has_no_instance_dict():
+    task = DownloadTask(url='http://example.com/a.bin')
+
+    assert not hasattr(task, '__dict__')
+    task.pop_dirty()
+    task.chunks = CHUNKS
+    assert task.pop_dirty() == {'chunks'}
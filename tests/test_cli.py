@@ -0,0 +1,89 @@
+"""
+命令行测试
+"""
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src import cli
+from src.core.download_task import DownloadTask
+from src.database.task_store import TaskStore
+
+
+DATA = bytes(range(256)) * 1024
+
+
+class _FileHandler(BaseHTTPRequestHandler):
+    """返回固定内容的文件（不支持Range请求）"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(DATA)))
+        self.end_headers()
+
+    def do_GET(self):
+        self.do_HEAD()
+        self.wfile.write(DATA)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_headless_modules_do_not_import_qt():
+    code = (
+        "import sys\n"
+        "import src.cli, src.core.download_engine\n"
+        "assert not [m for m in sys.modules if m.startswith(('PySide6', 'src.ui'))]\n"
+    )
+    subprocess.run([sys.executable, '-c', code], cwd=str(project_root), check=True)
+
+
+def test_add_and_control_commands_are_queued(tmp_path, capsys):
+    db = str(tmp_path / 'tasks.db')
+
+    assert cli.main(['--db', db, 'add', 'http://example.com/a.bin', '-d', str(tmp_path), '-p', '3']) == 0
+    store = TaskStore(db)
+    task_id = store.find_task_ids('')[0]
+    assert cli.main(['--db', db, 'pause', task_id[:6]]) == 0
+    assert cli.main(['--db', db, 'remove', 'nope']) == 1
+
+    task = store.load(task_id)
+    assert (task.filename, task.priority, task.status) == ('a.bin', 3, 'waiting')
+    commands = [(command, args) for _, command, args in store.pop_commands()]
+    assert commands == [('add', {'task_id': task_id}), ('pause', {'task_id': task_id})]
+    assert store.pop_commands() == []
+
+    capsys.readouterr()
+    assert cli.main(['--db', db, 'list']) == 0
+    assert 'a.bin' in capsys.readouterr().out
+
+
+def test_daemon_downloads_restored_queue_and_exits_when_idle(tmp_path):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FileHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    db = str(tmp_path / 'tasks.db')
+    try:
+        # 上次退出时仍在排队的任务（命令队列为空）
+        store = TaskStore(db)
+        store.save([DownloadTask(url=f'http://127.0.0.1:{server.server_port}/a.bin',
+                                 save_path=str(tmp_path), filename='a.bin', status='waiting')])
+        store.close()
+
+        subprocess.run(
+            [sys.executable, '-m', 'src.cli', '--db', db, 'daemon', '--exit-when-idle', '--poll-interval', '0.1'],
+            cwd=str(project_root), check=True, timeout=60, capture_output=True
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert (tmp_path / 'a.bin').read_bytes() == DATA
+    assert TaskStore(db).load_active() == []
@@ -0,0 +1,160 @@
+"""
+连接数自适应测试
+"""
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.connection_tuner import ConnectionTuner, HostProfile, HostProfiles, get_host_profiles
+from src.core.download_engine import DownloadEngine
+from src.utils.config import ConfigManager
+
+
+MB = 1048576
+DATA = bytes(range(256)) * 8192  # 2 MB
+
+
+def _run(tuner: ConnectionTuner, rate, seconds: float = 60.0):
+    """按 rate(连接数) 字节/秒模拟下载，每秒采样一次，返回经历过的连接数"""
+    downloaded, seen = 0, [tuner.limit]
+    for now in range(int(seconds)):
+        tuner.sample(downloaded, 10 ** 12, now=float(now))
+        if tuner.limit != seen[-1]:
+            seen.append(tuner.limit)
+        downloaded += int(rate(tuner.limit))
+    return seen
+
+
+def test_tuner_ramps_until_gain_flattens_and_remembers_host():
+    profiles = HostProfiles(ttl=60)
+    tuner = ConnectionTuner('http://fast.example/f', 32, profiles)
+    seen = _run(tuner, lambda c: min(c, 8) * MB)
+    assert seen == [2, 3, 4, 6, 9, 13, 9]
+    assert tuner.settled
+
+    profile = profiles.get('fast.example')
+    assert profile.connections == 9 and not profile.capped
+    assert profiles.suggest('fast.example', 8, 32) == 9
+    assert profiles.suggest('other.example', 8, 32) == 8
+
+    # 同一主机的下一个任务直接使用最佳连接数
+    again = ConnectionTuner('http://fast.example/g', 32, profiles)
+    assert again.limit == 9 and again.settled
+
+
+def test_tuner_backs_off_on_throttling_hosts():
+    profiles = HostProfiles(ttl=60)
+    # 超过4个连接后服务器限速，总吞吐量反而下降
+    tuner = ConnectionTuner('http://slow.example/f', 32, profiles)
+    assert _run(tuner, lambda c: c * MB if c <= 4 else 2 * MB)[-1] == 4
+    assert profiles.get('slow.example').connections == 4
+
+    # 到达上限时仍有增益，下次申请更多连接继续探测
+    tuner = ConnectionTuner('http://capped.example/f', 4, profiles)
+    _run(tuner, lambda c: c * MB)
+    assert tuner.limit == 4 and profiles.get('capped.example').capped
+    assert profiles.suggest('capped.example', 8, 32) == 8
+    assert not ConnectionTuner('http://capped.example/f', 8, profiles).settled
+
+    # 429/503 减少连接，同一窗口内只减少一次
+    tuner = ConnectionTuner('http://busy.example/f', 8, HostProfiles(ttl=60))
+    tuner.limit = 8
+    assert tuner.throttled(now=100.0) and tuner.limit == 6
+    assert not tuner.throttled(now=100.5) and tuner.limit == 6
+    assert not tuner.allows(6) and tuner.allows(5)
+
+
+def _serve():
+    """支持Range请求的本地服务器（慢速发送），返回 (服务器, 记录最大并发请求数的字典)"""
+    stats = {'active': 0, 'peak': 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(DATA)))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.end_headers()
+
+        def do_GET(self):
+            with lock:
+                stats['active'] += 1
+                stats['peak'] = max(stats['peak'], stats['active'])
+            try:
+                start, end = self.headers['Range'].split('=')[1].split('-')
+                start, end = int(start), min(int(end), len(DATA) - 1)
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{len(DATA)}')
+                self.send_header('Content-Length', str(end - start + 1))
+                self.end_headers()
+                for offset in range(start, end + 1, 131072):
+                    self.wfile.write(DATA[offset:min(offset + 131072, end + 1)])
+                    time.sleep(0.01)
+            finally:
+                with lock:
+                    stats['active'] -= 1
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+def test_task_connections_cap_adaptive_probing(tmp_path):
+    server, stats = _serve()
+    host = f'127.0.0.1:{server.server_port}'
+    # 主机档案建议更多连接，任务设置的连接数仍是上限
+    get_host_profiles().update(host, HostProfile(16, 0.0, capped=True))
+    engine = DownloadEngine(str(tmp_path / 'tasks.db'))
+    try:
+        task = engine.add_task(f'http://{host}/data.bin', str(tmp_path), connections=2)
+        deadline = time.monotonic() + 30
+        while task.status != 'completed' and time.monotonic() < deadline:
+            engine.run_once(0.05)
+
+        assert task.status == 'completed', task.error_message
+        assert (tmp_path / 'data.bin').read_bytes() == DATA
+        assert stats['peak'] <= 2
+        assert task.connections == 2
+        assert engine._wanted_connections(task.task_id) == 2
+    finally:
+        engine.shutdown()
+        get_host_profiles().clear()
+        server.shutdown()
+        server.server_close()
+
+
+def test_connections_per_file_caps_adaptive_probing(tmp_path, monkeypatch):
+    server, stats = _serve()
+    host = f'127.0.0.1:{server.server_port}'
+    # 设置中的“每个任务的连接数”在自适应时仍是上限
+    real_get = ConfigManager.get
+    monkeypatch.setattr(ConfigManager, 'get', lambda self, key, default=None: (
+        2 if key == 'network.connections_per_file' else real_get(self, key, default)))
+    get_host_profiles().update(host, HostProfile(16, 0.0, capped=True))
+    engine = DownloadEngine(str(tmp_path / 'tasks.db'))
+    try:
+        task = engine.add_task(f'http://{host}/data.bin', str(tmp_path), connections=8)
+        assert engine._wanted_connections(task.task_id) == 2
+        deadline = time.monotonic() + 30
+        while task.status != 'completed' and time.monotonic() < deadline:
+            engine.run_once(0.05)
+
+        assert task.status == 'completed', task.error_message
+        assert (tmp_path / 'data.bin').read_bytes() == DATA
+        assert stats['peak'] <= 2
+    finally:
+        engine.shutdown()
+        get_host_profiles().clear()
+        server.shutdown()
+        server.server_close()
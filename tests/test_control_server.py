@@ -0,0 +1,149 @@
+"""
+控制接口测试
+"""
+import json
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.control_server import ControlServer
+from src.core.download_engine import DownloadEngine
+from src.utils.config import ConfigManager
+
+
+TOKEN = 'secret'
+
+
+def _request(port, method, path, body=None, headers=None):
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    headers = {'Authorization': f'Bearer {TOKEN}', 'Content-Type': 'application/json', **(headers or {})}
+    request = urllib.request.Request(f'http://127.0.0.1:{port}{path}', data=data, method=method,
+                                     headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def _run(engine, client):
+    """在后台线程中执行客户端，当前线程作为引擎线程处理调用"""
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(value=client()))
+    thread.start()
+    while thread.is_alive():
+        engine.run_once(0.02)
+    return result['value']
+
+
+def test_bulk_submit_and_control(tmp_path):
+    engine = DownloadEngine(str(tmp_path / 'tasks.db'))
+    engine.scheduler.max_tasks = 0  # 只排队，不发起下载
+    server = ControlServer(engine, port=0, token=TOKEN)
+    server.allowed_roots = [os.path.realpath(tmp_path)]
+    server.start()
+    port = server.address[1]
+    (tmp_path / 'exists.bin').write_bytes(b'x')
+
+    added = []
+    engine.tasks_added.connect(added.append)
+    specs = [{'url': f'http://example.com/{i}.bin', 'save_path': str(tmp_path)} for i in range(200)]
+    specs += [{'url': 'not a url'}, {'url': 'http://example.com/exists.bin', 'save_path': str(tmp_path)}]
+
+    def client():
+        status, body = _request(port, 'POST', '/tasks', specs)
+        task_id = body['tasks'][0]['task_id']
+        return {
+            'bulk': (status, body['tasks']),
+            'pause': _request(port, 'POST', f'/tasks/{task_id}/pause'),
+            'get': _request(port, 'GET', f'/tasks/{task_id}'),
+            'delete': _request(port, 'DELETE', f'/tasks/{task_id}'),
+            'missing': _request(port, 'GET', f'/tasks/{task_id}'),
+            'stats': _request(port, 'GET', '/stats'),
+        }
+
+    try:
+        result = _run(engine, client)
+    finally:
+        server.stop()
+        engine.shutdown()
+
+    status, tasks = result['bulk']
+    assert status == 200 and len(tasks) == 202
+    assert tasks[0]['filename'] == '0.bin'
+    assert tasks[200] == {'error': 'invalid url'} and 'error' in tasks[201]
+    assert [len(batch) for batch in added] == [200]
+    assert result['pause'] == (200, {'ok': True})
+    assert result['get'][1]['status'] == 'paused'
+    assert result['delete'] == (200, {'ok': True})
+    assert result['missing'][0] == 404
+    assert result['stats'][1]['total'] == 199
+
+
+def test_rejects_unsafe_paths_and_foreign_requests(tmp_path):
+    engine = DownloadEngine(str(tmp_path / 'tasks.db'))
+    engine.scheduler.max_tasks = 0  # 只排队，不发起下载
+    server = ControlServer(engine, port=0, token=TOKEN)
+    root = tmp_path / 'downloads'
+    root.mkdir()
+    server.allowed_roots = [os.path.realpath(root)]
+    server.start()
+    port = server.address[1]
+
+    def client():
+        url = 'http://example.com/a.bin'
+        return {
+            'escape': _request(port, 'POST', '/tasks', {'url': url, 'save_path': str(root),
+                                                        'filename': '../../.bashrc.d/x'}),
+            'outside': _request(port, 'POST', '/tasks', {'url': url, 'save_path': str(tmp_path)}),
+            'dotdot': _request(port, 'POST', '/tasks', {'url': url, 'save_path': f'{root}/../..'}),
+            'relative': _request(port, 'POST', '/tasks', {'url': url, 'save_path': 'downloads'}),
+            'text': _request(port, 'POST', '/tasks', {'url': url}, {'Content-Type': 'text/plain'}),
+            'origin': _request(port, 'POST', '/tasks', {'url': url}, {'Origin': 'http://evil.example'}),
+            'no_token': _request(port, 'GET', '/stats', headers={'Authorization': ''}),
+        }
+
+    try:
+        result = _run(engine, client)
+    finally:
+        server.stop()
+        engine.shutdown()
+
+    status, body = result['escape']
+    assert status == 201
+    task = engine.get_task(body['task_id'])
+    assert '/' not in task.filename and not task.filename.startswith('.')
+    assert os.path.dirname(os.path.join(task.save_path, task.filename)) == str(root)
+    for case in ('outside', 'dotdot', 'relative'):
+        assert result[case] == (409, {'error': 'save_path not allowed'})
+    assert result['text'][0] == 415
+    assert result['origin'][0] == 403
+    assert result['no_token'][0] == 401
+    assert engine.get_stats().total == 1
+
+
+def test_generates_token_when_not_configured(tmp_path, monkeypatch):
+    # 使用默认配置（没有 control.token），生成的令牌不写入真实的配置文件
+    saved = []
+    monkeypatch.setattr(ConfigManager, 'load_config',
+                        lambda self: setattr(self, 'config', ConfigManager._get_default_config()))
+    monkeypatch.setattr(ConfigManager, 'save_config', lambda self: saved.append(self.get('control.token')) or True)
+
+    engine = DownloadEngine(str(tmp_path / 'tasks.db'))
+    server = ControlServer(engine, port=0)
+    server.start()
+    port = server.address[1]
+    try:
+        assert len(server.token) >= 32 and saved == [server.token]
+        assert _request(port, 'GET', '/stats', headers={'Authorization': ''})[0] == 401
+        assert _request(port, 'GET', '/stats', headers={'Authorization': f'Bearer {server.token}'})[0] == 200
+    finally:
+        server.stop()
+        engine.shutdown()
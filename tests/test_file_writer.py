@@ -0,0 +1,128 @@
+"""
+任务文件写入测试
+"""
+import errno
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.download_task import DownloadTask
+from src.core.downloader import Downloader
+from src.core.file_writer import TaskFileWriter
+from src.core.progress_journal import ProgressJournal
+
+
+MB = 1048576
+
+
+@pytest.fixture
+def fsyncs(monkeypatch):
+    """记录 os.fsync 调用次数"""
+    calls = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, 'fsync', lambda fd: calls.append(fd) or real_fsync(fd))
+    return calls
+
+
+def _write(writer: TaskFileWriter, size: int, block: int = 256 * 1024):
+    data = b'x' * block
+    for offset in range(0, size, block):
+        writer.write_at(data, offset)
+
+
+def test_fsync_policies(tmp_path, fsyncs):
+    # journal：写入时不同步，只在写进度日志（和关闭）时同步
+    writer = TaskFileWriter(str(tmp_path / 'journal.tmp'))
+    writer.open(4 * MB)
+    _write(writer, 4 * MB)
+    assert writer.periodic_journal and fsyncs == []
+    writer.close()
+    assert len(fsyncs) == 1
+
+    # interval：每写入 fsync_interval_mb 同步一次
+    fsyncs.clear()
+    writer = TaskFileWriter(str(tmp_path / 'interval.tmp'), fsync_policy='interval', fsync_interval_mb=1)
+    writer.open(4 * MB)
+    _write(writer, 4 * MB)
+    assert writer.periodic_journal and len(fsyncs) == 4
+    writer.close(sync=False)
+    assert len(fsyncs) == 4
+
+    # final：不定期写进度日志，写入时不同步
+    fsyncs.clear()
+    writer = TaskFileWriter(str(tmp_path / 'final.tmp'), fsync_policy='final')
+    writer.open(4 * MB)
+    _write(writer, 4 * MB)
+    assert not writer.periodic_journal and fsyncs == []
+    writer.close()
+    assert len(fsyncs) == 1
+
+    # 未知策略按 journal 处理
+    assert TaskFileWriter(str(tmp_path / 'x.tmp'), fsync_policy='always').fsync_policy == 'journal'
+
+
+@pytest.mark.parametrize('failure', [errno.EOPNOTSUPP, errno.EINVAL, None])
+def test_preallocate_falls_back_to_sparse_file(tmp_path, monkeypatch, failure):
+    if failure is None:
+        monkeypatch.delattr(os, 'posix_fallocate', raising=False)
+    else:
+        def unsupported(fd, offset, length):
+            raise OSError(failure, os.strerror(failure))
+        monkeypatch.setattr(os, 'posix_fallocate', unsupported, raising=False)
+
+    path = tmp_path / 'data.tmp'
+    writer = TaskFileWriter(str(path))
+    assert writer.open(3 * MB) is True
+    writer.write_at(b'abc', 3 * MB - 3)
+    writer.close()
+    assert path.stat().st_size == 3 * MB
+    assert path.read_bytes()[-3:] == b'abc'
+
+
+def test_preallocate_reports_other_errors(tmp_path, monkeypatch):
+    def no_space(fd, offset, length):
+        raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+    monkeypatch.setattr(os, 'posix_fallocate', no_space, raising=False)
+
+    writer = TaskFileWriter(str(tmp_path / 'data.tmp'))
+    with pytest.raises(OSError) as excinfo:
+        writer.open(MB)
+    assert excinfo.value.errno == errno.ENOSPC
+    writer.close(sync=False)
+
+
+def test_reopen_keeps_data_and_close_is_idempotent(tmp_path):
+    path = tmp_path / 'data.tmp'
+    path.write_bytes(b'abcdef')
+
+    # 已有文件：不预分配，调整到目标大小并保留已写入的数据
+    writer = TaskFileWriter(str(path))
+    assert writer.open(4) is False
+    writer.close()
+    writer.close()
+    assert path.read_bytes() == b'abcd'
+    with pytest.raises(ValueError):
+        writer.write_at(b'x', 0)
+
+
+def test_completed_temp_file_is_renamed(tmp_path):
+    task = DownloadTask(url='http://example.com/data.bin', save_path=str(tmp_path), filename='data.bin')
+    (tmp_path / 'data.bin').write_bytes(b'old')
+    downloader = Downloader(task)
+
+    writer = TaskFileWriter(downloader._temp_file_path())
+    writer.open(5)
+    writer.write_at(b'hello', 0)
+    journal = ProgressJournal(downloader._temp_file_path())
+    journal.save(task.url, 5, [{'start': 0, 'end': 4, 'downloaded': 5}], writer.fd)
+    writer.close()
+
+    downloader._commit_temp_file(journal)
+    assert sorted(os.listdir(tmp_path)) == ['data.bin']
+    assert (tmp_path / 'data.bin').read_bytes() == b'hello'
@@ -0,0 +1,129 @@
+"""
+主机连接限制测试
+"""
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.download_task import DownloadTask
+from src.core.downloader import Downloader
+from src.core.host_limiter import HostLimiter
+from src.core.task_scheduler import TaskScheduler
+
+
+DATA = bytes(range(256)) * 16384  # 4 MB
+
+
+def _serve():
+    """支持Range请求的本地服务器（慢速发送），返回 (服务器, 记录最大并发请求数的字典)"""
+    stats = {'active': 0, 'peak': 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(DATA)))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.end_headers()
+
+        def do_GET(self):
+            with lock:
+                stats['active'] += 1
+                stats['peak'] = max(stats['peak'], stats['active'])
+            try:
+                start, end = self.headers['Range'].split('=')[1].split('-')
+                start, end = int(start), min(int(end), len(DATA) - 1)
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{len(DATA)}')
+                self.send_header('Content-Length', str(end - start + 1))
+                self.end_headers()
+                for offset in range(start, end + 1, 262144):
+                    self.wfile.write(DATA[offset:min(offset + 262144, end + 1)])
+                    time.sleep(0.01)
+            finally:
+                with lock:
+                    stats['active'] -= 1
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+def test_limiter_caps_connections_and_paces_requests():
+    hosts = HostLimiter(max_connections=2, request_interval=0.5)
+    first, second = hosts.reserve('a'), hosts.reserve('a')
+    assert first == 0 and 0.4 < second <= 0.5
+    assert hosts.reserve('a') is None
+    assert hosts.reserve('b') == 0  # 其他主机不受影响
+
+    # 归还后可以再取得名额，开始时间继续按间隔排后
+    hosts.release('a')
+    assert hosts.active('a') == 1
+    assert 0.9 < hosts.reserve('a') <= 1.0
+
+    # 等待名额期间被中断时放弃
+    stopped = threading.Event()
+    stopped.set()
+    assert not hosts.acquire('a', interrupt=stopped)
+    assert hosts.active('a') == 2
+
+
+def test_scheduler_fills_budget_with_other_hosts():
+    tasks = {name: DownloadTask(url=f'http://{name[0]}.example/{name}', save_path='.', connections=8)
+             for name in ('a1', 'a2', 'a3', 'b1')}
+    hosts = {task.task_id: task.url.split('/')[2] for task in tasks.values()}
+    scheduler = TaskScheduler(max_tasks=4, max_connections=32, hosts=HostLimiter(max_connections=8),
+                              host_of=hosts.get)
+    for task in tasks.values():
+        scheduler.push(task)
+
+    order = [tasks[name].task_id for name in ('a1', 'b1')]
+    assert [scheduler.next_task() for _ in range(3)] == [(order[0], 8), (order[1], 8), None]
+    assert scheduler.is_queued(tasks['a2'].task_id)
+
+    # a1 的连接数固定为3后，归还的连接让 a2 启动
+    assert scheduler.shrink(tasks['a1'].task_id, 3) == 5
+    assert scheduler.next_task() == (tasks['a2'].task_id, 5)
+    assert scheduler.host_connections('a.example') == 8
+    scheduler.release(tasks['a1'].task_id)
+    assert scheduler.next_task() == (tasks['a3'].task_id, 3)
+    assert scheduler.used_connections == 16
+
+
+def test_downloads_share_host_connection_limit(tmp_path):
+    server, stats = _serve()
+    try:
+        hosts = HostLimiter(max_connections=2)
+        downloaders = []
+        for name in ('a.bin', 'b.bin'):
+            task = DownloadTask(url=f'http://127.0.0.1:{server.server_port}/{name}', save_path=str(tmp_path))
+            downloader = Downloader(task)
+            downloader.hosts = hosts
+            downloader.max_connections = 4
+            downloaders.append(downloader)
+
+        threads = [threading.Thread(target=d.start) for d in downloaders]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for downloader in downloaders:
+            assert downloader.task.status == 'completed', downloader.task.error_message
+            assert (tmp_path / downloader.task.filename).read_bytes() == DATA
+        assert stats['peak'] <= 2
+        assert hosts.active(f'127.0.0.1:{server.server_port}') == 0
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,94 @@
+"""
+HTTP连接池测试
+"""
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.http_pool import ConnectionPool
+
+
+def _serve():
+    """保持连接的本地服务器，返回 (服务器, 客户端连接的来源端口集合)"""
+    clients = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            clients.add(self.client_address[1])
+            self.send_response(200)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'ok')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, clients
+
+
+def _get(pool: ConnectionPool, server) -> bytes:
+    response = pool.request('GET', f'http://127.0.0.1:{server.server_port}/', timeout=5)
+    return response.content
+
+
+def test_requests_to_same_host_reuse_connection():
+    server, clients = _serve()
+    pool = ConnectionPool()
+    try:
+        assert [_get(pool, server) for _ in range(5)] == [b'ok'] * 5
+        assert pool.get_stats() == {'hosts': 1, 'requests': 5, 'connections': 1, 'reused': 4}
+        assert len(clients) == 1
+    finally:
+        pool.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_least_recently_used_host_is_evicted_when_full():
+    (first, _), (second, _) = _serve(), _serve()
+    pool = ConnectionPool(max_hosts=1)
+    try:
+        _get(pool, first)
+        session = pool.get_session(f'http://127.0.0.1:{first.server_port}/')
+        _get(pool, second)
+
+        # 第一个主机的会话已关闭，统计保留
+        assert pool.get_stats() == {'hosts': 1, 'requests': 2, 'connections': 2, 'reused': 0}
+        assert pool.get_session(f'http://127.0.0.1:{first.server_port}/') is not session
+        assert pool.get_stats()['hosts'] == 1
+    finally:
+        pool.close()
+        for server in (first, second):
+            server.shutdown()
+            server.server_close()
+
+
+def test_idle_sessions_expire():
+    server, clients = _serve()
+    pool = ConnectionPool(keepalive_timeout=0.2)
+    url = f'http://127.0.0.1:{server.server_port}/'
+    try:
+        _get(pool, server)
+        session = pool.get_session(url)
+        assert pool.get_session(url) is session
+
+        # 空闲超时后重新建立连接
+        time.sleep(0.3)
+        assert pool.get_session(url) is not session
+        _get(pool, server)
+        assert pool.get_stats() == {'hosts': 1, 'requests': 2, 'connections': 2, 'reused': 0}
+        assert len(clients) == 2
+    finally:
+        pool.close()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,139 @@
+"""
+完整性校验测试
+"""
+import hashlib
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.download_task import DownloadTask
+from src.core.downloader import Downloader
+from src.core.integrity import parse_checksum, parse_checksum_file, parse_metalink
+
+
+DATA = bytes(range(256)) * 16384  # 4 MB
+PIECE_SIZE = 262144
+CORRUPT_AT = 3 * PIECE_SIZE + 100  # 第一次返回这个位置的数据时写错
+
+
+def _metalink(digest: str, pieces) -> str:
+    hashes = ''.join(f'<hash>{h}</hash>' for h in pieces)
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<metalink xmlns="urn:ietf:params:xml:ns:metalink">'
+        '<file name="data.bin"><size>%d</size>'
+        '<hash type="sha-256">%s</hash>'
+        '<pieces length="%d" type="sha-256">%s</pieces>'
+        '</file></metalink>' % (len(DATA), digest, PIECE_SIZE, hashes)
+    )
+
+
+def _serve():
+    """支持Range请求的本地服务器：第一次返回 CORRUPT_AT 处的数据时写错一个字节"""
+    ranges = []
+    corrupted = []
+    digest = hashlib.sha256(DATA).hexdigest()
+    pieces = [hashlib.sha256(DATA[i:i + PIECE_SIZE]).hexdigest() for i in range(0, len(DATA), PIECE_SIZE)]
+    files = {
+        '/data.bin.meta4': _metalink(digest, pieces).encode(),
+        '/data.bin.sha256': f'{digest}  data.bin\n'.encode(),
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(DATA)))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.end_headers()
+
+        def do_GET(self):
+            if self.path in files:
+                body = files[self.path]
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            start, end = self.headers['Range'].split('=')[1].split('-')
+            start, end = int(start), min(int(end), len(DATA) - 1)
+            ranges.append((start, end))
+            body = bytearray(DATA[start:end + 1])
+            if start <= CORRUPT_AT <= end and not corrupted:
+                corrupted.append(True)
+                body[CORRUPT_AT - start] ^= 0xFF
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(DATA)}')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, ranges
+
+
+def test_parse_checksum_specs():
+    digest = hashlib.sha256(b'x').hexdigest()
+    assert parse_checksum(f'SHA-256:{digest.upper()}') == ('sha256', digest)
+    assert parse_checksum('http://h/f.iso.sha256') == ('sha256', 'http://h/f.iso.sha256')
+    assert parse_checksum('md5:http://h/MD5SUMS') == ('md5', 'http://h/MD5SUMS')
+    for spec in ('sha256:abc', 'crc32:1234abcd', 'http://h/f.iso', digest):
+        with pytest.raises(ValueError):
+            parse_checksum(spec)
+
+    other = hashlib.sha256(b'y').hexdigest()
+    text = f'{other}  other.iso\n{digest} *f.iso\n'
+    assert parse_checksum_file(text, 'sha256', 'f.iso') == digest
+    assert parse_checksum_file(f'SHA256 (f.iso) = {digest}\n', 'sha256', 'f.iso') == digest
+    assert parse_checksum_file(digest, 'sha256', 'f.iso') == digest
+
+    checksum = parse_metalink(_metalink(digest, [other, digest]), 'data.bin')
+    assert checksum.algorithm == 'sha256' and checksum.digest == digest
+    assert checksum.pieces.hashes == (other, digest) and checksum.pieces.piece_size == PIECE_SIZE
+
+
+def test_corrupted_piece_is_downloaded_again(tmp_path):
+    server, ranges = _serve()
+    try:
+        base = f'http://127.0.0.1:{server.server_port}'
+        task = DownloadTask(url=f'{base}/data.bin', save_path=str(tmp_path), checksum=f'{base}/data.bin.meta4')
+        Downloader(task).start()
+
+        assert task.status == 'completed', task.error_message
+        assert (tmp_path / 'data.bin').read_bytes() == DATA
+        # 第二轮只重新下载损坏的分片
+        assert ranges[-1] == (3 * PIECE_SIZE, 4 * PIECE_SIZE - 1)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_checksum_mismatch_fails_and_discards_partial_file(tmp_path):
+    server, _ = _serve()
+    try:
+        base = f'http://127.0.0.1:{server.server_port}'
+        task = DownloadTask(url=f'{base}/data.bin', save_path=str(tmp_path), checksum=f'{base}/data.bin.sha256')
+        Downloader(task).start()
+
+        assert task.status == 'failed'
+        assert '校验' in task.error_message
+        assert not list(tmp_path.iterdir())
+        # 临时文件已删除，进度随之清零
+        assert task.downloaded_size == 0
+        assert all(chunk['downloaded'] == 0 for chunk in task.chunks)
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,133 @@
+"""
+分块读写缓冲测试
+"""
+import itertools
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core import io_buffer
+from src.core.io_buffer import ChunkBuffer, pwrite_all
+
+
+DATA = bytes(range(256)) * 64  # 16 KB
+
+
+def test_pwrite_all_loops_over_short_writes(tmp_path, monkeypatch):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(b'\0' * 8)
+    calls = []
+    real_pwrite = os.pwrite
+
+    def short_pwrite(fd, data, offset):
+        # 每次最多写入1000字节
+        calls.append(offset)
+        return real_pwrite(fd, bytes(data[:1000]), offset)
+
+    monkeypatch.setattr(os, 'pwrite', short_pwrite)
+    fd = os.open(path, os.O_RDWR)
+    try:
+        assert pwrite_all(fd, DATA, 8) == len(DATA)
+    finally:
+        os.close(fd)
+    assert path.read_bytes() == b'\0' * 8 + DATA
+    assert calls == list(range(8, 8 + len(DATA), 1000))
+
+    # 写入0字节时报错而不是死循环
+    monkeypatch.setattr(os, 'pwrite', lambda fd, data, offset: 0)
+    fd = os.open(path, os.O_RDWR)
+    try:
+        with pytest.raises(OSError):
+            pwrite_all(fd, DATA, 0)
+    finally:
+        os.close(fd)
+
+
+def test_pwrite_all_without_pwrite_seeks_and_writes(tmp_path, monkeypatch):
+    path = tmp_path / 'data.bin'
+    real_write = os.write
+    monkeypatch.delattr(os, 'pwrite')
+    monkeypatch.setattr(os, 'write', lambda fd, data: real_write(fd, bytes(data[:3000])))
+    fd = os.open(path, os.O_RDWR | os.O_CREAT)
+    try:
+        assert pwrite_all(fd, DATA, 100) == len(DATA)
+    finally:
+        os.close(fd)
+    assert path.read_bytes()[100:] == DATA
+
+
+def test_buffer_is_page_aligned_and_flush_stops_at_chunk_end():
+    page = ChunkBuffer.PAGE_SIZE
+    # 写缓冲区向上取整到页大小，可能大于分块剩余的长度
+    buffer = ChunkBuffer(write_buffer_size=2 * page + 1, read_size=page, min_read_size=1)
+    assert buffer.capacity == 3 * page
+
+    # 首次写入截到页边界
+    buffer.begin(100)
+    assert buffer.space == 3 * page - 100
+    buffer.begin(page * 3)
+    assert buffer.space == 3 * page
+
+    # 读取不超过调用方给出的上限（分块末尾）
+    source = iter([DATA])
+    readinto = _reader(source)
+    assert buffer.read_from(readinto, 500) == 500
+
+    # 分块在缓冲期间被拆分，只写出新的末尾之前的数据
+    writes = []
+    assert buffer.flush_to(lambda data, offset: writes.append((bytes(data), offset)), page * 3, 200) == 200
+    assert writes == [(DATA[:200], page * 3)]
+    assert buffer.filled == 0 and buffer.space == 3 * page
+
+    buffer.extend(DATA[:300])
+    assert buffer.flush_to(lambda data, offset: writes.append((bytes(data), offset)), 0) == 300
+    assert writes[-1] == (DATA[:300], 0)
+
+
+def test_read_size_adapts_to_throughput(monkeypatch):
+    buffer = ChunkBuffer(write_buffer_size=1048576, read_size=65536, min_read_size=16384,
+                         max_read_size=262144, target_read_time=0.1)
+    readinto = _reader(itertools.repeat(b'x' * 1048576))
+    clock = itertools.count()
+    elapsed = {'value': 0.001}
+    monkeypatch.setattr(io_buffer.time, 'perf_counter', lambda: next(clock) * elapsed['value'])
+
+    # 读取很快：读取大小逐步加倍，不超过上限
+    sizes = []
+    for _ in range(4):
+        buffer.begin(0)
+        buffer.read_from(readinto, 1 << 30)
+        sizes.append(buffer.read_size)
+    assert sizes == [131072, 262144, 262144, 262144]
+
+    # 读取很慢：读取大小逐步减半，不低于下限
+    elapsed['value'] = 10.0
+    sizes = []
+    for _ in range(5):
+        buffer.begin(0)
+        buffer.read_from(readinto, 1 << 30)
+        sizes.append(buffer.read_size)
+    assert sizes == [131072, 65536, 32768, 16384, 16384]
+
+
+def _reader(blocks):
+    """按块提供数据的 readinto"""
+    pending = bytearray()
+
+    def readinto(view):
+        while len(pending) < len(view):
+            block = next(blocks, None)
+            if block is None:
+                break
+            pending.extend(block)
+        count = min(len(view), len(pending))
+        view[:count] = pending[:count]
+        del pending[:count]
+        return count
+    return readinto
@@ -0,0 +1,81 @@
+"""
+元数据探测测试
+"""
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.http_pool import ConnectionPool
+from src.core.metadata_probe import FileMetadata, MetadataProber
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """HEAD 返回405，GET 按Range返回1个字节；/redirect 重定向到 /file"""
+    protocol_version = 'HTTP/1.1'
+    requests = []
+
+    def do_HEAD(self):
+        self.requests.append(('HEAD', self.path))
+        self.send_response(405)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        self.requests.append(('GET', self.path))
+        if self.path == '/redirect':
+            self.send_response(302)
+            self.send_header('Location', '/file')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        time.sleep(0.05)
+        self.send_response(206)
+        self.send_header('Content-Range', 'bytes 0-0/5000')
+        self.send_header('Content-Length', '1')
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Disposition', 'attachment; filename="data.bin"')
+        self.end_headers()
+        self.wfile.write(b'x')
+
+    def log_message(self, *args):
+        pass
+
+
+def test_probe_falls_back_to_range_get_and_caches():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/redirect'
+    _Handler.requests = []
+    prober = MetadataProber(ttl=60, workers=2, pool=ConnectionPool())
+
+    try:
+        # 同一URL同时预取和获取只发出一次探测
+        prefetched = prober.prefetch(url)
+        info = prober.fetch(url)
+        assert prefetched.result() == info
+        assert prober.fetch(url) is info
+    finally:
+        prober.close()
+        server.shutdown()
+
+    assert (info.size, info.accept_ranges, info.etag, info.filename) == (5000, True, '"v1"', 'data.bin')
+    assert info.final_url.endswith('/file')
+    assert _Handler.requests == [('HEAD', '/redirect'), ('GET', '/redirect'), ('GET', '/file')]
+    assert prober.misses == 1
+
+
+def test_cache_entries_expire():
+    prober = MetadataProber(ttl=0.05, max_entries=2, pool=ConnectionPool())
+    for name in 'abc':
+        prober.put(FileMetadata(url=name, final_url=name, size=1))
+
+    assert prober.get_cached('a') is None  # 超出条目数被淘汰
+    assert prober.get_cached('c').size == 1
+    time.sleep(0.06)
+    assert prober.get_cached('c') is None
@@ -0,0 +1,118 @@
+"""
+多镜像下载测试
+"""
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.download_task import DownloadTask
+from src.core.downloader import Downloader
+from src.core.metadata_probe import FileMetadata
+from src.core.mirror_pool import MirrorPool, check_mirror
+
+
+DATA = bytes(range(256)) * 12288  # 3 MB
+
+
+def _serve(data: bytes, etag: str):
+    """启动一个支持Range请求的本地服务器，返回 (服务器, 收到的GET请求Range列表)"""
+    ranges = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(data)))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('ETag', etag)
+            self.end_headers()
+
+        def do_GET(self):
+            start, end = self.headers['Range'].split('=')[1].split('-')
+            start, end = int(start), min(int(end), len(data) - 1)
+            ranges.append((start, end))
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(data)}')
+            self.send_header('Content-Length', str(end - start + 1))
+            self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(data[start:end + 1])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, ranges
+
+
+def test_pool_prefers_fast_mirrors_and_drops_broken_ones():
+    pool = MirrorPool(['http://a/f', 'http://b/f'])
+
+    # 尚未测量时请求分散到各镜像
+    a, b = pool.acquire(), pool.acquire()
+    assert {a.url, b.url} == {'http://a/f', 'http://b/f'}
+    fast, slow = (a, b) if a.url.startswith('http://a') else (b, a)
+    pool.release(fast, 10_000_000, 1.0)
+    pool.release(slow, 1_000_000, 1.0)
+
+    mirror = pool.acquire()
+    assert mirror is fast
+    pool.release(mirror, 0, 0.0)
+    assert pool.should_switch(slow, 1_000_000, 5.0)
+    assert not pool.should_switch(fast, 50_000_000, 5.0)
+    assert not pool.should_switch(slow, 100_000, 1.0)  # 测量时间太短
+
+    # 不可重试的错误停用镜像，但至少保留一个
+    pool = MirrorPool(['http://a/f', 'http://b/f'])
+    first = pool.acquire()
+    assert pool.release(first, 0, 0.1, IOError('404'), fatal=True)
+    assert first.dropped
+    second = pool.acquire()
+    assert second is not first
+    assert not pool.release(second, 0, 0.1, IOError('404'), fatal=True)
+    assert not second.dropped
+    assert pool.acquire() is second
+
+
+def test_check_mirror_compares_size_and_etag():
+    primary = FileMetadata('http://a/f', 'http://a/f', 100, True, '"v1"')
+    assert check_mirror(primary, FileMetadata('http://b/f', 'http://b/f', 100, True, '"v1"')) == ''
+    assert check_mirror(primary, FileMetadata('http://b/f', 'http://b/f', 100, True, '')) == ''
+    assert check_mirror(primary, FileMetadata('http://b/f', 'http://b/f', 100, True, 'W/"x"')) == ''
+    assert check_mirror(primary, FileMetadata('http://b/f', 'http://b/f', 99, True, '"v1"'))
+    assert check_mirror(primary, FileMetadata('http://b/f', 'http://b/f', 100, True, '"v2"'))
+    assert check_mirror(primary, FileMetadata('http://b/f', 'http://b/f', 100, False, '"v1"'))
+
+
+def test_download_spreads_ranges_over_matching_mirrors(tmp_path):
+    primary, primary_ranges = _serve(DATA, '"v1"')
+    mirror, mirror_ranges = _serve(DATA, '"v1"')
+    other, other_ranges = _serve(DATA[:-1], '"v2"')  # 不同的文件
+    try:
+        task = DownloadTask(
+            url=f'http://127.0.0.1:{primary.server_port}/file.bin',
+            save_path=str(tmp_path),
+            mirrors=[
+                f'http://127.0.0.1:{mirror.server_port}/file.bin',
+                f'http://127.0.0.1:{other.server_port}/file.bin'
+            ]
+        )
+        downloader = Downloader(task)
+        downloader.start()
+
+        assert task.status == 'completed', task.error_message
+        assert (tmp_path / 'file.bin').read_bytes() == DATA
+        assert len(downloader.mirror_pool) == 2
+        assert primary_ranges and mirror_ranges
+        assert not other_ranges
+    finally:
+        for server in (primary, mirror, other):
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,122 @@
+"""
+分片摘要索引测试
+"""
+import hashlib
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.download_task import DownloadTask
+from src.core.downloader import Downloader
+from src.core.piece_index import PieceIndex, PieceRecorder, pieces_to_chunks
+
+
+PIECE_SIZE = 1048576
+DATA = bytes(range(256)) * (4096 * 3 + 100)  # 3 个整分片 + 25600 字节
+
+
+def _serve():
+    """支持Range请求的本地服务器，返回 (服务器, 收到的GET请求Range列表)"""
+    ranges = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(DATA)))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.end_headers()
+
+        def do_GET(self):
+            start, end = self.headers['Range'].split('=')[1].split('-')
+            start, end = int(start), min(int(end), len(DATA) - 1)
+            ranges.append((start, end))
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(DATA)}')
+            self.send_header('Content-Length', str(end - start + 1))
+            self.end_headers()
+            self.wfile.write(DATA[start:end + 1])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, ranges
+
+
+def _corrupt(path: Path, offset: int):
+    data = bytearray(path.read_bytes())
+    data[offset] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+
+def test_recorder_and_recheck(tmp_path):
+    temp_file = tmp_path / 'f.bin.tmp'
+    temp_file.write_bytes(DATA)
+
+    index = PieceIndex(str(temp_file), 'http://h/f.bin', len(DATA), PIECE_SIZE)
+    assert not index.open()
+    # 只有完整写入的分片被记录（最后一个分片到文件末尾即完整）
+    recorder = PieceRecorder(index, lambda: [(0, PIECE_SIZE + 10), (3 * PIECE_SIZE, len(DATA))])
+    recorder.stop()
+    assert [index.is_recorded(i) for i in range(index.count)] == [True, False, False, True]
+    index.close()
+
+    # 沿用匹配的索引；损坏的分片被清除记录
+    index = PieceIndex(str(temp_file), 'http://h/f.bin', len(DATA), PIECE_SIZE)
+    assert index.open()
+    _corrupt(temp_file, 10)
+    assert index.recheck() == [False, False, False, True]
+    assert index.recorded_count == 1
+    index.close()
+
+    # URL 不同时重建索引
+    index = PieceIndex(str(temp_file), 'http://h/other.bin', len(DATA), PIECE_SIZE)
+    assert not index.open()
+    assert index.recorded_count == 0
+    index.remove()
+    assert not Path(index.path).exists()
+
+
+def test_pieces_to_chunks():
+    total = 3 * PIECE_SIZE + 5
+    assert pieces_to_chunks([True, True, False, True], PIECE_SIZE, total) == [
+        {'start': 0, 'end': 2 * PIECE_SIZE - 1, 'downloaded': 2 * PIECE_SIZE},
+        {'start': 2 * PIECE_SIZE, 'end': 3 * PIECE_SIZE - 1, 'downloaded': 0},
+        {'start': 3 * PIECE_SIZE, 'end': total - 1, 'downloaded': 5},
+    ]
+
+
+def test_resume_after_crash_downloads_only_damaged_pieces(tmp_path):
+    server, ranges = _serve()
+    try:
+        url = f'http://127.0.0.1:{server.server_port}/data.bin'
+        temp_file = tmp_path / 'data.bin.tmp'
+
+        # 模拟崩溃：临时文件和分片索引都在，但没有进度日志，且第2个分片写入后被损坏
+        temp_file.write_bytes(DATA)
+        index = PieceIndex(str(temp_file), url, len(DATA), PIECE_SIZE)
+        index.open()
+        for i in range(index.count):
+            start, end = index.piece_range(i)
+            index.record(i, hashlib.sha1(DATA[start:end + 1]).digest())
+        index.close()
+        _corrupt(temp_file, PIECE_SIZE + 1234)
+
+        task = DownloadTask(url=url, save_path=str(tmp_path))
+        Downloader(task).start()
+
+        assert task.status == 'completed', task.error_message
+        assert (tmp_path / 'data.bin').read_bytes() == DATA
+        assert ranges and all(PIECE_SIZE <= start and end < 2 * PIECE_SIZE for start, end in ranges)
+        assert sorted(p.name for p in tmp_path.iterdir()) == ['data.bin']
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,66 @@
+"""
+进度总线测试
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from PySide6.QtCore import QCoreApplication
+
+from src.core.progress_bus import ProgressBus
+
+
+def _app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def _wait(app, condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+
+
+def test_updates_from_workers_are_coalesced_on_gui_thread():
+    app = _app()
+    bus = ProgressBus(refresh_rate=20)
+    batches, finished = [], []
+    bus.updates_ready.connect(lambda ids: batches.append((ids, threading.get_ident())))
+    bus.task_finished.connect(lambda task_id, _: finished.append(task_id))
+
+    def worker(task_id):
+        for _ in range(1000):
+            bus.post(task_id)
+        bus.post_finished(task_id, None)
+
+    threads = [threading.Thread(target=worker, args=(name,)) for name in 'abc']
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    _wait(app, lambda: len(finished) == 3)
+
+    assert len(batches) == 1
+    assert sorted(batches[0][0]) == ['a', 'b', 'c']
+    assert batches[0][1] == threading.get_ident()
+    assert sorted(finished) == ['a', 'b', 'c']
+
+
+def test_flush_delivers_immediately():
+    _app()
+    bus = ProgressBus()
+    batches = []
+    bus.updates_ready.connect(batches.append)
+
+    bus.post('a')
+    bus.post('a')
+
+    assert bus.flush() == 1
+    assert batches == [['a']]
+    assert bus.flush() == 0
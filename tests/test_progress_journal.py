@@ -0,0 +1,73 @@
+"""
+分块进度日志测试
+"""
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.progress_journal import ProgressJournal
+
+URL = "http://example.com/file.bin"
+SIZE = 200000
+
+
+def _make_temp_file(tmp_path):
+    temp_file = tmp_path / "file.bin.tmp"
+    temp_file.write_bytes(bytes(range(256)) * (SIZE // 256) + b'\0' * (SIZE % 256))
+    return str(temp_file)
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    temp_file = _make_temp_file(tmp_path)
+    chunks = [
+        {'start': 0, 'end': 99999, 'downloaded': 80000},
+        {'start': 100000, 'end': SIZE - 1, 'downloaded': 5},
+    ]
+
+    journal = ProgressJournal(temp_file)
+    journal.save(URL, SIZE, chunks)
+
+    assert journal.load(URL, SIZE) == chunks
+
+
+def test_load_rejects_mismatched_task(tmp_path):
+    temp_file = _make_temp_file(tmp_path)
+    journal = ProgressJournal(temp_file)
+    journal.save(URL, SIZE, [{'start': 0, 'end': SIZE - 1, 'downloaded': 100}])
+
+    assert journal.load(URL, SIZE + 1) is None
+    assert journal.load(URL + "?v=2", SIZE) is None
+
+
+def test_corrupted_tail_resets_chunk(tmp_path):
+    temp_file = _make_temp_file(tmp_path)
+    chunks = [
+        {'start': 0, 'end': 99999, 'downloaded': 80000},
+        {'start': 100000, 'end': SIZE - 1, 'downloaded': 50000},
+    ]
+    journal = ProgressJournal(temp_file)
+    journal.save(URL, SIZE, chunks)
+
+    # 模拟崩溃后第二个分块末尾数据未落盘
+    with open(temp_file, 'r+b') as f:
+        f.seek(100000 + 50000 - 16)
+        f.write(b'\xff' * 16)
+
+    loaded = journal.load(URL, SIZE)
+    assert loaded[0]['downloaded'] == 80000
+    assert loaded[1]['downloaded'] == 0
+
+
+def test_corrupted_journal_is_ignored(tmp_path):
+    temp_file = _make_temp_file(tmp_path)
+    journal = ProgressJournal(temp_file)
+    journal.save(URL, SIZE, [{'start': 0, 'end': SIZE - 1, 'downloaded': 100}])
+
+    content = Path(journal.path).read_text(encoding='utf-8')
+    Path(journal.path).write_text(content.replace('"downloaded": 100', '"downloaded": 900'),
+                                  encoding='utf-8')
+
+    assert journal.load(URL, SIZE) is None
@@ -0,0 +1,73 @@
+"""
+限速器测试
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.rate_limiter import RateLimiter, TokenBucket
+
+
+def test_bucket_allows_burst_then_charges_debt():
+    bucket = TokenBucket(rate=1000, burst=1000)
+    now = time.monotonic()
+
+    assert bucket.reserve(1000, now) == 0
+    assert abs(bucket.reserve(500, now) - 0.5) < 1e-6
+    # 后来的调用者排在前面的欠账之后
+    assert abs(bucket.reserve(500, now) - 1.0) < 1e-6
+
+
+def test_unlimited_limiter_never_waits():
+    limiter = RateLimiter()
+    limiter.register('a')
+
+    assert not limiter.enabled
+    assert limiter.reserve('a', 10 ** 9)[0] == 0
+
+
+def test_per_task_limit_applies_to_each_task_separately():
+    limiter = RateLimiter(per_task_limit=100000)
+    limiter.register('a')
+    limiter.register('b')
+
+    limiter.reserve('a', 100000)
+    delay_a, _ = limiter.reserve('a', 100000)
+    delay_b, _ = limiter.reserve('b', 100000)
+
+    assert delay_a > 0.9
+    assert delay_b == 0
+
+
+def test_fair_share_slows_task_exceeding_its_share():
+    limiter = RateLimiter(global_limit=200000, burst_seconds=0.5)
+    limiter.register('a')
+    limiter.register('b')
+
+    # 全局带宽不足时 a 还要受每任务一半速率的约束，等待时间超过全局欠账
+    for _ in range(2):
+        limiter.reserve('a', 100000)
+    delay, _ = limiter.reserve('a', 100000)
+
+    assert delay > 200000 / 200000 + 0.2
+
+
+def test_limit_change_wakes_throttled_thread():
+    limiter = RateLimiter(global_limit=10000)
+    limiter.register('a')
+    limiter.reserve('a', 200000)
+
+    thread = threading.Thread(target=limiter.throttle, args=('a', 1))
+    started = time.monotonic()
+    thread.start()
+    time.sleep(0.1)
+    limiter.set_limits(0, 0)
+    thread.join(2)
+
+    assert not thread.is_alive()
+    assert time.monotonic() - started < 1.0
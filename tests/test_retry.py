@@ -0,0 +1,59 @@
+"""
+重试策略测试
+"""
+import sys
+from pathlib import Path
+
+import requests
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.retry import RetryPolicy, TransientError
+
+
+def _http_error(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    return requests.HTTPError(response=response)
+
+
+def test_transient_errors_are_retryable():
+    policy = RetryPolicy()
+
+    assert policy.is_retryable(TransientError("连接提前关闭"))
+    assert policy.is_retryable(ConnectionResetError())
+    assert policy.is_retryable(requests.Timeout())
+    assert policy.is_retryable(_http_error(503))
+    assert policy.is_retryable(_http_error(429))
+
+
+def test_permanent_errors_are_not_retryable():
+    policy = RetryPolicy()
+
+    assert not policy.is_retryable(_http_error(404))
+    assert not policy.is_retryable(OSError(28, "No space left on device"))
+    assert not policy.is_retryable(ValueError())
+
+
+def test_backoff_uses_full_jitter_with_cap():
+    policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+
+    for attempt in range(1, 10):
+        assert 0 <= policy.backoff(attempt) <= min(4.0, 2 ** (attempt - 1))
+
+
+def test_backoff_honours_retry_after():
+    policy = RetryPolicy(base_delay=0.01, max_delay=30.0)
+
+    assert policy.backoff(1, _http_error(503, {'Retry-After': '5'})) >= 5
+
+
+def test_task_budget_is_shared():
+    budget = RetryPolicy(task_retries=2).new_budget()
+
+    assert budget.acquire()
+    assert budget.acquire()
+    assert not budget.acquire()
@@ -0,0 +1,43 @@
+"""
+任务列表模型测试
+"""
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from PySide6.QtCore import QCoreApplication
+
+from src.core.download_task import DownloadTask
+from src.ui.task_list_model import TaskListModel
+
+
+def _model(count):
+    QCoreApplication.instance() or QCoreApplication([])
+    model = TaskListModel()
+    tasks = [DownloadTask(task_id=f't{i}', url=f'http://example.com/{i}.bin') for i in range(count)]
+    model.add_tasks(tasks)
+    return model, tasks
+
+
+def test_updates_emit_data_changed_for_changed_rows_only():
+    model, tasks = _model(6)
+    changed = []
+    model.dataChanged.connect(lambda first, last: changed.append((first.row(), last.row())))
+
+    model.update_tasks([tasks[4], tasks[1], tasks[2], DownloadTask(task_id='missing')])
+
+    assert changed == [(1, 2), (4, 4)]
+
+
+def test_remove_keeps_row_lookup_consistent():
+    model, tasks = _model(4)
+
+    assert model.remove_task('t1')
+    assert model.rowCount() == 3
+    assert model.index_of('t3').row() == 2
+    assert model.task_at(model.index(1, 0)) is tasks[2]
+    assert model.data(model.index(0, 0), TaskListModel.TaskRole) is tasks[0]
+    assert not model.remove_task('t1')
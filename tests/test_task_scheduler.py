@@ -0,0 +1,164 @@
+"""
+任务调度器测试
+"""
+import heapq
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core import task_scheduler
+from src.core.download_task import DownloadTask
+from src.core.host_limiter import HostLimiter
+from src.core.task_scheduler import TaskScheduler
+
+
+def _task(name, priority=0, size=0, age=0, connections=8):
+    return DownloadTask(
+        task_id=name, url=f'http://example.com/{name}', priority=priority,
+        total_size=size, connections=connections,
+        created_at=datetime(2024, 1, 1) + timedelta(seconds=age)
+    )
+
+
+def _drain(scheduler):
+    order = []
+    while True:
+        picked = scheduler.next_task()
+        if picked is None:
+            return order
+        order.append(picked[0])
+        scheduler.release(picked[0])
+
+
+def test_orders_by_priority_then_size_then_age():
+    scheduler = TaskScheduler(max_tasks=1, max_connections=8)
+    scheduler.push(_task('old-unknown', age=0))
+    scheduler.push(_task('big', size=100, age=1))
+    scheduler.push(_task('small', size=10, age=2))
+    scheduler.push(_task('urgent', priority=5, age=3))
+
+    assert _drain(scheduler) == ['urgent', 'small', 'big', 'old-unknown']
+
+
+def test_removed_and_requeued_entries_are_skipped():
+    scheduler = TaskScheduler(max_tasks=1, max_connections=8)
+    a, b = _task('a', age=0), _task('b', age=1)
+    scheduler.push(a)
+    scheduler.push(b)
+
+    scheduler.remove('a')
+    b.priority = -1
+    scheduler.push(b)
+    scheduler.push(_task('c', age=2))
+
+    assert _drain(scheduler) == ['c', 'b']
+    assert scheduler.queued_count == 0
+
+
+def test_connection_budget_limits_concurrency():
+    scheduler = TaskScheduler(max_tasks=10, max_connections=10)
+    for name in 'abc':
+        scheduler.push(_task(name, connections=6))
+
+    assert scheduler.next_task() == ('a', 6)
+    assert scheduler.next_task() == ('b', 4)
+    assert scheduler.next_task() is None
+
+    scheduler.release('a')
+    assert scheduler.next_task() == ('c', 6)
+    assert scheduler.used_connections == 10
+
+
+def test_restarted_task_releases_grants_in_order():
+    scheduler = TaskScheduler(max_tasks=3, max_connections=10)
+    task = _task('a', connections=4)
+    scheduler.push(task)
+    scheduler.next_task()
+    scheduler.push(task)
+    scheduler.next_task()
+
+    assert scheduler.active_count == 2
+    scheduler.release('a')
+    assert scheduler.active_count == 1
+    assert scheduler.used_connections == 4
+
+
+class _CountingHeapq:
+    """统计堆操作次数的 heapq"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __getattr__(self, name):
+        function = getattr(heapq, name)
+
+        def counted(*args, **kwargs):
+            self.calls += 1
+            return function(*args, **kwargs)
+        return counted
+
+
+def test_saturated_host_does_not_rescan_queue(monkeypatch):
+    counter = _CountingHeapq()
+    monkeypatch.setattr(task_scheduler, 'heapq', counter)
+    hosts = {}
+    scheduler = TaskScheduler(max_tasks=100, max_connections=1000, hosts=HostLimiter(max_connections=4),
+                              host_of=hosts.get)
+    for i in range(10000):
+        task = _task(f'a{i}', age=i, connections=1)
+        hosts[task.task_id] = 'a.example'
+        scheduler.push(task)
+    other = _task('b', age=10000, connections=1)
+    hosts[other.task_id] = 'b.example'
+    scheduler.push(other)
+
+    assert [scheduler.next_task() for _ in range(4)] == [(f'a{i}', 1) for i in range(4)]
+    # 主机a的名额已用完：第一次出队把a的条目移入等待堆，之后不再扫描
+    assert scheduler.next_task() == ('b', 1)
+    counter.calls = 0
+    for _ in range(1000):
+        assert scheduler.next_task() is None
+    assert counter.calls == 0
+
+    # 每次归还连接只放回一个条目，按原顺序继续出队
+    for i in range(4, 1004):
+        scheduler.release(f'a{i - 4}')
+        assert scheduler.next_task() == (f'a{i}', 1)
+    assert counter.calls <= 4 * 1000
+    assert scheduler.is_queued('a5000') and scheduler.queued_count == 10000 - 1004
+
+    # 等待中的条目也可以取消排队
+    scheduler.remove('a1004')
+    scheduler.release('a1000')
+    assert scheduler.next_task() == ('a1005', 1)
+
+
+class _CountingList(list):
+    """统计按下标读取和遍历次数的列表"""
+
+    reads = 0
+
+    def __getitem__(self, index):
+        _CountingList.reads += 1
+        return super().__getitem__(index)
+
+    def __iter__(self):
+        raise AssertionError('peek 不应遍历整个队列')
+
+
+def test_peek_visits_only_the_front_of_the_queue():
+    scheduler = TaskScheduler(max_tasks=1, max_connections=8)
+    for i in range(10000):
+        scheduler.push(_task(f't{i}', age=10000 - i))
+    for i in (9999, 9997):
+        scheduler.remove(f't{i}')
+
+    scheduler._heap = _CountingList(scheduler._heap)
+    _CountingList.reads = 0
+    assert scheduler.peek(4) == ['t9998', 't9996', 't9995', 't9994']
+    assert _CountingList.reads <= 32
+    assert _drain(scheduler)[:2] == ['t9998', 't9996']
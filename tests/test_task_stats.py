@@ -0,0 +1,52 @@
+"""
+任务统计测试
+"""
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.download_task import DownloadTask
+from src.core.task_stats import TaskStats
+
+
+def test_aggregates_follow_transitions():
+    stats = TaskStats()
+    a = DownloadTask(task_id='a', url='http://example.com/a', total_size=1000, downloaded_size=200)
+    b = DownloadTask(task_id='b', url='http://example.com/b', total_size=500, status='paused')
+    stats.update(a)
+    stats.update(b)
+
+    a.status, a.speed = 'downloading', 100.0
+    stats.update(a)
+    snapshot = stats.snapshot()
+    assert (snapshot.total, snapshot.count('downloading'), snapshot.count('paused')) == (2, 1, 1)
+    assert snapshot.total_speed == 100.0
+    assert snapshot.remaining_bytes == 800 + 500
+
+    a.mark_as_completed()
+    stats.update(a)
+    stats.remove('b')
+    snapshot = stats.snapshot()
+    assert snapshot.to_dict() == {
+        'total': 1, 'counts': {'completed': 1}, 'total_speed': 0.0, 'remaining_bytes': 0
+    }
+
+
+def test_matches_full_scan_after_many_updates():
+    stats = TaskStats()
+    tasks = [
+        DownloadTask(task_id=str(i), url='http://example.com/f', total_size=10_000, status='downloading')
+        for i in range(50)
+    ]
+    for step in range(20):
+        for i, task in enumerate(tasks):
+            task.downloaded_size = min(10_000, step * 500 + i)
+            task.speed = 0.1 * (step + i)
+            stats.update(task)
+
+    snapshot = stats.snapshot()
+    assert abs(snapshot.total_speed - sum(t.speed for t in tasks)) < 1e-6
+    assert snapshot.remaining_bytes == sum(t.remaining_size for t in tasks)
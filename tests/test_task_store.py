@@ -0,0 +1,126 @@
+"""
+任务存储测试
+"""
+import json
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.download_task import DownloadTask
+from src.database.task_store import TaskStore
+
+
+def _task(name, status='paused'):
+    return DownloadTask(
+        task_id=name, url=f'http://example.com/{name}', save_path='/tmp',
+        status=status, total_size=300, downloaded_size=100,
+        chunks=[
+            {'start': 0, 'end': 149, 'downloaded': 100},
+            {'start': 150, 'end': 299, 'downloaded': 0},
+        ]
+    )
+
+
+def test_round_trip_active_tasks(tmp_path):
+    task = _task('a')
+    task.mirrors = ['http://mirror.example.com/a']
+    store = TaskStore(str(tmp_path / 'tasks.db'))
+    store.save([task, _task('done', status='completed')])
+
+    loaded = TaskStore(str(tmp_path / 'tasks.db')).load_active()
+
+    assert [t.task_id for t in loaded] == ['a']
+    assert loaded[0].to_dict() == task.to_dict()
+
+
+def test_adds_mirrors_column_to_old_databases(tmp_path):
+    db_path = str(tmp_path / 'tasks.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE tasks (task_id TEXT PRIMARY KEY, url TEXT NOT NULL, filename TEXT NOT NULL DEFAULT '', "
+        "save_path TEXT NOT NULL DEFAULT '', total_size INTEGER NOT NULL DEFAULT 0, "
+        "downloaded_size INTEGER NOT NULL DEFAULT 0, status TEXT NOT NULL DEFAULT 'waiting', "
+        "progress REAL NOT NULL DEFAULT 0, speed REAL NOT NULL DEFAULT 0, created_at TEXT, started_at TEXT, "
+        "completed_at TEXT, error_message TEXT NOT NULL DEFAULT '', retry_count INTEGER NOT NULL DEFAULT 0, "
+        "connections INTEGER NOT NULL DEFAULT 8, priority INTEGER NOT NULL DEFAULT 0)"
+    )
+    conn.execute("INSERT INTO tasks (task_id, url, status) VALUES ('old', 'http://example.com/old', 'paused')")
+    conn.execute('PRAGMA user_version = 2')
+    conn.commit()
+    conn.close()
+
+    loaded = TaskStore(db_path).load_active()
+
+    assert [(t.task_id, t.mirrors, t.checksum) for t in loaded] == [('old', [], '')]
+
+
+def test_only_changed_tasks_are_written(tmp_path):
+    store = TaskStore(str(tmp_path / 'tasks.db'))
+    tasks = [_task('a'), _task('b')]
+    assert store.save(tasks) == 2
+    assert store.save(tasks) == 0
+
+    tasks[1].downloaded_size = 200
+    assert store.save(tasks) == 1
+
+
+def test_chunk_rows_follow_splits_and_shrinks(tmp_path):
+    store = TaskStore(str(tmp_path / 'tasks.db'))
+    task = _task('a')
+    store.save([task])
+
+    task.chunks.append({'start': 200, 'end': 299, 'downloaded': 0})
+    task.chunks[1]['end'] = 199
+    task.mark_dirty('chunks')
+    store.save([task])
+    assert TaskStore(str(tmp_path / 'tasks.db')).load_active()[0].chunks == task.chunks
+
+    task.chunks = task.chunks[:1]
+    store.save([task])
+    assert TaskStore(str(tmp_path / 'tasks.db')).load_active()[0].chunks == task.chunks
+
+
+def test_clean_tasks_are_skipped(tmp_path):
+    store = TaskStore(str(tmp_path / 'tasks.db'))
+    task = _task('a')
+    store.save([task])
+    assert not task.is_dirty
+
+    task.chunks[0]['downloaded'] = 150
+    assert store.save([task]) == 0
+
+    task.mark_as_paused()
+    assert task.is_dirty
+    store.save([task])
+    assert TaskStore(str(tmp_path / 'tasks.db')).load_active()[0].chunks[0]['downloaded'] == 150
+
+
+def test_history_pages_by_completion_time(tmp_path):
+    store = TaskStore(str(tmp_path / 'tasks.db'))
+    tasks = []
+    for i in range(5):
+        task = _task(f't{i}', status='completed')
+        task.completed_at = datetime(2024, 1, 1) + timedelta(minutes=i)
+        tasks.append(task)
+    store.save(tasks)
+
+    first = store.load_history(limit=2)
+    second = store.load_history(limit=2, before=first[-1])
+    third = store.load_history(limit=2, before=second[-1])
+
+    assert [t.task_id for t in first + second + third] == ['t4', 't3', 't2', 't1', 't0']
+
+
+def test_migrates_legacy_json(tmp_path):
+    json_path = tmp_path / 'tasks.json'
+    json_path.write_text(json.dumps([_task('a').to_dict()]), encoding='utf-8')
+    store = TaskStore(str(tmp_path / 'tasks.db'))
+
+    assert store.migrate_json(str(json_path)) == 1
+    assert not json_path.exists()
+    assert [task.task_id for task in store.load_active()] == ['a']